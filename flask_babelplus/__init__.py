@@ -22,29 +22,60 @@ from .domain import (
     ngettext,
     npgettext,
     pgettext,
+    resolve_lazy_strings,
 )
 from .utils import (
     force_locale,
+    format_compact_decimal,
+    format_compact_decimals,
     format_currency,
     format_date,
     format_datetime,
     format_decimal,
+    format_list,
+    format_lists,
     format_number,
     format_percent,
+    format_relative_time,
+    format_relative_times,
     format_scientific,
     format_time,
     format_timedelta,
+    format_unit,
+    format_units,
     get_locale,
     get_timezone,
+    parse_date,
+    parse_dates,
+    parse_decimal,
+    parse_decimals,
+    parse_number,
+    parse_numbers,
+    parse_time,
+    parse_times,
     refresh,
+    sort_key,
+    sort_keys,
+    sorted_localized,
     to_user_timezone,
     to_utc,
 )
 
+
+def __getattr__(name: str):
+    # the overlay module needs babel.support, only import it when used
+    if name == "OverlayDomain":
+        from .overlay import OverlayDomain
+
+        return OverlayDomain
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+
+
 __version__ = "2.3.0"
 __all__ = (
     "Babel",
     "Domain",
+    "OverlayDomain",
     "get_domain",
     "gettext",
     "ngettext",
@@ -53,6 +84,7 @@ __all__ = (
     "lazy_gettext",
     "lazy_ngettext",
     "lazy_pgettext",
+    "resolve_lazy_strings",
     "get_locale",
     "get_timezone",
     "refresh",
@@ -63,9 +95,28 @@ __all__ = (
     "format_date",
     "format_time",
     "format_timedelta",
+    "format_relative_time",
+    "format_relative_times",
     "format_number",
     "format_decimal",
     "format_currency",
     "format_percent",
     "format_scientific",
+    "format_compact_decimal",
+    "format_compact_decimals",
+    "format_list",
+    "format_lists",
+    "format_unit",
+    "format_units",
+    "parse_decimal",
+    "parse_decimals",
+    "parse_number",
+    "parse_numbers",
+    "parse_date",
+    "parse_dates",
+    "parse_time",
+    "parse_times",
+    "sort_key",
+    "sort_keys",
+    "sorted_localized",
 )
@@ -0,0 +1,420 @@
+# -*- coding: utf-8 -*-
+"""
+flask_babelplus.backends
+~~~~~~~~~~~~~~~~~~~~~~~~
+
+Catalog backends.  A backend is where a :class:`~flask_babelplus.Domain`
+loads its message catalogs from.  By default they are loaded from ``.mo``
+files but they can also be stored in a database which makes it possible
+to change translations without redeploying the application.
+
+:copyright: (c) 2013 by Armin Ronacher, Daniel Neuhäuser and contributors.
+:license: BSD, see LICENSE for more details.
+"""
+
+import os
+import threading
+import typing as t
+import weakref
+from collections.abc import Iterable, Mapping, Sequence
+from contextlib import closing
+from gettext import find as find_catalog
+from typing import Any
+
+from babel import Locale
+
+from . import metrics
+from .plurals import get_plural_rule
+
+# babel.support, sqlite3 and the catalog loaders are imported on first use
+if t.TYPE_CHECKING:
+    import sqlite3
+
+    from babel import support
+
+
+class CatalogBackend(object):
+    """Base class for catalog backends."""
+
+    def load(
+        self, dirname: str, locale: Locale | str | None, domain: str
+    ) -> "support.NullTranslations":
+        """Loads the catalog of ``domain`` for ``locale``.  Has to return a
+        :class:`babel.support.NullTranslations` object if there is no
+        such catalog.
+
+        :param dirname: The translations directory of the domain.  Backends
+                        that do not store their catalogs in files can
+                        ignore it.
+        :param locale: The locale to load the catalog for.
+        :param domain: The message domain.
+        """
+        raise NotImplementedError()
+
+    def list_locales(self, dirname: str, domain: str) -> list[str]:
+        """Returns the names of the locales ``domain`` has a catalog for.
+        By default these are the folders of ``dirname`` that contain a
+        ``LC_MESSAGES/<domain>.mo`` file.
+        """
+        if not os.path.isdir(dirname):
+            return []
+        return sorted(
+            folder
+            for folder in os.listdir(dirname)
+            if os.path.isfile(
+                os.path.join(dirname, folder, "LC_MESSAGES", domain + ".mo")
+            )
+        )
+
+    def changes(self, since: int | None) -> tuple[int | None, list[tuple[str, str]]]:
+        """Returns the ``(domain, locale)`` pairs of all catalogs that were
+        changed after ``since`` together with a new token that has to be
+        passed as ``since`` the next time.  If ``since`` is ``None`` only
+        the current token is returned.
+
+        This is polled by each :class:`~flask_babelplus.Domain` at most
+        every ``poll_interval`` seconds.  Backends that never change can
+        just keep the default.
+        """
+        return since, []
+
+
+class CatalogRegistry(object):
+    """A process-wide registry of the catalogs loaded from ``.mo`` files.
+    Catalogs are keyed by the resolved path of the translations directory,
+    the domain, the locale and the loading options, so every
+    :class:`~flask_babelplus.Domain` of every application that uses the
+    same file shares one loaded catalog.  A catalog is loaded again if the
+    identity (device, inode, size or mtime) of its file changed.
+
+    The registry only holds weak references, a catalog is dropped as soon
+    as no domain (or other cache) uses it anymore.
+    """
+
+    def __init__(self):
+        self._catalogs: dict[
+            tuple[t.Hashable, ...],
+            tuple[tuple[int, ...], "weakref.ref[support.NullTranslations]"],
+        ] = {}
+        # reentrant, the garbage collector may drop a catalog (and call
+        # _remove) while the lock is held
+        self._lock = threading.RLock()
+
+    def _remove(self, key: tuple[t.Hashable, ...], ref: weakref.ref[t.Any]):
+        with self._lock:
+            entry = self._catalogs.get(key)
+            if entry is not None and entry[1] is ref:
+                del self._catalogs[key]
+
+    def get(
+        self,
+        key: tuple[t.Hashable, ...],
+        filename: str,
+        load: t.Callable[[], "support.NullTranslations"],
+    ) -> "support.NullTranslations":
+        """Returns the catalog of ``key`` if ``filename`` did not change
+        since it was loaded or calls ``load`` and registers its result.
+        """
+        st = os.stat(filename)
+        identity = (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+        entry = self._catalogs.get(key)
+        if entry is not None and entry[0] == identity:
+            translations = entry[1]()
+            if translations is not None:
+                return translations
+
+        translations = load()
+        ref = weakref.ref(translations, lambda ref: self._remove(key, ref))
+        with self._lock:
+            self._catalogs[key] = (identity, ref)
+        if metrics.hook is not None:
+            metrics.hook.observe(
+                "catalog_size_bytes", st.st_size, domain=str(key[1]), locale=str(key[2])
+            )
+        return translations
+
+    def clear(self):
+        """Forgets all registered catalogs."""
+        with self._lock:
+            self._catalogs.clear()
+
+    def __len__(self) -> int:
+        return len(self._catalogs)
+
+
+#: the catalog registry shared by the whole process
+catalog_registry = CatalogRegistry()
+
+
+class FileSystemBackend(CatalogBackend):
+    """Loads the catalogs from ``.mo`` files.  This is the default backend.
+    The loaded catalogs are shared through :data:`catalog_registry`.
+
+    :param mmap: Memory-map the ``.mo`` files.  See
+                 :class:`~flask_babelplus.mofile.MappedTranslations`.
+    :param snapshots: Load up to date catalog snapshots instead of the
+                      ``.mo`` files.
+    :param partition: Split the catalogs into partitions that are loaded
+                      on first access.  See
+                      :class:`~flask_babelplus.mofile.PartitionedCatalog`.
+    """
+
+    def __init__(
+        self,
+        mmap: bool = False,
+        snapshots: bool = True,
+        partition: str | Sequence[str] | None = None,
+    ):
+        self.mmap = mmap
+        self.snapshots = snapshots
+        self.partition = partition
+
+    def load(self, dirname: str, locale: Locale | str | None, domain: str):
+        from babel import support
+
+        if locale is None:
+            return self._load(dirname, locale, domain, None)
+        filename = find_catalog(domain, dirname, [str(locale)])
+        if not filename:
+            return support.NullTranslations()
+
+        partition = self.partition
+        if partition is not None and not isinstance(partition, str):
+            partition = tuple(partition)
+        key = (
+            os.path.realpath(filename),
+            domain,
+            str(locale),
+            self.mmap,
+            self.snapshots,
+            partition,
+        )
+        return catalog_registry.get(
+            key, filename, lambda: self._load(dirname, locale, domain, filename)
+        )
+
+    def _load(
+        self,
+        dirname: str,
+        locale: Locale | str | None,
+        domain: str,
+        filename: str | None,
+    ) -> "support.NullTranslations":
+        from babel import support
+
+        from .mofile import MappedTranslations, PartitionedTranslations
+        from .snapshot import load_snapshot
+
+        if self.partition is not None:
+            if not filename:
+                return support.NullTranslations()
+            with open(filename, "rb") as fp:
+                return PartitionedTranslations(
+                    fp=fp, domain=domain, partition=self.partition
+                )
+
+        if self.mmap:
+            return MappedTranslations.load(dirname, locale, domain=domain)
+
+        if self.snapshots and filename:
+            translations = load_snapshot(filename, domain)
+            if translations is not None:
+                return translations
+
+        return support.Translations.load(dirname, locale, domain=domain)
+
+
+class SQLiteBackend(CatalogBackend):
+    """Stores the catalogs in a SQLite database.  Every change to a catalog
+    gets a new version which is how other processes (that share the
+    database file) find out which catalogs they have to reload.
+
+    ::
+
+        backend = SQLiteBackend("translations.sqlite")
+        backend.import_catalog("messages", "de", Translations.load(...))
+        domain = Domain(backend=backend)
+
+        # later, e.g. from an admin view
+        backend.update_messages("messages", "de", {"Yes": "Jawohl"})
+
+    :param path: The path to the database file.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS catalogs (
+            version INTEGER PRIMARY KEY AUTOINCREMENT,
+            domain TEXT NOT NULL,
+            locale TEXT NOT NULL,
+            plural_forms TEXT,
+            UNIQUE (domain, locale)
+        );
+        CREATE TABLE IF NOT EXISTS messages (
+            domain TEXT NOT NULL,
+            locale TEXT NOT NULL,
+            msgid TEXT NOT NULL,
+            form INTEGER NOT NULL,
+            msgstr TEXT NOT NULL,
+            PRIMARY KEY (domain, locale, msgid, form)
+        );
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with closing(self.connect()) as conn, conn:
+            conn.executescript(self.SCHEMA)
+
+    def connect(self) -> "sqlite3.Connection":
+        """Opens a new connection to the database."""
+        import sqlite3
+
+        return sqlite3.connect(self.path)
+
+    def _find_locale(self, conn: "sqlite3.Connection", domain: str, locale: str):
+        # same fallback as gettext: de_DE -> de
+        candidates = [locale]
+        if "_" in locale:
+            candidates.append(locale.split("_", 1)[0])
+        for candidate in candidates:
+            row = conn.execute(
+                "SELECT locale, plural_forms, version FROM catalogs "
+                "WHERE domain = ? AND locale = ?",
+                (domain, candidate),
+            ).fetchone()
+            if row is not None:
+                return row
+        return None
+
+    def load(self, dirname: str, locale: Locale | str | None, domain: str):
+        from babel import support
+
+        if locale is None:
+            return support.NullTranslations()
+
+        with closing(self.connect()) as conn:
+            row = self._find_locale(conn, domain, str(locale))
+            if row is None:
+                return support.NullTranslations()
+            name, plural_forms, version = row
+            messages = conn.execute(
+                "SELECT msgid, form, msgstr FROM messages "
+                "WHERE domain = ? AND locale = ?",
+                (domain, name),
+            ).fetchall()
+
+        translations = support.Translations(domain=domain)
+        translations.version = version
+        catalog = translations._catalog
+        for msgid, form, msgstr in messages:
+            catalog[msgid if form < 0 else (msgid, form)] = msgstr
+        if plural_forms:
+            translations._info["plural-forms"] = plural_forms
+            translations.plural = get_plural_rule(plural_forms)
+        return translations
+
+    def list_locales(self, dirname: str, domain: str) -> list[str]:
+        with closing(self.connect()) as conn:
+            rows = conn.execute(
+                "SELECT locale FROM catalogs WHERE domain = ? ORDER BY locale",
+                (domain,),
+            ).fetchall()
+        return [locale for (locale,) in rows]
+
+    def changes(self, since: int | None):
+        with closing(self.connect()) as conn:
+            if since is None:
+                row = conn.execute("SELECT max(version) FROM catalogs").fetchone()
+                return row[0] or 0, []
+            rows = conn.execute(
+                "SELECT version, domain, locale FROM catalogs "
+                "WHERE version > ? ORDER BY version",
+                (since,),
+            ).fetchall()
+        if not rows:
+            return since, []
+        return rows[-1][0], [(domain, locale) for _, domain, locale in rows]
+
+    def _publish(
+        self,
+        conn: "sqlite3.Connection",
+        domain: str,
+        locale: str,
+        plural_forms: str | None = None,
+    ):
+        if plural_forms is None:
+            row = conn.execute(
+                "SELECT plural_forms FROM catalogs WHERE domain = ? AND locale = ?",
+                (domain, locale),
+            ).fetchone()
+            plural_forms = row[0] if row else None
+        # REPLACE assigns a new (higher) version to the catalog
+        conn.execute(
+            "INSERT OR REPLACE INTO catalogs (domain, locale, plural_forms) "
+            "VALUES (?, ?, ?)",
+            (domain, locale, plural_forms),
+        )
+
+    def _write_messages(
+        self,
+        conn: "sqlite3.Connection",
+        domain: str,
+        locale: str,
+        messages: Mapping[Any, str],
+    ):
+        rows: list[tuple[str, str, str, int, str]] = []
+        for key, msgstr in messages.items():
+            if isinstance(key, tuple):
+                rows.append((domain, locale, key[0], key[1], msgstr))
+            else:
+                rows.append((domain, locale, key, -1, msgstr))
+        conn.executemany(
+            "INSERT OR REPLACE INTO messages (domain, locale, msgid, form, msgstr) "
+            "VALUES (?, ?, ?, ?, ?)",
+            rows,
+        )
+
+    def update_messages(
+        self,
+        domain: str,
+        locale: str,
+        messages: Mapping[Any, str],
+        plural_forms: str | None = None,
+    ):
+        """Adds or changes messages of a catalog and publishes the change.
+
+        :param domain: The message domain.
+        :param locale: The locale of the catalog.
+        :param messages: A mapping with the same keys and values as the
+                         ``_catalog`` of a translations object.
+        :param plural_forms: The ``Plural-Forms`` header of the catalog.
+                             Keeps the current one if not given.
+        """
+        with closing(self.connect()) as conn, conn:
+            self._write_messages(conn, domain, locale, messages)
+            self._publish(conn, domain, locale, plural_forms)
+
+    def delete_messages(self, domain: str, locale: str, msgids: Iterable[str]):
+        """Removes messages (with all their plural forms) from a catalog
+        and publishes the change.
+        """
+        with closing(self.connect()) as conn, conn:
+            conn.executemany(
+                "DELETE FROM messages WHERE domain = ? AND locale = ? AND msgid = ?",
+                [(domain, locale, msgid) for msgid in msgids],
+            )
+            self._publish(conn, domain, locale)
+
+    def import_catalog(
+        self, domain: str, locale: str, translations: "support.NullTranslations"
+    ):
+        """Replaces a catalog with the messages of ``translations``, e.g.
+        a catalog loaded from a ``.mo`` file.
+        """
+        messages = {k: v for k, v in translations._catalog.items() if k != ""}
+        with closing(self.connect()) as conn, conn:
+            conn.execute(
+                "DELETE FROM messages WHERE domain = ? AND locale = ?",
+                (domain, locale),
+            )
+            self._write_messages(conn, domain, locale, messages)
+            self._publish(conn, domain, locale, translations._info.get("plural-forms"))
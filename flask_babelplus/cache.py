@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""
+flask_babelplus.cache
+~~~~~~~~~~~~~~~~~~~~~
+
+Bounded caches.
+
+:copyright: (c) 2013 by Armin Ronacher, Daniel Neuhäuser and contributors.
+:license: BSD, see LICENSE for more details.
+"""
+
+import threading
+import typing as t
+from collections import OrderedDict
+from collections.abc import Iterator
+
+from . import metrics
+
+K = t.TypeVar("K")
+V = t.TypeVar("V")
+
+_missing = object()
+
+
+class LRUCache(t.Generic[K, V]):
+    """A thread safe mapping that holds at most ``maxsize`` items.  If it
+    is full, the least recently used item is dropped.
+
+    :param maxsize: The maximum number of items.
+    :param name: The name the hits, misses and evictions of the cache are
+                 reported with, see :mod:`~flask_babelplus.metrics`.
+    """
+
+    def __init__(self, maxsize: int = 128, name: str | None = None):
+        if maxsize < 1:
+            raise ValueError("maxsize has to be at least 1")
+        self.maxsize = maxsize
+        self.name = name
+        self._data: OrderedDict[K, V] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: K, default: t.Any = None) -> t.Any:
+        with self._lock:
+            value = self._data.get(key, _missing)
+            if value is not _missing:
+                self._data.move_to_end(key)
+        if metrics.hook is not None and self.name is not None:
+            metrics.hook.increment(
+                "cache_misses" if value is _missing else "cache_hits", cache=self.name
+            )
+        if value is _missing:
+            return default
+        return value
+
+    def __getitem__(self, key: K) -> V:
+        value = self.get(key, _missing)
+        if value is _missing:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: K, value: V):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if len(self._data) <= self.maxsize:
+                return
+            self._data.popitem(last=False)
+        if metrics.hook is not None and self.name is not None:
+            metrics.hook.increment("cache_evictions", cache=self.name)
+
+    def __delitem__(self, key: K):
+        with self._lock:
+            del self._data[key]
+
+    def pop(self, key: K, default: t.Any = None) -> t.Any:
+        with self._lock:
+            return self._data.pop(key, default)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._data
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __iter__(self) -> Iterator[K]:
+        with self._lock:
+            return iter(list(self._data))
+
+    def keys(self) -> list[K]:
+        return list(self)
+
+    def items(self) -> list[tuple[K, V]]:
+        with self._lock:
+            return list(self._data.items())
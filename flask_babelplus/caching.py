@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+"""
+flask_babelplus.caching
+~~~~~~~~~~~~~~~~~~~~~~~
+
+Helpers for caching localized output: a cache key for everything the
+output of the formatting and translation functions depends on, a Jinja
+tag that caches template fragments by it and a response helper that sets
+the ``Content-Language`` and ``Vary`` headers.
+
+:copyright: (c) 2013 by Armin Ronacher, Daniel Neuhäuser and contributors.
+:license: BSD, see LICENSE for more details.
+"""
+
+import typing as t
+from collections.abc import Iterable
+
+from babel.core import get_locale_identifier
+from flask import Response
+from jinja2 import nodes
+from jinja2.ext import Extension
+from jinja2.parser import Parser
+
+from .cache import LRUCache
+from .utils import get_locale, get_state, get_timezone
+
+#: the default number of fragments kept by ``{% i18n_cache %}``
+DEFAULT_FRAGMENT_CACHE_SIZE = 1024
+
+
+def i18n_cache_key() -> str:
+    """Returns a key for everything the localized output of the current
+    request depends on: the locale, the timezone, the catalog generation
+    (which changes when catalogs are reloaded), the version of
+    :attr:`Babel.date_format_table`, the default domain, the blueprint
+    whose domains are merged into it and the tenants of the
+    :class:`~flask_babelplus.overlay.OverlayDomain` domains, e.g.
+    ``"de_AT|Europe/Vienna|0|1|messages|None|None"``.
+
+    The catalog generation is counted per process, so caches shared by
+    several processes may miss after a reload but never serve stale
+    fragments of the same process.
+    """
+    state = get_state(silent=True)
+    if state is None:
+        return "None|None|0|0|None|None|None"
+    # the overlay module is only imported when an OverlayDomain is used
+    tenants = [
+        str(selector())
+        for selector in (
+            getattr(domain, "tenant_selector_func", None) for domain in state.domains()
+        )
+        if selector is not None
+    ]
+    return "%s|%s|%d|%d|%s|%s|%s" % (
+        get_locale(),
+        get_timezone(),
+        state.catalog_generation,
+        state.babel.date_format_version,
+        state.domain.domain,
+        state.registry.current_blueprint(),
+        ",".join(tenants) or None,
+    )
+
+
+def set_i18n_headers(
+    response: Response, vary: Iterable[str] = ("Accept-Language",)
+) -> Response:
+    """Sets the ``Content-Language`` header of ``response`` to the locale
+    of the current request and adds ``vary`` (the request headers the
+    locale selector depends on) to its ``Vary`` header.  Can be registered
+    as ``after_request`` function::
+
+        app.after_request(set_i18n_headers)
+    """
+    locale = get_locale()
+    if locale is not None:
+        response.headers["Content-Language"] = get_locale_identifier(
+            (locale.language, locale.territory, locale.script, locale.variant),
+            sep="-",
+        )
+    for header in vary:
+        response.vary.add(header)
+    return response
+
+
+class I18nCacheExtension(Extension):
+    """Adds the ``{% i18n_cache %}`` tag which caches the rendered fragment
+    by its arguments and :func:`i18n_cache_key`::
+
+        {% i18n_cache "sidebar", user.id %}
+            {{ _("Welcome") }} {{ last_login|datetimeformat }}
+        {% endi18n_cache %}
+
+    The fragments are kept in the LRU cache ``i18n_fragment_cache`` of the
+    environment.  It is installed by :class:`~flask_babelplus.Babel` and
+    holds ``BABEL_FRAGMENT_CACHE_SIZE`` fragments.
+    """
+
+    tags = {"i18n_cache"}
+
+    def __init__(self, environment: t.Any):
+        super().__init__(environment)
+        environment.extend(
+            i18n_fragment_cache=LRUCache(DEFAULT_FRAGMENT_CACHE_SIZE, name="fragment")
+        )
+
+    def parse(self, parser: Parser) -> nodes.Node:
+        lineno = next(parser.stream).lineno
+        args = [parser.parse_expression()]
+        while parser.stream.skip_if("comma"):
+            args.append(parser.parse_expression())
+        body = parser.parse_statements(("name:endi18n_cache",), drop_needle=True)
+        call = self.call_method("_render", [nodes.Tuple(args, "load")])
+        return nodes.CallBlock(call, [], [], body).set_lineno(lineno)
+
+    def _render(self, args: tuple[t.Any, ...], caller: t.Callable[[], str]) -> str:
+        cache: LRUCache[tuple[t.Any, ...], str]
+        cache = self.environment.i18n_fragment_cache  # pyright: ignore
+        key = (args, i18n_cache_key())
+        rv = cache.get(key)
+        if rv is None:
+            rv = cache[key] = caller()
+        return rv
@@ -0,0 +1,273 @@
+# -*- coding: utf-8 -*-
+"""
+flask_babelplus.cli
+~~~~~~~~~~~~~~~~~~~
+
+The ``flask babel`` command group.
+
+:copyright: (c) 2013 by Armin Ronacher, Daniel Neuhäuser and contributors.
+:license: BSD, see LICENSE for more details.
+"""
+
+import datetime
+import time
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+
+from .utils import get_state
+
+babel_cli = AppGroup("babel", help="Flask-BabelPlus commands.")
+
+
+def _benchmark(func, repeat: int) -> float:
+    """Returns the best time of ``repeat`` calls to ``func`` in ms."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+@babel_cli.command("build-cache")
+@click.option(
+    "--benchmark",
+    is_flag=True,
+    help="Compare the load time of each snapshot with its .mo file.",
+)
+@click.option("--repeat", default=5, show_default=True, help="Benchmark runs.")
+def build_cache(benchmark: bool, repeat: int):
+    """Writes a snapshot of every compiled catalog."""
+    from babel import support
+
+    from .snapshot import load_snapshot, write_snapshot
+
+    for domain in get_state().domains():
+        dirname = domain.get_translations_path(current_app)
+        for locale, filename in domain.list_catalogs(current_app):
+            path = write_snapshot(filename)
+            click.echo("{} [{}]: {}".format(domain.domain, locale, path))
+            if not benchmark:
+                continue
+
+            mo = _benchmark(
+                lambda: support.Translations.load(dirname, locale, domain.domain),
+                repeat,
+            )
+            # load both directly, the backend would return the catalog
+            # shared through the registry
+            snapshot = _benchmark(
+                lambda: load_snapshot(filename, domain.domain), repeat
+            )
+            click.echo(
+                "    .mo: {:.3f}ms  snapshot: {:.3f}ms  ({:.1f}x)".format(
+                    mo, snapshot, mo / snapshot if snapshot else float("inf")
+                )
+            )
+
+
+@babel_cli.command("compile")
+@click.option(
+    "-d",
+    "--domain",
+    "domains",
+    multiple=True,
+    help="Only compile this domain.  Can be given more than once.",
+)
+@click.option(
+    "-j", "--jobs", type=int, help="Worker processes.  Defaults to the CPU count."
+)
+@click.option("-f", "--force", is_flag=True, help="Also compile unchanged catalogs.")
+@click.option("--use-fuzzy", is_flag=True, help="Also compile fuzzy translations.")
+@click.option("--snapshots", is_flag=True, help="Also write the catalog snapshots.")
+@click.option(
+    "--hash-table",
+    is_flag=True,
+    help="Add a hash table for memory-mapped catalogs.  The .mo files then "
+    "differ from the ones of pybabel compile.",
+)
+@click.option(
+    "--statistics", is_flag=True, help="Show the problems found in the catalogs."
+)
+def compile_command(
+    domains: tuple[str, ...],
+    jobs: int | None,
+    force: bool,
+    use_fuzzy: bool,
+    snapshots: bool,
+    hash_table: bool,
+    statistics: bool,
+):
+    """Compiles the .po files of all domains in parallel."""
+    from .compiler import compile_catalogs
+
+    start = time.perf_counter()
+    results = compile_catalogs(
+        current_app,
+        domains or None,
+        jobs=jobs,
+        force=force,
+        use_fuzzy=use_fuzzy,
+        snapshots=snapshots,
+        hash_table=hash_table,
+    )
+    failed = 0
+    for result in results:
+        if result.status == "unchanged":
+            continue
+        click.echo(
+            "{} [{}]: {} {}".format(
+                result.domain, result.locale, result.status, result.mo
+            )
+        )
+        if result.status == "failed" or statistics:
+            for error in result.errors:
+                click.echo("    " + error)
+        failed += result.status == "failed"
+
+    compiled = sum(result.status == "compiled" for result in results)
+    click.echo(
+        "{} compiled, {} unchanged, {} failed in {:.2f}s".format(
+            compiled,
+            sum(result.status == "unchanged" for result in results),
+            failed,
+            time.perf_counter() - start,
+        )
+    )
+    if failed:
+        raise click.ClickException("{} catalogs failed to compile".format(failed))
+
+
+@babel_cli.command("extract")
+@click.option(
+    "-d",
+    "--domain",
+    "domains",
+    multiple=True,
+    help="Only extract this domain.  Can be given more than once.",
+)
+@click.option(
+    "-j", "--jobs", type=int, help="Worker processes.  Defaults to the CPU count."
+)
+@click.option(
+    "-k",
+    "--keyword",
+    "keywords",
+    multiple=True,
+    help="Also look for this function, e.g. 'tr' or 'ntr:1,2'.",
+)
+@click.option(
+    "-c",
+    "--add-comments",
+    "comment_tags",
+    multiple=True,
+    default=("NOTE:",),
+    show_default=True,
+    help="Extract comments starting with this tag for the translators.",
+)
+@click.option(
+    "-F",
+    "--mapping-file",
+    type=click.Path(exists=True, dir_okay=False),
+    help="The mapping of the source files to the extraction methods.  "
+    "Defaults to the babel.cfg next to the translations directory.",
+)
+@click.option("--no-cache", is_flag=True, help="Parse all files again.")
+def extract_command(
+    domains: tuple[str, ...],
+    jobs: int | None,
+    keywords: tuple[str, ...],
+    comment_tags: tuple[str, ...],
+    mapping_file: str | None,
+    no_cache: bool,
+):
+    """Extracts the messages of all domains into their .pot files."""
+    from babel.messages.frontend import parse_keywords
+
+    from .extractor import KEYWORDS, extract_messages
+
+    start = time.perf_counter()
+    results = extract_messages(
+        current_app,
+        domains or None,
+        jobs=jobs,
+        keywords={**KEYWORDS, **parse_keywords(list(keywords))},
+        comment_tags=comment_tags,
+        use_cache=not no_cache,
+        mapping_file=mapping_file,
+    )
+    failed = 0
+    for result in results:
+        click.echo(
+            "{}: {} {} ({} messages, {} files parsed)".format(
+                result.domain,
+                result.status,
+                result.pot,
+                result.messages,
+                result.parsed,
+            )
+        )
+        for filename, error in result.errors:
+            click.echo("    {}: {}".format(filename, error))
+        failed += result.status == "failed"
+
+    click.echo("done in {:.2f}s".format(time.perf_counter() - start))
+    if failed:
+        raise click.ClickException("{} templates were not written".format(failed))
+
+
+@babel_cli.command("usage")
+def usage():
+    """Shows the usage profile, the most requested locales first."""
+    state = get_state()
+    cached = {
+        locale
+        for domain in state.domains()
+        for cache in domain.caches.values()
+        for locale in cache
+    }
+    for entry in state.usage.profile():
+        last_seen = datetime.datetime.fromtimestamp(entry["last_seen"])
+        click.echo(
+            "{:<12} {:>10} {:>12.1f}  {}  {}".format(
+                entry["locale"],
+                entry["count"],
+                entry["score"],
+                last_seen.isoformat(" ", "seconds"),
+                "cached" if entry["locale"] in cached else "",
+            ).rstrip()
+        )
+
+
+@babel_cli.command("warmup")
+@click.option("--timezone", "timezones", multiple=True, help="Also load a timezone.")
+@click.option(
+    "--trace-memory",
+    is_flag=True,
+    help="Also show the allocated memory.  Makes the warmup slower.",
+)
+@click.option("--sort", is_flag=True, help="Show the slowest items last.")
+@click.option(
+    "--budget",
+    type=float,
+    help="Fail if the warmup takes longer than this many milliseconds.",
+)
+def warmup_command(
+    timezones: tuple[str, ...], trace_memory: bool, sort: bool, budget: float | None
+):
+    """Loads all catalogs, locales, patterns and timezones and shows how
+    long each of them took.
+    """
+    from .warmup import format_report, warmup
+
+    items = warmup(current_app, timezones, trace_memory=trace_memory)
+    if sort:
+        items.sort(key=lambda item: item.duration)
+    click.echo(format_report(items))
+    total = sum(item.duration for item in items) * 1000
+    if budget is not None and total > budget:
+        raise click.ClickException(
+            "warmup took {:.3f}ms, the budget is {:.3f}ms".format(total, budget)
+        )
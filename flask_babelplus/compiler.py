@@ -0,0 +1,279 @@
+# -*- coding: utf-8 -*-
+"""
+flask_babelplus.compiler
+~~~~~~~~~~~~~~~~~~~~~~~~
+
+Compiles the ``.po`` files of all domains of an application to ``.mo``
+files, used by ``flask babel compile``::
+
+    $ flask babel compile --jobs 8 --snapshots
+
+The catalogs are compiled in a process pool.  Each ``.po`` file is
+compiled on its own and written atomically, so the ``.mo`` files are the
+same as the ones of a serial build (and, unless a hash table is added, the
+same as the ones of ``pybabel compile``).  A ``.po`` file whose content did not
+change since the last build is skipped; the content hashes are kept in
+:data:`MANIFEST_NAME` in each translations directory.
+
+:copyright: (c) 2013 by Armin Ronacher, Daniel Neuhäuser and contributors.
+:license: BSD, see LICENSE for more details.
+"""
+
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import time
+import typing as t
+from collections.abc import Iterable
+from concurrent.futures import ProcessPoolExecutor
+
+from flask import Flask
+
+from .mofile import add_hash_table
+from .utils import get_state
+
+#: the name of the file the content hashes of the compiled ``.po`` files
+#: are stored in
+MANIFEST_NAME = ".babel-compile.json"
+
+MANIFEST_VERSION = 1
+
+
+class CompileJob(t.NamedTuple):
+    domain: str
+    locale: str
+    po: str
+    mo: str
+
+
+class CompileResult(t.NamedTuple):
+    domain: str
+    locale: str
+    #: the path of the ``.mo`` file
+    mo: str
+    #: ``"compiled"``, ``"unchanged"``, ``"fuzzy"`` (not compiled because
+    #: the catalog is marked as fuzzy) or ``"failed"``
+    status: str
+    #: the content hash of the ``.po`` file
+    digest: str
+    #: the problems found in the catalog or the error it failed with
+    errors: list[str]
+    #: the time it took in seconds
+    duration: float
+
+
+def find_jobs(app: Flask, domains: Iterable[str] | None = None) -> list[CompileJob]:
+    """Returns the ``.po`` files of the domains of ``app`` (or only of the
+    domains named in ``domains``).  Domains that use the same files are
+    only compiled once.
+    """
+    wanted = None if domains is None else set(domains)
+    jobs: dict[str, CompileJob] = {}
+    for domain in get_state(app).domains():
+        if wanted is not None and domain.domain not in wanted:
+            continue
+        dirname = domain.get_translations_path(app)
+        if not os.path.isdir(dirname):
+            continue
+        for locale in sorted(os.listdir(dirname)):
+            po = os.path.join(dirname, locale, "LC_MESSAGES", domain.domain + ".po")
+            if os.path.isfile(po):
+                job = CompileJob(domain.domain, locale, po, po[:-3] + ".mo")
+                jobs.setdefault(os.path.realpath(po), job)
+    return list(jobs.values())
+
+
+def _digest(data: bytes, use_fuzzy: bool, hash_table: bool) -> str:
+    h = hashlib.sha256(data)
+    h.update(bytes([use_fuzzy, hash_table]))
+    return h.hexdigest()
+
+
+def compile_catalog(
+    job: CompileJob,
+    use_fuzzy: bool = False,
+    snapshot: bool = False,
+    hash_table: bool = False,
+) -> CompileResult:
+    """Compiles the ``.po`` file of ``job`` like ``pybabel compile`` and
+    writes the ``.mo`` file (and its snapshot).  With ``hash_table`` a GNU
+    hash table is appended to the ``.mo`` file.  Runs in the worker
+    processes, so the errors a catalog can fail with are returned instead
+    of raised.
+    """
+    from babel.core import UnknownLocaleError
+    from babel.messages.mofile import write_mo
+    from babel.messages.pofile import PoFileError, read_po
+
+    start = time.perf_counter()
+    errors: list[str] = []
+    digest = ""
+    try:
+        with open(job.po, "rb") as fp:
+            data = fp.read()
+        digest = _digest(data, use_fuzzy, hash_table)
+        # unlike pybabel, syntax errors fail the catalog
+        catalog = read_po(io.BytesIO(data), job.locale, job.domain, abort_invalid=True)
+        if catalog.fuzzy and not use_fuzzy:
+            status = "fuzzy"
+        else:
+            for message, message_errors in catalog.check():
+                for error in message_errors:
+                    errors.append("%s: %s" % (message.id, error))
+            buf = io.BytesIO()
+            write_mo(buf, catalog, use_fuzzy=use_fuzzy)
+            mo = buf.getvalue()
+            if hash_table:
+                # memory-mapped catalogs look messages up in the hash table
+                mo = add_hash_table(mo)
+            tmp = "%s.%d.tmp" % (job.mo, os.getpid())
+            with open(tmp, "wb") as fp:
+                fp.write(mo)
+            os.replace(tmp, job.mo)
+            if snapshot:
+                from .snapshot import write_snapshot
+
+                write_snapshot(job.mo)
+            status = "compiled"
+    except (OSError, ValueError, PoFileError, UnknownLocaleError) as e:
+        # unreadable files, syntax errors, bad encodings and locales
+        status = "failed"
+        errors.append("%s: %s" % (type(e).__name__, e))
+    return CompileResult(
+        job.domain,
+        job.locale,
+        job.mo,
+        status,
+        digest,
+        errors,
+        time.perf_counter() - start,
+    )
+
+
+def _load_manifest(dirname: str) -> dict[str, t.Any]:
+    try:
+        with open(os.path.join(dirname, MANIFEST_NAME), "rb") as fp:
+            manifest = json.load(fp)
+    except (OSError, ValueError):
+        return {}
+    if manifest.get("version") != MANIFEST_VERSION:
+        return {}
+    return manifest["catalogs"]
+
+
+def _save_manifest(dirname: str, catalogs: dict[str, t.Any]):
+    filename = os.path.join(dirname, MANIFEST_NAME)
+    tmp = "%s.%d.tmp" % (filename, os.getpid())
+    with open(tmp, "w") as fp:
+        json.dump({"version": MANIFEST_VERSION, "catalogs": catalogs}, fp, indent=2)
+    os.replace(tmp, filename)
+
+
+def _unchanged_digest(
+    job: CompileJob, entry: t.Any, use_fuzzy: bool, snapshot: bool, hash_table: bool
+) -> str | None:
+    # the digest of the .po file if neither it nor the .mo file changed
+    if not entry:
+        return None
+    try:
+        with open(job.po, "rb") as fp:
+            digest = _digest(fp.read(), use_fuzzy, hash_table)
+        st = os.stat(job.mo)
+    except OSError:
+        return None
+    if digest != entry["digest"] or [st.st_size, st.st_mtime_ns] != entry["mo"]:
+        return None
+    if snapshot:
+        from .snapshot import load_snapshot
+
+        if load_snapshot(job.mo) is None:
+            return None
+    return digest
+
+
+def compile_catalogs(
+    app: Flask,
+    domains: Iterable[str] | None = None,
+    jobs: int | None = None,
+    force: bool = False,
+    use_fuzzy: bool = False,
+    snapshots: bool = False,
+    hash_table: bool = False,
+) -> list[CompileResult]:
+    """Compiles the ``.po`` files of the domains of ``app`` and returns the
+    results ordered by domain and locale.
+
+    :param domains: Only compile the domains with these names.
+    :param jobs: The number of worker processes.  Defaults to the number
+                 of CPUs, ``1`` compiles in this process.
+    :param force: Also compile the catalogs whose ``.po`` file did not
+                  change.
+    :param use_fuzzy: Also compile fuzzy translations.
+    :param snapshots: Also write the snapshot of each ``.mo`` file, see
+                      ``flask babel build-cache``.
+    :param hash_table: Append a GNU hash table to the ``.mo`` files, so
+                       memory-mapped catalogs do not have to index them.
+                       The files are then no longer byte-identical to the
+                       ones of ``pybabel compile``.
+    """
+    manifests: dict[str, dict[str, t.Any]] = {}
+    results: list[CompileResult] = []
+    pending: list[CompileJob] = []
+    for job in find_jobs(app, domains):
+        dirname = os.path.dirname(os.path.dirname(os.path.dirname(job.po)))
+        if dirname not in manifests:
+            manifests[dirname] = _load_manifest(dirname)
+        key = os.path.relpath(job.po, dirname).replace(os.sep, "/")
+        digest = None
+        if not force:
+            entry = manifests[dirname].get(key)
+            digest = _unchanged_digest(job, entry, use_fuzzy, snapshots, hash_table)
+        if digest is None:
+            pending.append(job)
+        else:
+            results.append(
+                CompileResult(
+                    job.domain, job.locale, job.mo, "unchanged", digest, [], 0.0
+                )
+            )
+
+    if jobs is None:
+        jobs = os.cpu_count() or 1
+    jobs = min(jobs, len(pending))
+    if jobs > 1:
+        # spawn, as the application may have started threads
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(jobs, mp_context=context) as executor:
+            compiled = list(
+                executor.map(
+                    compile_catalog,
+                    pending,
+                    [use_fuzzy] * len(pending),
+                    [snapshots] * len(pending),
+                    [hash_table] * len(pending),
+                )
+            )
+    else:
+        compiled = [
+            compile_catalog(job, use_fuzzy, snapshots, hash_table) for job in pending
+        ]
+
+    for job, result in zip(pending, compiled, strict=True):
+        dirname = os.path.dirname(os.path.dirname(os.path.dirname(job.po)))
+        key = os.path.relpath(job.po, dirname).replace(os.sep, "/")
+        if result.status == "compiled":
+            st = os.stat(job.mo)
+            manifests[dirname][key] = {
+                "digest": result.digest,
+                "mo": [st.st_size, st.st_mtime_ns],
+            }
+        else:
+            manifests[dirname].pop(key, None)
+        results.append(result)
+
+    for dirname, catalogs in manifests.items():
+        _save_manifest(dirname, catalogs)
+    results.sort(key=lambda result: (result.domain, result.locale))
+    return results
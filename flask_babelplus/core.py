@@ -8,13 +8,23 @@ The actual Flask extension.
 :license: BSD, see LICENSE for more details.
 """
 
+import atexit
 import os
-from typing import Callable, override
+from collections import UserDict
+from numbers import Number
+from typing import Any, Callable, override
 from zoneinfo import ZoneInfo
 
 from babel import Locale
 from flask import Flask
+from jinja2 import pass_context
+from jinja2.runtime import Context
+from markupsafe import Markup, escape
 
+from . import metrics, timing
+from .cache import LRUCache
+from .caching import DEFAULT_FRAGMENT_CACHE_SIZE, I18nCacheExtension
+from .cli import babel_cli
 from .constants import (
     DEFAULT_DATE_FORMATS,
     DEFAULT_LOCALE,
@@ -23,16 +33,23 @@ from .constants import (
     DateFormatKey,
 )
 from .domain import Domain, get_domain
+from .registry import DomainRegistry
+from .signals import catalog_invalidated
+from .usage import LocaleUsage
 from .utils import (
+    format_compact_decimal,
     format_currency,
     format_date,
     format_datetime,
     format_decimal,
+    format_list,
     format_number,
     format_percent,
+    format_relative_time,
     format_scientific,
     format_time,
     format_timedelta,
+    format_unit,
     get_state,
 )
 
@@ -63,6 +80,10 @@ class Babel(object):
         self.locale_selector_func: Callable[[], str | None] | None = None
         self.timezone_selector_func: Callable[[], str | None] | None = None
         self.date_formats: dict[DateFormatKey, DateFormat]
+        self._format_table: dict[tuple[str, DateFormat], DateFormat] = {}
+        self._format_table_source: DateFormats | None = None
+        self._format_table_version = -1
+        self._format_table_generation = 0
 
         if app is not None:
             self.init_app(
@@ -101,10 +122,25 @@ class Babel(object):
         app.config.setdefault("BABEL_DEFAULT_TIMEZONE", default_timezone)
         app.config.setdefault("BABEL_CONFIGURE_JINJA", configure_jinja)
         app.config.setdefault("BABEL_DOMAIN", default_domain)
+        app.config.setdefault("BABEL_USAGE_PROFILE", None)
+        app.config.setdefault("BABEL_PRELOAD_LOCALES", 0)
+        app.config.setdefault("BABEL_MAX_CACHED_LOCALES", None)
+        app.config.setdefault("BABEL_TIMING_SAMPLE_RATE", 0.0)
+        app.config.setdefault("BABEL_SERVER_TIMING", False)
+        app.config.setdefault("BABEL_FRAGMENT_CACHE_SIZE", DEFAULT_FRAGMENT_CACHE_SIZE)
 
-        app.extensions["babel"] = _BabelState(
+        state = app.extensions["babel"] = _BabelState(
             babel=self, app=app, domain=default_domain
         )
+        app.cli.add_command(babel_cli)
+        timing.init_app(app)
+
+        profile = app.config["BABEL_USAGE_PROFILE"]
+        if profile:
+            state.usage.load(profile)
+            atexit.register(_save_usage_profile, state.usage, profile)
+            if app.config["BABEL_PRELOAD_LOCALES"]:
+                self.preload_locales(app=app)
 
         #: a mapping of Babel datetime format strings that can be modified
         #: to change the defaults.  If you invoke :func:`format_datetime`
@@ -117,10 +153,12 @@ class Babel(object):
         #:      returned in step one) is looked up.  If the return value
         #:      is anything but `None` this is used as new format string.
         #:      otherwise the default for that language is used.
+        #:
+        #: Changes to the mapping are tracked, see :attr:`date_format_table`.
         if date_formats is not None:
-            self.date_formats = date_formats
+            self.date_formats = DateFormats(date_formats)
         else:
-            self.date_formats = DEFAULT_DATE_FORMATS.copy()
+            self.date_formats = DateFormats(DEFAULT_DATE_FORMATS)
 
         if configure_jinja:
             app.jinja_env.filters.update(
@@ -128,18 +166,129 @@ class Babel(object):
                 dateformat=format_date,
                 timeformat=format_time,
                 timedeltaformat=format_timedelta,
+                relativetimeformat=format_relative_time,
                 numberformat=format_number,
                 decimalformat=format_decimal,
                 currencyformat=format_currency,  # pyright: ignore
                 percentformat=format_percent,
                 scientificformat=format_scientific,
+                listformat=format_list,
+                unitformat=format_unit,
+                compactdecimalformat=format_compact_decimal,
             )
             app.jinja_env.add_extension("jinja2.ext.i18n")
-            app.jinja_env.install_gettext_callables(  # pyright: ignore
-                lambda x: get_domain().get_translations().ugettext(x),
-                lambda s, p, n: get_domain().get_translations().ungettext(s, p, n),
-                newstyle=True,
+            app.jinja_env.add_extension(I18nCacheExtension)
+            app.jinja_env.i18n_fragment_cache = LRUCache(  # pyright: ignore
+                app.config["BABEL_FRAGMENT_CACHE_SIZE"], name="fragment"
             )
+            # the callables interpolate like Domain.gettext, so Jinja's
+            # newstyle wrappers are not used
+            app.jinja_env.newstyle_gettext = True  # pyright: ignore
+            app.jinja_env.globals.update(
+                gettext=_jinja_gettext,
+                ngettext=_jinja_ngettext,
+                pgettext=_jinja_pgettext,
+                npgettext=_jinja_npgettext,
+            )
+
+    @property
+    def date_format_table(self) -> dict[tuple[str, DateFormat], DateFormat]:
+        """A flattened version of :attr:`date_formats` which maps a
+        ``(kind, format)`` tuple, e.g. ``("date", "short")`` or
+        ``("date", None)``, to the effective format.  It is only rebuilt
+        when :attr:`date_formats` was changed.
+        """
+        return self._update_format_table()
+
+    def _update_format_table(self) -> dict[tuple[str, DateFormat], DateFormat]:
+        formats = self.date_formats
+        if not isinstance(formats, DateFormats):
+            # a plain mapping was assigned, start tracking it
+            formats = self.date_formats = DateFormats(formats)
+        if (
+            self._format_table_source is not formats
+            or self._format_table_version != formats.version
+        ):
+            self._format_table = _build_format_table(formats)
+            self._format_table_source = formats
+            self._format_table_version = formats.version
+            self._format_table_generation += 1
+        return self._format_table
+
+    @property
+    def date_format_version(self) -> int:
+        """A number that changes whenever :attr:`date_format_table`
+        changes.
+        """
+        self._update_format_table()
+        return self._format_table_generation
+
+    def register_domain(
+        self,
+        domain: Domain,
+        priority: int = 0,
+        blueprint: str | None = None,
+        app: Flask | None = None,
+    ):
+        """Registers a translation domain, e.g. the one of a plugin.  The
+        catalogs of all registered domains are merged into one lookup table
+        per locale which is used by all of them.  If several domains
+        translate the same message, the domain with the highest
+        ``priority`` wins.
+
+        :param domain: The :class:`Domain` to register.
+        :param priority: The priority of the domain.
+        :param blueprint: Only use the domain in requests to this blueprint.
+        :param app: The application.  Defaults to the application passed
+                    to :class:`Babel` or the current application.
+        """
+        state = get_state(app or self.app)
+        state.registry.register(domain, priority, blueprint)
+        if state.app.config["BABEL_PRELOAD_LOCALES"]:
+            self.preload_locales(app=state.app, domains=[domain])
+
+    def preload_locales(
+        self,
+        n: int | None = None,
+        app: Flask | None = None,
+        domains: list[Domain] | None = None,
+    ) -> list[str]:
+        """Loads the catalogs of the ``n`` most requested locales according
+        to the usage profile (see :meth:`usage_profile`).  This happens
+        automatically when the application is initialized and when a
+        domain is registered if ``BABEL_PRELOAD_LOCALES`` is set.  Returns
+        the preloaded locales.
+
+        :param n: The number of locales.  Defaults to
+                  ``BABEL_PRELOAD_LOCALES``.
+        :param app: The application.
+        :param domains: The domains to load the catalogs of.  Defaults to
+                        the default domain and all registered domains.
+        """
+        state = get_state(app or self.app)
+        if n is None:
+            n = state.app.config["BABEL_PRELOAD_LOCALES"]
+        locales = state.usage.top(n)
+        with state.app.app_context():
+            for domain in domains or state.domains():
+                for locale in locales:
+                    domain.get_translations_for(locale, state.app)
+        return locales
+
+    def usage_profile(self, app: Flask | None = None) -> list[dict[str, Any]]:
+        """Returns the number of requests per locale, most requested (and
+        most recently requested) first.  See
+        :meth:`~flask_babelplus.usage.LocaleUsage.profile`.
+        """
+        return get_state(app or self.app).usage.profile()
+
+    def save_usage_profile(self, filename: str | None = None, app: Flask | None = None):
+        """Writes the usage profile to ``filename`` which defaults to
+        ``BABEL_USAGE_PROFILE``.  The profile is also written when the
+        process exits.
+        """
+        state = get_state(app or self.app)
+        state.usage.save(filename or state.app.config["BABEL_USAGE_PROFILE"])
 
     def localeselector(self, f: Callable[[], str | None]) -> Callable[[], str | None]:
         """Registers a callback function for locale selection.  The default
@@ -211,15 +360,193 @@ class Babel(object):
         rv = state.locale_cache.get(locale)
         if rv is None:
             state.locale_cache[locale] = rv = Locale.parse(locale)
+            if metrics.hook is not None:
+                metrics.hook.increment("cache_misses", cache="locale")
+        elif metrics.hook is not None:
+            metrics.hook.increment("cache_hits", cache="locale")
         return rv
 
 
+class DateFormats(UserDict[DateFormatKey, DateFormat]):
+    """The mapping of :attr:`Babel.date_formats`.  Counts its changes in
+    :attr:`version`.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        self.version = 0
+        super().__init__(*args, **kwargs)
+
+    @override
+    def __setitem__(self, key: DateFormatKey, value: DateFormat):
+        self.data[key] = value
+        self.version += 1
+
+    @override
+    def __delitem__(self, key: DateFormatKey):
+        del self.data[key]
+        self.version += 1
+
+    @override
+    def __ior__(self, other: Any):
+        self.update(other)
+        return self
+
+
+def _escape_variables(context: Context, variables: dict[str, Any]):
+    # like Jinja's newstyle gettext: the translation is trusted but the
+    # variables are escaped in autoescaped templates
+    if context.eval_ctx.autoescape:
+        for key, value in variables.items():
+            if not isinstance(value, Number):
+                variables[key] = escape(value)
+
+
+def _jinja_result(context: Context, rv: str) -> str:
+    return Markup(rv) if context.eval_ctx.autoescape else rv
+
+
+@pass_context
+@timing.timed("gettext")
+def _jinja_gettext(__context: Context, __string: str, **variables: Any) -> str:
+    domain = get_domain()
+    _escape_variables(__context, variables)
+    rv = domain._gettext(domain.get_translations(), __string, variables)
+    if not variables and not domain.icu:
+        # templates always interpolate, e.g. "%%" in {% trans %} blocks
+        rv = domain._interpolate(rv, __string, variables)
+    return _jinja_result(__context, rv)
+
+
+@pass_context
+@timing.timed("gettext")
+def _jinja_ngettext(
+    __context: Context, __singular: str, __plural: str, __num: int, **variables: Any
+) -> str:
+    domain = get_domain()
+    _escape_variables(__context, variables)
+    rv = domain._ngettext(
+        domain.get_translations(), __singular, __plural, __num, variables
+    )
+    return _jinja_result(__context, rv)
+
+
+@pass_context
+@timing.timed("gettext")
+def _jinja_pgettext(
+    __context: Context, __msgctxt: str, __string: str, **variables: Any
+) -> str:
+    domain = get_domain()
+    _escape_variables(__context, variables)
+    rv = domain._pgettext(domain.get_translations(), __msgctxt, __string, variables)
+    if not variables and not domain.icu:
+        rv = domain._interpolate(rv, __string, variables)
+    return _jinja_result(__context, rv)
+
+
+@pass_context
+@timing.timed("gettext")
+def _jinja_npgettext(
+    __context: Context,
+    __msgctxt: str,
+    __singular: str,
+    __plural: str,
+    __num: int,
+    **variables: Any,
+) -> str:
+    domain = get_domain()
+    _escape_variables(__context, variables)
+    rv = domain._npgettext(
+        domain.get_translations(), __msgctxt, __singular, __plural, __num, variables
+    )
+    return _jinja_result(__context, rv)
+
+
+_WIDTHS = ("short", "medium", "long", "full")
+
+
+def _build_format_table(
+    formats: DateFormats,
+) -> dict[tuple[str, DateFormat], DateFormat]:
+    table: dict[tuple[str, DateFormat], DateFormat] = {}
+    for kind in formats:
+        if "." in kind:
+            continue
+        for width in _WIDTHS:
+            format = formats.get("%s.%s" % (kind, width))  # pyright: ignore
+            table[kind, width] = width if format is None else format
+        default = formats[kind]
+        table[kind, None] = table.get((kind, default), default)
+    return table
+
+
+def _save_usage_profile(usage: LocaleUsage, filename: str):
+    try:
+        usage.save(filename)
+    except OSError:
+        # nothing to do about it while the interpreter exits
+        pass
+
+
 class _BabelState(object):
     def __init__(self, babel: Babel, app: Flask, domain: Domain):
         self.babel: Babel = babel
         self.app: Flask = app
         self.domain: Domain = domain
+        self.registry: DomainRegistry = DomainRegistry()
         self.locale_cache: dict[str, Locale] = {}
+        self.usage: LocaleUsage = LocaleUsage()
+        #: counts the invalidations of catalogs
+        self.catalog_generation = 0
+        catalog_invalidated.connect(self._on_catalog_invalidated)
+
+    def _on_catalog_invalidated(self, sender: Domain, locale: str | None = None):
+        self.catalog_generation += 1
+
+    def domains(self) -> list[Domain]:
+        """Returns the default domain and all registered domains."""
+        rv = [self.domain]
+        for _, _, domain, _ in self.registry.entries:
+            if domain not in rv:
+                rv.append(domain)
+        return rv
+
+    def record_locale(self, locale: Locale | None):
+        """Records a request for ``locale`` and evicts the catalogs of the
+        coldest locales if more than ``BABEL_MAX_CACHED_LOCALES`` are
+        cached.
+        """
+        name = str(locale)
+        self.usage.record(name)
+        limit = self.app.config["BABEL_MAX_CACHED_LOCALES"]
+        if limit and any(
+            len(domain.caches.get(domain.get_translations_path(self.app), ())) > limit
+            for domain in self.domains()
+        ):
+            self.evict_cold_locales(limit, name)
+
+    def evict_cold_locales(self, keep: int, current: str | None = None):
+        """Drops the catalogs of all but the ``keep`` hottest locales (and
+        ``current``) from the caches the domains keep for this application.
+        The process-wide catalog registry only holds weak references, so the
+        catalogs are freed unless another application still caches them.
+        """
+        hot = set(self.usage.top(keep))
+        if current is not None:
+            hot.add(current)
+        evicted = 0
+        for domain in self.domains():
+            # the caches of other applications are keyed by their own paths
+            cache = domain.caches.get(domain.get_translations_path(self.app))
+            if cache is None:
+                continue
+            for key in list(cache):
+                if key not in hot and cache.pop(key, None) is not None:
+                    evicted += 1
+        if evicted and metrics.hook is not None:
+            metrics.hook.increment("cache_evictions", evicted, cache="catalog")
+        for key in list(self.registry.cache):
+            if key[0] not in hot:
+                self.registry.cache.pop(key, None)
 
     @override
     def __repr__(self):
@@ -10,34 +10,133 @@ Localization domain.
 """
 
 import os
+import time
+import typing as t
+from collections.abc import Iterable, Sequence
 from typing import Any
 
-from babel import support
-from flask import Flask
+from babel import Locale
+from flask import Flask, current_app, has_app_context
 
+from . import interpolation, metrics, tracking
+from .backends import CatalogBackend, FileSystemBackend
+from .plurals import install_plural_rule
+from .signals import catalog_invalidated
 from .speaklater import LazyString
+from .timing import timed
 from .utils import get_locale, get_state
 
+if t.TYPE_CHECKING:
+    from babel import support
+
 
 class Domain(object):
     """Localization domain. By default it will look for tranlations in the
     Flask application directory and "messages" domain - all message
     catalogs should be called ``messages.mo``.
+
+    :param dirname: The directory the translations are stored in.  Defaults
+                    to the ``translations`` folder of the application.
+    :param domain: The name of the message catalogs.
+    :param mmap: If set to ``True`` the ``.mo`` files are memory-mapped and
+                 messages are only decoded when they are looked up.  This
+                 makes loading large catalogs almost free.
+    :param snapshots: If set to ``True`` (the default) catalog snapshots
+                      built with ``flask babel build-cache`` are loaded
+                      instead of the ``.mo`` files as long as they are
+                      up to date.  Snapshots are not used together with
+                      ``mmap``.
+    :param partition: Split the catalogs into partitions which are loaded
+                      on first access, either by message context
+                      (``"msgctxt"``) or by a sequence of msgid prefixes
+                      (e.g. ``("admin.", "email.")``).  Implies ``mmap``.
+                      See :meth:`partition_stats`.
+    :param backend: The :class:`~flask_babelplus.backends.CatalogBackend`
+                    the catalogs are loaded from.  Defaults to a
+                    :class:`~flask_babelplus.backends.FileSystemBackend`
+                    using the ``mmap``, ``snapshots`` and ``partition``
+                    options.
+    :param poll_interval: How often (in seconds) the backend is asked for
+                          changed catalogs.  Only the changed locales are
+                          dropped from the cache.
+    :param icu: If set to ``True`` the messages are in ICU MessageFormat
+                (``{name}``, ``select`` and ``plural``) instead of
+                ``%(name)s`` format strings and are always formatted, see
+                :func:`~flask_babelplus.interpolation.compile_icu`.
     """
 
-    def __init__(self, dirname: str | None = None, domain: str = "messages"):
+    def __init__(
+        self,
+        dirname: str | None = None,
+        domain: str = "messages",
+        mmap: bool = False,
+        snapshots: bool = True,
+        partition: str | Sequence[str] | None = None,
+        backend: CatalogBackend | None = None,
+        poll_interval: float = 5.0,
+        icu: bool = False,
+    ):
         self.dirname = dirname
         self.domain = domain
+        if backend is None:
+            backend = FileSystemBackend(
+                mmap=mmap, snapshots=snapshots, partition=partition
+            )
+        self.backend = backend
+        self.poll_interval = poll_interval
+        self.icu = icu
 
-        self.cache: dict[str, support.NullTranslations] = {}
+        #: the translations caches, one per translations directory
+        self.caches: dict[str, dict[str, "support.NullTranslations"]] = {}
+        self._last_path: str | None = None
+        self._changes_token: int | None = None
+        self._next_poll = 0.0
 
     def as_default(self):
         """Set this domain as the default one for the current request"""
         get_state().domain = self
 
+    @property
+    def cache(self) -> dict[str, "support.NullTranslations"]:
+        """The translations cache of the current application.  Assigning
+        to it replaces the cache, e.g. ``domain.cache = {}`` drops all of
+        its catalogs.
+        """
+        return self.get_translations_cache()
+
+    @cache.setter
+    def cache(self, value: dict[str, "support.NullTranslations"]):
+        path = self._get_cache_path()
+        if path is None:
+            # no application used the domain yet, so nothing is cached
+            if value:
+                raise RuntimeError("Working outside of application context.")
+            return
+        self.caches[path] = value
+        catalog_invalidated.send(self, locale=None)
+
+    def _get_cache_path(self) -> str | None:
+        if self.dirname is not None:
+            return self.dirname
+        if has_app_context():
+            return self.get_translations_path(current_app)
+        # outside of an application context use the last used cache
+        return self._last_path
+
     def get_translations_cache(self):
-        """Returns a dictionary-like object for translation caching"""
-        return self.cache
+        """Returns a dictionary-like object for translation caching.  There
+        is one per translations directory, so applications with different
+        root paths that share a domain never see each other's catalogs.
+        """
+        path = self._get_cache_path()
+        if path is None:
+            return {}
+
+        cache = self.caches.get(path)
+        if cache is None:
+            cache = self.caches.setdefault(path, {})
+        self._last_path = path
+        return cache
 
     def get_translations_path(self, app: Flask):
         """Returns the translations directory path. Override if you want
@@ -45,30 +144,127 @@ class Domain(object):
         """
         return self.dirname or os.path.join(app.root_path, "translations")
 
+    def load_translations(self, dirname: str, locale: Locale | str):
+        """Loads the translations for ``locale`` from ``dirname``.  Override
+        if you want to load the catalogs from somewhere else.
+        """
+        return self.backend.load(dirname, locale, self.domain)
+
+    def invalidate(self, locale: str | None = None):
+        """Drops the cached translations of ``locale`` (including all of its
+        territories, e.g. ``de_AT`` for ``de``) or of all locales.
+        """
+        for cache in list(self.caches.values()):
+            if locale is None:
+                cache.clear()
+                continue
+            for key in list(cache):
+                if key == locale or key.startswith(locale + "_"):
+                    cache.pop(key, None)
+        catalog_invalidated.send(self, locale=locale)
+
+    def partition_stats(self) -> dict[str, dict[str, dict[str, Any]]]:
+        """Returns the statistics of all loaded partitioned catalogs as a
+        mapping of the locale to the stats of its partitions.  See
+        :meth:`~flask_babelplus.mofile.PartitionedCatalog.stats`.
+        """
+        from .mofile import PartitionedTranslations
+
+        return {
+            locale: translations.partition_stats()
+            for locale, translations in self.get_translations_cache().items()
+            if isinstance(translations, PartitionedTranslations)
+        }
+
+    def poll_changes(self):
+        """Asks the backend for changed catalogs and drops them from the
+        cache.  Called by :meth:`get_translations` at most every
+        ``poll_interval`` seconds.
+        """
+        self._next_poll = time.monotonic() + self.poll_interval
+        token, changed = self.backend.changes(self._changes_token)
+        if self._changes_token is not None:
+            for domain, locale in changed:
+                if domain == self.domain:
+                    self.invalidate(locale)
+        self._changes_token = token
+
+    def list_catalogs(self, app: Flask) -> list[tuple[str, str]]:
+        """Returns a list of ``(locale, filename)`` tuples for all the
+        compiled catalogs (``.mo`` files) of this domain.
+        """
+        dirname = self.get_translations_path(app)
+        if not os.path.isdir(dirname):
+            return []
+        result: list[tuple[str, str]] = []
+        for folder in sorted(os.listdir(dirname)):
+            filename = os.path.join(dirname, folder, "LC_MESSAGES", self.domain + ".mo")
+            if os.path.isfile(filename):
+                result.append((folder, filename))
+        return result
+
+    def list_locales(self, app: Flask) -> list[str]:
+        """Returns the names of the locales this domain has a catalog for,
+        as reported by its backend.
+        """
+        return self.backend.list_locales(self.get_translations_path(app), self.domain)
+
     def get_translations(self):
         """Returns the correct gettext translations that should be used for
         this request.  This will never fail and return a dummy translation
         object if used outside of the request or if a translation cannot be
         found.
+
+        If the domain was registered with :meth:`Babel.register_domain`, the
+        merged lookup table of all registered domains is returned.
         """
         state = get_state(silent=True)
 
         if state is None:
+            from babel import support
+
             return support.NullTranslations()
 
         locale = get_locale()
+        if state.registry.entries:
+            translations = state.registry.get_translations(self, state.app, locale)
+            if translations is not None:
+                return translations
+        return self.get_translations_for(locale, state.app)
+
+    def get_translations_for(self, locale: Locale | str | None, app: Flask):
+        """Returns the cached translations for ``locale`` and loads them if
+        they are not cached yet.
+        """
+        if time.monotonic() >= self._next_poll:
+            self.poll_changes()
+
         cache = self.get_translations_cache()
 
         translations = cache.get(str(locale))
         if translations is None:
-            dirname = self.get_translations_path(state.app)
-            translations = support.Translations.load(
-                dirname, locale, domain=self.domain
-            )
-            self.cache[str(locale)] = translations
+            translations = cache[str(locale)] = self._load_translations_for(locale, app)
+        elif metrics.hook is not None:
+            metrics.hook.increment("cache_hits", cache="catalog")
 
         return translations
 
+    @timed("catalog")
+    def _load_translations_for(self, locale: Locale | str | None, app: Flask):
+        dirname = self.get_translations_path(app)
+        start = time.perf_counter()
+        translations = self.load_translations(dirname, locale)
+        install_plural_rule(translations)
+        if metrics.hook is not None:
+            labels = {"domain": self.domain, "locale": str(locale)}
+            metrics.hook.increment("cache_misses", cache="catalog")
+            metrics.hook.increment("catalog_loads", **labels)
+            metrics.hook.observe(
+                "catalog_load_seconds", time.perf_counter() - start, **labels
+            )
+        return translations
+
+    @timed("gettext")
     def gettext(self, string: str, **variables: Any):
         """Translates a string with the current locale and passes in the
         given keyword arguments as mapping to a string formatting string.
@@ -78,11 +274,32 @@ class Domain(object):
             gettext(u'Hello World!')
             gettext(u'Hello %(name)s!', name='World')
         """
-        t = self.get_translations()
-        if variables:
-            return t.ugettext(string) % variables
-        return t.ugettext(string)
+        return self._gettext(self.get_translations(), string, variables)
+
+    def _gettext(
+        self, t: "support.NullTranslations", string: str, variables: dict[str, Any]
+    ):
+        rv = t.ugettext(string)
+        if tracking.tracker is not None:
+            tracking.tracker.record(self.domain, None, string, rv is string)
+        if variables or self.icu:
+            return self._interpolate(rv, string, variables)
+        return rv
+
+    def _interpolate(
+        self,
+        msgstr: str,
+        msgid: str,
+        variables: dict[str, Any],
+        msgid_plural: str | None = None,
+    ) -> str:
+        if self.icu:
+            return interpolation.interpolate_icu(
+                msgstr, msgid, variables, get_locale(), msgid_plural
+            )
+        return interpolation.interpolate(msgstr, msgid, variables, msgid_plural)
 
+    @timed("gettext")
     def ngettext(self, singular: str, plural: str, num: int, **variables: Any):
         """Translates a string with the current locale and passes in the
         given keyword arguments as mapping to a string formatting string.
@@ -95,10 +312,25 @@ class Domain(object):
 
             ngettext(u'%(num)d Apple', u'%(num)d Apples', num=len(apples))
         """
-        variables.setdefault("num", num)
         t = self.get_translations()
-        return t.ungettext(singular, plural, num) % variables
+        return self._ngettext(t, singular, plural, num, variables)
+
+    def _ngettext(
+        self,
+        t: "support.NullTranslations",
+        singular: str,
+        plural: str,
+        num: int,
+        variables: dict[str, Any],
+    ):
+        variables.setdefault("num", num)
+        rv = t.ungettext(singular, plural, num)
+        if tracking.tracker is not None:
+            missed = rv is singular or rv is plural
+            tracking.tracker.record(self.domain, None, singular, missed, plural)
+        return self._interpolate(rv, singular, variables, plural)
 
+    @timed("gettext")
     def pgettext(self, context: str, string: str, **variables: Any):
         """Like :func:`gettext` but with a context.
 
@@ -114,11 +346,23 @@ class Domain(object):
 
         .. versionadded:: 0.7
         """
-        t = self.get_translations()
-        if variables:
-            return t.upgettext(context, string) % variables
-        return t.upgettext(context, string)
-
+        return self._pgettext(self.get_translations(), context, string, variables)
+
+    def _pgettext(
+        self,
+        t: "support.NullTranslations",
+        context: str,
+        string: str,
+        variables: dict[str, Any],
+    ):
+        rv = t.upgettext(context, string)
+        if tracking.tracker is not None:
+            tracking.tracker.record(self.domain, context, string, rv is string)
+        if variables or self.icu:
+            return self._interpolate(rv, string, variables)
+        return rv
+
+    @timed("gettext")
     def npgettext(
         self, context: str, singular: str, plural: str, num: int, **variables: Any
     ):
@@ -126,9 +370,24 @@ class Domain(object):
 
         .. versionadded:: 0.7
         """
-        variables.setdefault("num", num)
         t = self.get_translations()
-        return t.unpgettext(context, singular, plural, num) % variables
+        return self._npgettext(t, context, singular, plural, num, variables)
+
+    def _npgettext(
+        self,
+        t: "support.NullTranslations",
+        context: str,
+        singular: str,
+        plural: str,
+        num: int,
+        variables: dict[str, Any],
+    ):
+        variables.setdefault("num", num)
+        rv = t.unpgettext(context, singular, plural, num)
+        if tracking.tracker is not None:
+            missed = rv is singular or rv is plural
+            tracking.tracker.record(self.domain, context, singular, missed, plural)
+        return self._interpolate(rv, singular, variables, plural)
 
     def lazy_gettext(self, string: str, **variables: Any):
         """Like :func:`gettext` but the string returned is lazy which means
@@ -196,9 +455,6 @@ def gettext(*args: Any, **kwargs: Any) -> str:
 _ = gettext  # noqa
 
 
-x: str = _("TEST")
-
-
 def ngettext(*args: Any, **kwargs: Any):
     return get_domain().ngettext(*args, **kwargs)
 
@@ -221,3 +477,55 @@ def lazy_ngettext(*args: Any, **kwargs: Any) -> str:
 
 def lazy_pgettext(*args: Any, **kwargs: Any) -> str:
     return LazyString(pgettext, *args, **kwargs)  # pyright: ignore
+
+
+#: the lazy functions :func:`resolve_lazy_strings` resolves itself, mapped
+#: to the method that translates with a given translations object
+_lazy_methods: dict[t.Callable[..., Any], str] = {
+    Domain.gettext: "_gettext",
+    Domain.ngettext: "_ngettext",
+    Domain.pgettext: "_pgettext",
+    Domain.npgettext: "_npgettext",
+}
+_lazy_shortcuts: dict[t.Callable[..., Any], str] = {
+    gettext: "_gettext",
+    ngettext: "_ngettext",
+    pgettext: "_pgettext",
+    npgettext: "_npgettext",
+}
+
+
+@timed("gettext")
+def resolve_lazy_strings(strings: Iterable[LazyString]) -> list[str]:
+    """Translates many lazy strings at once, e.g. all the labels of a JSON
+    response.  The translations of each domain are only looked up once
+    and all strings of the domain are translated with them.  Lazy strings
+    of other functions are converted with :func:`str`.
+    """
+    bound: dict[int, "support.NullTranslations"] = {}
+    default: Domain | None = None
+    rv: list[str] = []
+    for string in strings:
+        func = string._func
+        name = _lazy_shortcuts.get(func)
+        if name is not None:
+            if default is None:
+                default = get_domain()
+            owner = default
+        else:
+            name = _lazy_methods.get(getattr(func, "__func__", None))  # pyright: ignore
+            owner = getattr(func, "__self__", None)
+        if name is None or not isinstance(owner, Domain):
+            rv.append(str(string))
+            continue
+
+        translations = bound.get(id(owner))
+        if translations is None:
+            translations = bound[id(owner)] = owner.get_translations()
+        try:
+            method = getattr(owner, name)
+            rv.append(method(translations, *string._args, dict(string._kwargs)))
+        except TypeError:
+            # e.g. the message was passed as keyword argument
+            rv.append(str(string))
+    return rv
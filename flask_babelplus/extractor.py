@@ -0,0 +1,467 @@
+# -*- coding: utf-8 -*-
+"""
+flask_babelplus.extractor
+~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Extracts the messages of an application into one ``.pot`` file per
+domain, used by ``flask babel extract``::
+
+    $ flask babel extract --jobs 8
+
+The sources of a domain are the files below the parent of its
+translations directory.  If a mapping file is given (or a ``babel.cfg``
+exists in that directory) its patterns select the files and their
+extraction methods like ``pybabel extract -F``.  Otherwise the Python
+files and the templates in the template folders of the application and
+its blueprints are extracted.  Templates are parsed with the extensions
+and syntax of the Jinja environment of the application.  Files that
+belong to a domain with a deeper directory are left to that domain.
+
+The messages of every file are cached by the hash of its content in
+:data:`CACHE_NAME` in the translations directory, so only changed files
+are parsed, in a process pool.  The templates are written sorted by file
+and line and only if their messages changed.
+
+:copyright: (c) 2013 by Armin Ronacher, Daniel Neuhäuser and contributors.
+:license: BSD, see LICENSE for more details.
+"""
+
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import tokenize
+import typing as t
+from collections.abc import Iterable, Mapping
+from concurrent.futures import ProcessPoolExecutor
+
+from flask import Flask
+from jinja2 import TemplateError
+
+from .utils import get_state
+
+#: the name of the file the extracted messages are cached in
+CACHE_NAME = ".babel-extract.json"
+
+CACHE_VERSION = 2
+
+#: the name of the mapping file that is used if no other is given
+MAPPING_NAME = "babel.cfg"
+
+#: the keywords of :data:`babel.messages.extract.DEFAULT_KEYWORDS` and the
+#: lazy functions of Flask-BabelPlus
+KEYWORDS: dict[str, t.Any] = {
+    "_": None,
+    "gettext": None,
+    "ngettext": (1, 2),
+    "ugettext": None,
+    "ungettext": (1, 2),
+    "dgettext": (2,),
+    "dngettext": (2, 3),
+    "N_": None,
+    "pgettext": ((1, "c"), 2),
+    "npgettext": ((1, "c"), 2, 3),
+    "lazy_gettext": None,
+    "lazy_ngettext": (1, 2),
+    "lazy_pgettext": ((1, "c"), 2),
+}
+
+#: the file extensions of the templates that are extracted
+TEMPLATE_EXTENSIONS = (".html", ".htm", ".txt", ".xml", ".j2", ".jinja", ".jinja2")
+
+_JINJA_METHOD = "jinja2.ext:babel_extract"
+
+#: the methods that get the options of the Jinja environment
+_JINJA_METHODS = frozenset(("jinja2", _JINJA_METHOD))
+
+#: the errors a file can fail to parse with, other errors are raised
+_EXTRACT_ERRORS = (
+    OSError,
+    SyntaxError,
+    ValueError,
+    LookupError,
+    ImportError,
+    tokenize.TokenError,
+    TemplateError,
+)
+
+#: ``(lineno, message, comments, context)``, plural messages are lists
+_Message = tuple[int, t.Any, list[str], str | None]
+
+
+class ExtractJob(t.NamedTuple):
+    #: the path relative to the source directory of the domain
+    name: str
+    path: str
+    #: the extraction method, e.g. ``"python"`` or ``"jinja2"``
+    method: str
+    #: the options of the extraction method
+    options: Mapping[str, str]
+
+
+class ExtractResult(t.NamedTuple):
+    #: the domain the template is named after
+    domain: str
+    #: the path of the ``.pot`` file
+    pot: str
+    #: ``"extracted"``, ``"unchanged"`` or ``"failed"`` (the template is
+    #: not written if a file failed to parse)
+    status: str
+    #: the number of extracted message occurrences
+    messages: int
+    #: the number of parsed files (the others came from the cache)
+    parsed: int
+    #: ``(file, error)`` of the files that failed to parse
+    errors: list[tuple[str, str]]
+
+
+def jinja_options(app: Flask) -> dict[str, str]:
+    """Returns the options of the Jinja extraction method that match the
+    Jinja environment of ``app``.
+    """
+    env = app.jinja_env
+    options = {
+        "extensions": ",".join(sorted(env.extensions)),
+        "block_start_string": env.block_start_string,
+        "block_end_string": env.block_end_string,
+        "variable_start_string": env.variable_start_string,
+        "variable_end_string": env.variable_end_string,
+        "comment_start_string": env.comment_start_string,
+        "comment_end_string": env.comment_end_string,
+        "line_statement_prefix": env.line_statement_prefix or "",
+        "line_comment_prefix": env.line_comment_prefix or "",
+        "trim_blocks": str(env.trim_blocks),
+        "lstrip_blocks": str(env.lstrip_blocks),
+        "keep_trailing_newline": str(env.keep_trailing_newline),
+        "trimmed": str(bool(env.policies.get("ext.i18n.trimmed"))),
+        "newstyle_gettext": str(bool(getattr(env, "newstyle_gettext", False))),
+        # report syntax errors instead of skipping the template
+        "silent": "false",
+    }
+    return options
+
+
+def _template_folders(app: Flask) -> list[str]:
+    folders: list[str] = []
+    for scaffold in [app, *app.iter_blueprints()]:
+        loader = scaffold.jinja_loader
+        for path in getattr(loader, "searchpath", ()):
+            path = os.path.realpath(path)
+            if os.path.isdir(path) and path not in folders:
+                folders.append(path)
+    return folders
+
+
+def _read_mapping(
+    filename: str,
+) -> tuple[list[tuple[str, str]], dict[str, dict[str, str]]]:
+    from babel.messages.frontend import parse_mapping_cfg
+
+    with open(filename) as fp:
+        return parse_mapping_cfg(fp, filename)
+
+
+def find_sources(
+    app: Flask,
+    domains: Iterable[str] | None = None,
+    mapping_file: str | None = None,
+) -> dict[tuple[str, str], list[ExtractJob]]:
+    """Returns the files to extract per ``(translations directory,
+    domain)`` of the domains of ``app`` (or only of the domains named in
+    ``domains``).
+
+    :param mapping_file: The mapping file with the patterns of the files
+                         and their extraction methods.  Defaults to the
+                         ``babel.cfg`` in the source directory of each
+                         domain if there is one.
+    """
+    from babel.messages.extract import pathmatch
+
+    wanted = None if domains is None else set(domains)
+    targets: list[tuple[str, str, str]] = []
+    for domain in get_state(app).domains():
+        dirname = os.path.realpath(domain.get_translations_path(app))
+        target = (os.path.dirname(dirname), dirname, domain.domain)
+        if target not in targets:
+            targets.append(target)
+    roots = {root for root, _, _ in targets}
+    template_folders = _template_folders(app)
+    options = jinja_options(app)
+    mapping = None if mapping_file is None else _read_mapping(mapping_file)
+
+    def owner(path: str) -> str | None:
+        # the deepest source directory that contains path
+        best = None
+        for root in roots:
+            if (path == root or path.startswith(root + os.sep)) and (
+                best is None or len(root) > len(best)
+            ):
+                best = root
+        return best
+
+    def default_method(path: str, filename: str) -> str | None:
+        in_templates = any(
+            path.startswith(folder + os.sep) for folder in template_folders
+        )
+        if in_templates and filename.endswith(TEMPLATE_EXTENSIONS):
+            return _JINJA_METHOD
+        if filename.endswith(".py") and not in_templates:
+            return "python"
+        return None
+
+    sources: dict[tuple[str, str], list[ExtractJob]] = {}
+    for root, dirname, domain_name in targets:
+        if wanted is not None and domain_name not in wanted:
+            continue
+        root_mapping = mapping
+        if root_mapping is None and os.path.isfile(os.path.join(root, MAPPING_NAME)):
+            root_mapping = _read_mapping(os.path.join(root, MAPPING_NAME))
+
+        jobs = sources[(dirname, domain_name)] = []
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames[:] = sorted(
+                name
+                for name in dirnames
+                if not name.startswith(".") and name != "__pycache__"
+            )
+            for filename in sorted(filenames):
+                path = os.path.join(dirpath, filename)
+                if owner(path) != root:
+                    continue
+                relpath = os.path.relpath(path, root).replace(os.sep, "/")
+                method_options: dict[str, str] = {}
+                if root_mapping is None:
+                    method = default_method(path, filename)
+                else:
+                    # the first pattern that matches wins, like in pybabel
+                    method_map, options_map = root_mapping
+                    method = None
+                    for pattern, pattern_method in method_map:
+                        if pathmatch(pattern, relpath):
+                            method = pattern_method
+                            method_options = options_map.get(pattern, {})
+                            break
+                if method is None or method == "ignore":
+                    continue
+                if method in _JINJA_METHODS:
+                    method_options = {**options, **method_options}
+                jobs.append(ExtractJob(relpath, path, method, method_options))
+    return sources
+
+
+def _cache_key(data: bytes, job: ExtractJob, settings: str) -> str:
+    h = hashlib.sha256(data)
+    for value in (job.method, json.dumps(job.options, sort_keys=True), settings):
+        h.update(b"\x00" + value.encode())
+    return h.hexdigest()
+
+
+def extract_file(
+    path: str,
+    method: str,
+    keywords: Mapping[str, t.Any],
+    comment_tags: Iterable[str],
+    options: Mapping[str, str],
+) -> list[_Message]:
+    """Returns the messages of the file ``path``.  Runs in the worker
+    processes.
+    """
+    from babel.messages.extract import extract
+
+    with open(path, "rb") as fp:
+        return [
+            (
+                lineno,
+                list(message) if isinstance(message, tuple) else message,
+                comments,
+                context,
+            )
+            for lineno, message, comments, context in extract(
+                method,
+                fp,
+                keywords,
+                tuple(comment_tags),
+                options,
+                strip_comment_tags=True,
+            )
+        ]
+
+
+def _extract_job(
+    args: tuple[str, str, Mapping[str, t.Any], tuple[str, ...], Mapping[str, str]],
+) -> tuple[list[_Message] | None, str | None]:
+    try:
+        return extract_file(*args), None
+    except _EXTRACT_ERRORS as e:
+        return None, "%s: %s" % (type(e).__name__, e)
+
+
+def _load_cache(filename: str) -> dict[str, dict[str, list[_Message]]]:
+    # the cached messages per domain
+    try:
+        with open(filename, "rb") as fp:
+            cache = json.load(fp)
+    except (OSError, ValueError):
+        return {}
+    if cache.get("version") != CACHE_VERSION:
+        return {}
+    return cache["domains"]
+
+
+def _write_atomic(filename: str, data: bytes):
+    tmp = "%s.%d.tmp" % (filename, os.getpid())
+    with open(tmp, "wb") as fp:
+        fp.write(data)
+    os.replace(tmp, filename)
+
+
+def _render_pot(
+    app: Flask,
+    domain: str,
+    extracted: list[tuple[ExtractJob, list[_Message]]],
+    creation_date: t.Any = None,
+) -> bytes:
+    from babel.messages.catalog import Catalog
+    from babel.messages.pofile import write_po
+
+    catalog = Catalog(domain=domain, project=app.name, creation_date=creation_date)
+    for job, messages in extracted:
+        for lineno, message, comments, context in messages:
+            catalog.add(
+                tuple(message) if isinstance(message, list) else message,
+                None,
+                [(job.name, lineno)],
+                auto_comments=comments,
+                context=context,
+            )
+    buf = io.BytesIO()
+    write_po(buf, catalog, width=76)
+    return buf.getvalue()
+
+
+def extract_messages(
+    app: Flask,
+    domains: Iterable[str] | None = None,
+    jobs: int | None = None,
+    keywords: Mapping[str, t.Any] | None = None,
+    comment_tags: Iterable[str] = ("NOTE:",),
+    use_cache: bool = True,
+    mapping_file: str | None = None,
+) -> list[ExtractResult]:
+    """Extracts the messages of the domains of ``app`` into
+    ``<translations directory>/<domain>.pot`` and returns the results.
+
+    :param domains: Only extract the domains with these names.
+    :param jobs: The number of worker processes.  Defaults to the number
+                 of CPUs, ``1`` extracts in this process.
+    :param keywords: The gettext functions to look for.  Defaults to
+                     :data:`KEYWORDS`.
+    :param comment_tags: The comments that are extracted as comments for
+                         the translators if they start with one of these
+                         tags.
+    :param use_cache: Use (and update) the cached messages of unchanged
+                      files.
+    :param mapping_file: The mapping file, see :func:`find_sources`.
+    """
+    from babel.messages.pofile import read_po
+
+    keywords = dict(KEYWORDS if keywords is None else keywords)
+    comment_tags = tuple(comment_tags)
+    settings = json.dumps([keywords, comment_tags], sort_keys=True)
+    sources = find_sources(app, domains, mapping_file)
+
+    caches: dict[str, dict[str, dict[str, list[_Message]]]] = {}
+    keys: dict[tuple[str, str], list[str]] = {}
+    # the messages of all domains by cache key, so a file that is a source
+    # of several domains is only parsed once
+    known: dict[str, list[_Message]] = {}
+    pending: dict[str, ExtractJob] = {}
+    for (dirname, domain), files in sources.items():
+        if dirname not in caches:
+            cache_file = os.path.join(dirname, CACHE_NAME)
+            caches[dirname] = _load_cache(cache_file) if use_cache else {}
+            for cached in caches[dirname].values():
+                known.update(cached)
+        keys[(dirname, domain)] = []
+        for job in files:
+            with open(job.path, "rb") as fp:
+                key = _cache_key(fp.read(), job, settings)
+            keys[(dirname, domain)].append(key)
+            if key not in known:
+                pending.setdefault(key, job)
+
+    work = [
+        (job.path, job.method, keywords, comment_tags, job.options)
+        for job in pending.values()
+    ]
+    workers = min(jobs or os.cpu_count() or 1, len(work))
+    if workers > 1:
+        # spawn, as the application may have started threads
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(workers, mp_context=context) as executor:
+            outcomes = list(executor.map(_extract_job, work))
+    else:
+        outcomes = [_extract_job(args) for args in work]
+
+    failures: dict[str, str] = {}
+    for key, (messages, error) in zip(pending, outcomes, strict=True):
+        if messages is None:
+            failures[key] = error or ""
+        else:
+            known[key] = messages
+
+    results: list[ExtractResult] = []
+    for (dirname, domain), files in sources.items():
+        domain_keys = keys[(dirname, domain)]
+        errors = [
+            (job.name, failures[key])
+            for job, key in zip(files, domain_keys, strict=True)
+            if key in failures
+        ]
+        extracted = [
+            (job, known[key])
+            for job, key in zip(files, domain_keys, strict=True)
+            if key in known
+        ]
+        if use_cache:
+            cache_file = os.path.join(dirname, CACHE_NAME)
+            # another domain in the directory may have written it since
+            cached = _load_cache(cache_file)
+            cached[domain] = {key: known[key] for key in domain_keys if key in known}
+            data = json.dumps({"version": CACHE_VERSION, "domains": cached})
+            _write_atomic(cache_file, data.encode("utf-8"))
+
+        pot = os.path.join(dirname, domain + ".pot")
+        if errors:
+            # a template without the messages of the broken files would
+            # drop their translations on the next update
+            status = "failed"
+        else:
+            old = None
+            creation_date = None
+            if os.path.isfile(pot):
+                with open(pot, "rb") as fp:
+                    old = fp.read()
+                creation_date = read_po(io.BytesIO(old)).creation_date
+            # an unchanged template keeps its creation date
+            content = _render_pot(app, domain, extracted, creation_date)
+            if content == old:
+                status = "unchanged"
+            else:
+                status = "extracted"
+                if old is not None:
+                    content = _render_pot(app, domain, extracted)
+                _write_atomic(pot, content)
+
+        results.append(
+            ExtractResult(
+                domain,
+                pot,
+                status,
+                sum(len(messages) for _, messages in extracted),
+                sum(key in pending for key in set(domain_keys)),
+                errors,
+            )
+        )
+    return results
@@ -0,0 +1,396 @@
+# -*- coding: utf-8 -*-
+"""
+flask_babelplus.interpolation
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Compiles translated messages into interpolation templates.  A message
+with ``%(name)s`` placeholders is parsed once and turned into a function
+that builds the string like an f-string, and messages in ICU
+MessageFormat (with ``select`` and ``plural``) are turned into a tree of
+functions, so placeholders are never parsed per call.
+
+:copyright: (c) 2013 by Armin Ronacher, Daniel Neuhäuser and contributors.
+:license: BSD, see LICENSE for more details.
+"""
+
+import ast
+import re
+import typing as t
+import warnings
+
+from babel import Locale
+
+from .cache import LRUCache
+
+Template = t.Callable[[t.Mapping[str, t.Any]], str]
+
+#: the maximum number of cached templates of each kind.  Once the cache is
+#: full, a ``%`` message is only compiled when it is seen a second time,
+#: until then it is interpolated with ``%``
+MAX_TEMPLATES = 16384
+
+_missing = object()
+#: cached for translations that use placeholders the msgid does not have
+_invalid = object()
+
+#: ``(msgstr, msgid)`` -> template, ``None`` or ``_invalid``
+_templates: LRUCache[tuple[str, str], t.Any] = LRUCache(
+    MAX_TEMPLATES, name="interpolation"
+)
+#: the messages that missed the full template cache once
+_candidates: LRUCache[tuple[str, str], bool] = LRUCache(MAX_TEMPLATES)
+#: ``(msgstr, msgid, locale)`` -> template or ``_invalid``
+_icu_templates: LRUCache[tuple[str, str, str], t.Any] = LRUCache(
+    MAX_TEMPLATES, name="icu_interpolation"
+)
+
+_placeholder_re = re.compile(
+    r"%(?:\((?P<name>[^)]*)\))?"
+    r"(?P<spec>[#0\- +]*(?:\*|\d+)?(?:\.(?:\*|\d+))?[hlL]?[diouxXeEfFgGcrsa%])"
+)
+
+
+class InvalidTranslationWarning(RuntimeWarning):
+    """Issued when a translation uses placeholders that its msgid does
+    not have.  The msgid is used instead of the translation.
+    """
+
+
+def percent_placeholders(string: str) -> frozenset[str] | None:
+    """Returns the names of the ``%(name)s`` placeholders of ``string`` or
+    ``None`` if it has positional placeholders or a ``%`` that is not part
+    of a placeholder.
+    """
+    names: set[str] = set()
+    pos = 0
+    for match in _placeholder_re.finditer(string):
+        if "%" in string[pos : match.start()]:
+            return None
+        pos = match.end()
+        if match.group("name") is not None:
+            names.add(match.group("name"))
+        elif match.group("spec") != "%" or "*" in match.group("spec"):
+            return None
+    if "%" in string[pos:]:
+        return None
+    return frozenset(names)
+
+
+def compile_percent(string: str) -> Template | None:
+    """Compiles a message with ``%(name)s`` placeholders into a function
+    that takes the mapping of variables and returns the same string as
+    ``string % variables``.  Returns ``None`` if the message has
+    positional placeholders.
+    """
+    if percent_placeholders(string) is None:
+        return None
+
+    values: list[ast.expr] = []
+    pos = 0
+    for match in _placeholder_re.finditer(string):
+        literal = string[pos : match.start()]
+        pos = match.end()
+        name, spec = match.group("name"), match.group("spec")
+        if name is None:
+            # %%
+            literal += "%"
+        if literal:
+            values.append(ast.Constant(literal))
+        if name is None:
+            continue
+
+        value = ast.Subscript(ast.Name("v", ast.Load()), ast.Constant(name), ast.Load())
+        if spec in ("s", "r", "a"):
+            values.append(ast.FormattedValue(value, ord(spec), None))
+        else:
+            # keep the semantics of e.g. %d or %.2f
+            spec_format = ast.BinOp(
+                ast.Constant("%" + spec), ast.Mod(), ast.Tuple([value], ast.Load())
+            )
+            values.append(ast.FormattedValue(spec_format, -1, None))
+    if string[pos:]:
+        values.append(ast.Constant(string[pos:]))
+
+    # adjacent literals are merged by the compiler
+    arguments = ast.arguments(
+        posonlyargs=[],
+        args=[ast.arg("v")],
+        kwonlyargs=[],
+        kw_defaults=[],
+        defaults=[],
+    )
+    tree = ast.Expression(ast.Lambda(arguments, ast.JoinedStr(values)))
+    code = compile(ast.fix_missing_locations(tree), "<message>", "eval")
+    return eval(code, {"__builtins__": {}})
+
+
+def _warn_invalid(msgstr: str, msgid: str):
+    warnings.warn(
+        "the translation %r of %r uses unknown placeholders" % (msgstr, msgid),
+        InvalidTranslationWarning,
+        stacklevel=4,
+    )
+
+
+def interpolate(
+    msgstr: str,
+    msgid: str,
+    variables: t.Mapping[str, t.Any],
+    msgid_plural: str | None = None,
+) -> str:
+    """Returns ``msgstr % variables`` using the cached template of
+    ``msgstr``.  If the translation uses placeholders that are not part of
+    ``msgid`` (or ``msgid_plural``), the msgid is interpolated instead.
+    """
+    key = (msgstr, msgid)
+    template = _templates.get(key, _missing)
+    if template is _missing:
+        if len(_templates) >= _templates.maxsize and key not in _candidates:
+            # compiling costs far more than one %, so rarely used messages
+            # do not evict the templates of the hot ones
+            _candidates[key] = True
+            try:
+                return msgstr % variables
+            except KeyError:
+                # validate the translation below
+                pass
+        template = compile_percent(msgstr)
+        if template is not None and msgstr is not msgid and msgstr is not msgid_plural:
+            names = percent_placeholders(msgstr)
+            allowed = percent_placeholders(msgid) or frozenset()
+            if msgid_plural is not None:
+                allowed |= percent_placeholders(msgid_plural) or frozenset()
+                allowed |= {"num"}
+            if names is not None and not names <= allowed:
+                _warn_invalid(msgstr, msgid)
+                template = _invalid
+        _templates[key] = template
+
+    if template is None:
+        return msgstr % variables
+    if template is _invalid:
+        if msgid_plural is not None and variables.get("num") != 1:
+            return msgid_plural % variables
+        return msgid % variables
+    return template(variables)
+
+
+# ICU MessageFormat
+
+
+class _ICUParser(object):
+    def __init__(self, string: str, locale: Locale | None):
+        self.string = string
+        self.pos = 0
+        self.locale = locale
+        self.names: set[str] = set()
+
+    def error(self, message: str) -> ValueError:
+        return ValueError("%s at %d in %r" % (message, self.pos, self.string))
+
+    def parse_message(self, in_plural: str | None = None) -> list[t.Any]:
+        """Returns a list of strings and functions."""
+        parts: list[t.Any] = []
+        text: list[str] = []
+        string = self.string
+        while self.pos < len(string):
+            char = string[self.pos]
+            if char == "'":
+                self.pos += self.parse_quote(text)
+            elif char == "{":
+                if text:
+                    parts.append("".join(text))
+                    text = []
+                parts.append(self.parse_argument())
+            elif char == "}":
+                break
+            elif char == "#" and in_plural is not None:
+                if text:
+                    parts.append("".join(text))
+                    text = []
+                parts.append(self.number_formatter(in_plural))
+                self.pos += 1
+            else:
+                text.append(char)
+                self.pos += 1
+        if text:
+            parts.append("".join(text))
+        return parts
+
+    def parse_quote(self, text: list[str]) -> int:
+        string = self.string
+        if string.startswith("''", self.pos):
+            text.append("'")
+            return 2
+        if self.pos + 1 < len(string) and string[self.pos + 1] in "{}#|":
+            end = string.find("'", self.pos + 1)
+            if end == -1:
+                end = len(string)
+            text.append(string[self.pos + 1 : end])
+            return end + 1 - self.pos
+        text.append("'")
+        return 1
+
+    def read_until(self, chars: str) -> str:
+        start = self.pos
+        while self.pos < len(self.string) and self.string[self.pos] not in chars:
+            self.pos += 1
+        if self.pos >= len(self.string):
+            raise self.error("unterminated argument")
+        return self.string[start : self.pos].strip()
+
+    def expect(self, char: str):
+        if self.pos >= len(self.string) or self.string[self.pos] != char:
+            raise self.error("expected %r" % char)
+        self.pos += 1
+
+    def parse_argument(self) -> t.Callable[[t.Mapping[str, t.Any]], str]:
+        self.expect("{")
+        name = self.read_until(",}")
+        if not name:
+            raise self.error("empty argument name")
+        self.names.add(name)
+        if self.string[self.pos] == "}":
+            self.pos += 1
+            return lambda v: str(v[name])
+
+        self.pos += 1
+        kind = self.read_until(",}")
+        if kind == "number":
+            if self.string[self.pos] == ",":
+                raise self.error("number styles are not supported")
+            self.pos += 1
+            return self.number_formatter(name)
+        if kind not in ("select", "plural", "selectordinal"):
+            raise self.error("unsupported argument type %r" % kind)
+        self.expect(",")
+
+        offset = 0
+        cases: dict[str, t.Any] = {}
+        while True:
+            while self.pos < len(self.string) and self.string[self.pos].isspace():
+                self.pos += 1
+            if self.pos >= len(self.string):
+                raise self.error("unterminated %s" % kind)
+            if self.string[self.pos] == "}":
+                self.pos += 1
+                break
+            selector = self.read_until("{")
+            if selector.startswith("offset:") and kind != "select":
+                offset_value, _, selector = selector[7:].strip().partition(" ")
+                offset = int(offset_value)
+                selector = selector.strip()
+            self.expect("{")
+            in_plural = name if kind != "select" else None
+            cases[selector] = _join(self.parse_message(in_plural))
+            self.expect("}")
+        if "other" not in cases:
+            raise self.error("%s without other case" % kind)
+
+        if kind == "select":
+            other = cases["other"]
+            return lambda v: cases.get(str(v[name]), other)(v)
+        return self.plural_selector(name, kind, cases, offset)
+
+    def plural_selector(
+        self, name: str, kind: str, cases: dict[str, t.Any], offset: int
+    ) -> t.Callable[[t.Mapping[str, t.Any]], str]:
+        exact = {
+            float(selector[1:]): case
+            for selector, case in cases.items()
+            if selector.startswith("=")
+        }
+        other = cases["other"]
+        locale = self.locale or Locale("en")
+        rule = locale.ordinal_form if kind == "selectordinal" else locale.plural_form
+
+        def select(v: t.Mapping[str, t.Any]) -> str:
+            number = v[name]
+            case = exact.get(number)
+            if case is None:
+                case = cases.get(rule(abs(number - offset)), other)
+            if offset:
+                v = {**v, name: number - offset}
+            return case(v)
+
+        return select
+
+    def number_formatter(self, name: str) -> t.Callable[[t.Mapping[str, t.Any]], str]:
+        from babel import numbers
+
+        locale = self.locale or Locale("en")
+        return lambda v: numbers.format_decimal(v[name], locale=locale)
+
+
+def _join(parts: list[t.Any]) -> t.Callable[[t.Mapping[str, t.Any]], str]:
+    if not parts:
+        return lambda v: ""
+    if len(parts) == 1:
+        part = parts[0]
+        if isinstance(part, str):
+            return lambda v: part
+        return part
+    funcs = [(lambda v, s=part: s) if isinstance(part, str) else part for part in parts]
+    return lambda v: "".join([func(v) for func in funcs])
+
+
+def compile_icu(string: str, locale: Locale | None = None) -> Template:
+    """Compiles a message in ICU MessageFormat into a function that takes
+    the mapping of variables and returns the formatted string.  Simple
+    arguments (``{name}``), numbers (``{num, number}``), ``select``,
+    ``plural`` and ``selectordinal`` (with ``=N`` cases, ``offset:`` and
+    ``#``) are supported.  Raises a :exc:`ValueError` for invalid
+    messages.
+    """
+    return _compile_icu(string, locale)[0]
+
+
+def icu_placeholders(string: str) -> frozenset[str]:
+    """Returns the names of the arguments of an ICU message."""
+    return _compile_icu(string, None)[1]
+
+
+def _compile_icu(string: str, locale: Locale | None) -> tuple[Template, frozenset[str]]:
+    parser = _ICUParser(string, locale)
+    parts = parser.parse_message()
+    if parser.pos < len(string):
+        raise parser.error("unexpected '}'")
+    return _join(parts), frozenset(parser.names)
+
+
+def interpolate_icu(
+    msgstr: str,
+    msgid: str,
+    variables: t.Mapping[str, t.Any],
+    locale: Locale | None,
+    msgid_plural: str | None = None,
+) -> str:
+    """Formats ``msgstr`` in ICU MessageFormat with ``variables`` using
+    its cached template.  If the translation is invalid or uses arguments
+    that are not part of ``msgid`` (or ``msgid_plural``), the msgid is
+    formatted instead.
+    """
+    key = (msgstr, msgid, str(locale))
+    template = _icu_templates.get(key, _missing)
+    if template is _missing:
+        try:
+            template, names = _compile_icu(msgstr, locale)
+            if msgstr is not msgid and msgstr is not msgid_plural:
+                allowed = icu_placeholders(msgid)
+                if msgid_plural is not None:
+                    allowed |= icu_placeholders(msgid_plural) | {"num"}
+                if not names <= allowed:
+                    _warn_invalid(msgstr, msgid)
+                    template = _invalid
+        except ValueError:
+            if msgstr is msgid or msgstr is msgid_plural:
+                raise
+            _warn_invalid(msgstr, msgid)
+            template = _invalid
+        _icu_templates[key] = template
+
+    if template is _invalid:
+        if msgid_plural is not None and variables.get("num") != 1:
+            msgid = msgid_plural
+        return interpolate_icu(msgid, msgid, variables, locale)
+    return template(variables)
@@ -0,0 +1,255 @@
+# -*- coding: utf-8 -*-
+"""
+flask_babelplus.jsoncatalog
+~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Serves the catalogs as compact JSON for translating in the browser::
+
+    catalogs = JSONCatalog(bundles={'checkout': ['Pay now', 'Total']})
+    app.register_blueprint(catalogs.blueprint, url_prefix='/i18n')
+
+``/i18n/de.json`` returns the whole German catalog and
+``/i18n/de/checkout.json`` only the messages of the ``checkout`` bundle.
+The responses are serialized and compressed once per catalog and carry a
+strong ETag derived from their content.
+
+:copyright: (c) 2013 by Armin Ronacher, Daniel Neuhäuser and contributors.
+:license: BSD, see LICENSE for more details.
+"""
+
+import gzip
+import hashlib
+import json
+import typing as t
+from collections.abc import Iterable, Mapping
+
+from babel import Locale, UnknownLocaleError
+from flask import Blueprint, Response, abort, current_app, request
+
+from .cache import LRUCache
+from .signals import catalog_invalidated
+from .utils import get_state
+
+if t.TYPE_CHECKING:
+    from babel import support
+
+    from .domain import Domain
+
+#: ``(msgctxt, msgid)``, a bare msgid has no context
+_Message = tuple[str | None, str]
+
+_DEFAULT_PLURAL_FORMS = "nplurals=2; plural=(n != 1);"
+
+
+class CatalogPayload(t.NamedTuple):
+    #: the strong ETag of the uncompressed JSON
+    etag: str
+    #: the JSON and its compressed variants keyed by content encoding,
+    #: ``""`` is the uncompressed JSON
+    encodings: dict[str, bytes]
+
+
+def _split_key(key: t.Any) -> _Message:
+    if isinstance(key, tuple):
+        key = key[0]
+    context, _, msgid = key.rpartition("\x04")
+    return (context or None, msgid)
+
+
+def catalog_to_json(
+    translations: "support.NullTranslations",
+    locale: str,
+    messages: Iterable[_Message] | None = None,
+) -> bytes:
+    """Serializes the catalog of ``translations`` as compact JSON::
+
+        {"locale": "de", "nplurals": 2, "plural": "(n != 1)",
+         "messages": {"Yes": "Ja", "%(num)s Apple": ["%(num)s Apfel", ...],
+                      "button\\u0004Log in": "Anmelden"}}
+
+    Messages with a context are keyed by the context and the msgid joined
+    with ``"\\x04"`` like in the ``.mo`` files.
+
+    :param translations: The translations.
+    :param locale: The locale of the translations.
+    :param messages: Only serialize these ``(msgctxt, msgid)`` tuples.
+    """
+    wanted = None if messages is None else set(messages)
+    result: dict[str, t.Any] = {}
+    for key, msgstr in translations._catalog.items():
+        if not key:
+            # the header
+            continue
+        if wanted is not None and _split_key(key) not in wanted:
+            continue
+        if isinstance(key, tuple):
+            forms = result.setdefault(key[0], [])
+            forms.extend([""] * (key[1] + 1 - len(forms)))
+            forms[key[1]] = msgstr
+        else:
+            result[key] = msgstr
+
+    plural_forms = translations._info.get("plural-forms", _DEFAULT_PLURAL_FORMS)
+    nplurals, plural = [part.strip() for part in plural_forms.split(";")[:2]]
+    data = {
+        "locale": locale,
+        "nplurals": int(nplurals.split("=", 1)[1]),
+        "plural": plural.split("=", 1)[1],
+        "messages": result,
+    }
+    return json.dumps(
+        data, ensure_ascii=False, separators=(",", ":"), sort_keys=True
+    ).encode("utf-8")
+
+
+def _compress(data: bytes) -> dict[str, bytes]:
+    # mtime=0 keeps the compressed bytes identical across processes
+    encodings = {"": data, "gzip": gzip.compress(data, 9, mtime=0)}
+    try:
+        import brotli  # pyright: ignore
+    except ImportError:
+        pass
+    else:
+        encodings["br"] = brotli.compress(data)
+    return encodings
+
+
+class JSONCatalog(object):
+    """A blueprint that serves the catalogs of a domain as JSON, see
+    :func:`catalog_to_json`.
+
+    :param domain: The domain.  Defaults to the default domain of the
+                   application.
+    :param bundles: A mapping of bundle names to the messages of the
+                    bundle, either msgids or ``(msgctxt, msgid)`` tuples.
+    :param name: The name of the blueprint.
+    :param max_age: The ``max-age`` of the responses in seconds.  By
+                    default clients revalidate every time.
+    :param maxsize: The maximum number of cached responses.
+    """
+
+    def __init__(
+        self,
+        domain: "Domain | None" = None,
+        bundles: Mapping[str, Iterable[str | _Message]] | None = None,
+        name: str = "babel_catalogs",
+        max_age: int = 0,
+        maxsize: int = 256,
+    ):
+        self.domain = domain
+        self.bundles: dict[str, frozenset[_Message]] = {}
+        self.max_age = max_age
+        self.payloads: LRUCache[
+            tuple[int, str, str | None],
+            tuple["support.NullTranslations", CatalogPayload],
+        ] = LRUCache(maxsize, name="json_catalog")
+        self.locales: dict[tuple[int, str], frozenset[str]] = {}
+        catalog_invalidated.connect(self._on_invalidated)
+        for bundle, messages in (bundles or {}).items():
+            self.add_bundle(bundle, messages)
+
+        self.blueprint = Blueprint(name, __name__)
+        self.blueprint.add_url_rule("/<locale>.json", "catalog", self.serve)
+        self.blueprint.add_url_rule("/<locale>/<bundle>.json", "bundle", self.serve)
+
+    def add_bundle(self, name: str, messages: Iterable[str | _Message]):
+        """Adds (or replaces) the bundle ``name``."""
+        self.bundles[name] = frozenset(
+            (None, message) if isinstance(message, str) else message
+            for message in messages
+        )
+        for key in self.payloads.keys():
+            if key[2] == name:
+                self.payloads.pop(key)
+
+    def _on_invalidated(self, sender: "Domain", locale: str | None = None):
+        # catalogs may have been added or removed
+        self.locales.clear()
+
+    def get_locales(self) -> frozenset[str]:
+        """Returns the names of the locales the served domain (or, if it
+        is registered, any of the registered domains) has a catalog for.
+        """
+        state = get_state()
+        domain = self.domain or state.domain
+        key = (id(domain), domain.get_translations_path(state.app))
+        locales = self.locales.get(key)
+        if locales is None:
+            domains = state.registry.domains() if domain in state.registry else [domain]
+            names: set[str] = set()
+            for member in domains:
+                for name in member.list_locales(state.app):
+                    try:
+                        names.add(str(Locale.parse(name)))
+                    except (ValueError, UnknownLocaleError):
+                        pass
+            locales = self.locales[key] = frozenset(names)
+        return locales
+
+    def get_translations(self, locale: str) -> "support.NullTranslations":
+        """Returns the translations of ``locale``."""
+        state = get_state()
+        domain = self.domain or state.domain
+        if state.registry.entries:
+            translations = state.registry.get_translations(
+                domain, state.app, Locale.parse(locale)
+            )
+            if translations is not None:
+                return translations
+        return domain.get_translations_for(locale, state.app)
+
+    def get_payload(self, locale: str, bundle: str | None = None) -> CatalogPayload:
+        """Returns the serialized and compressed catalog of ``locale`` (and
+        ``bundle``).  It is only built again when the catalog changed.
+        """
+        translations = self.get_translations(locale)
+        domain = self.domain or get_state().domain
+        key = (id(domain), locale, bundle)
+        cached = self.payloads.get(key)
+        # the translations are replaced when the catalog is reloaded
+        if cached is not None and cached[0] is translations:
+            return cached[1]
+
+        messages = None if bundle is None else self.bundles[bundle]
+        data = catalog_to_json(translations, locale, messages)
+        etag = hashlib.sha256(data).hexdigest()[:32]
+        payload = CatalogPayload(etag, _compress(data))
+        self.payloads[key] = (translations, payload)
+        return payload
+
+    def serve(self, locale: str, bundle: str | None = None) -> Response:
+        if bundle is not None and bundle not in self.bundles:
+            abort(404)
+        try:
+            locale = str(Locale.parse(locale))
+        except (ValueError, UnknownLocaleError):
+            abort(404)
+        # only known locales are loaded and cached, so arbitrary locales in
+        # the URL cannot fill the caches
+        if locale not in self.get_locales():
+            abort(404)
+        payload = self.get_payload(locale, bundle)
+
+        encoding = ""
+        for candidate in ("br", "gzip"):
+            if candidate in payload.encodings and request.accept_encodings[candidate]:
+                encoding = candidate
+                break
+        # the compressed variants are different representations
+        etag = payload.etag + ("-" + encoding if encoding else "")
+
+        response = current_app.response_class(mimetype="application/json")
+        response.set_etag(etag)
+        response.vary.add("Accept-Encoding")
+        response.cache_control.public = True
+        response.cache_control.max_age = self.max_age
+        if not self.max_age:
+            response.cache_control.no_cache = True
+        if request.if_none_match.contains(etag):
+            response.status_code = 304
+            return response
+
+        response.set_data(payload.encodings[encoding])
+        if encoding:
+            response.content_encoding = encoding
+        return response
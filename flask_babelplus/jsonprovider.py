@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""
+flask_babelplus.jsonprovider
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+A Flask JSON provider that translates all the lazy strings of a response
+in one batch::
+
+    from flask_babelplus.jsonprovider import LazyStringJSONProvider
+
+    app.json = LazyStringJSONProvider(app)
+
+:copyright: (c) 2013 by Armin Ronacher, Daniel Neuhäuser and contributors.
+:license: BSD, see LICENSE for more details.
+"""
+
+import typing as t
+
+from flask.json.provider import DefaultJSONProvider
+
+from .domain import resolve_lazy_strings
+from .speaklater import LazyString
+
+
+def find_lazy_strings(obj: t.Any) -> list[LazyString]:
+    """Returns the lazy strings in the dicts, lists and tuples of ``obj``.
+    Each lazy string is only returned once.
+    """
+    found: dict[int, LazyString] = {}
+    stack = [obj]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, LazyString):
+            found.setdefault(id(value), value)
+        elif isinstance(value, dict):
+            stack.extend(value.values())  # pyright: ignore
+        elif isinstance(value, (list, tuple)):
+            stack.extend(value)  # pyright: ignore
+    return list(found.values())
+
+
+class LazyStringJSONProvider(DefaultJSONProvider):
+    """A :class:`~flask.json.provider.DefaultJSONProvider` that looks up
+    all the lazy strings of the serialized object with
+    :func:`~flask_babelplus.domain.resolve_lazy_strings` before the
+    object is serialized.  The object itself is not copied, the encoder
+    picks up the translated strings when it reaches the lazy strings.
+    """
+
+    def dumps(self, obj: t.Any, **kwargs: t.Any) -> str:
+        strings = find_lazy_strings(obj)
+        if strings:
+            resolved = dict(
+                zip(map(id, strings), resolve_lazy_strings(strings), strict=True)
+            )
+            default = kwargs.pop("default", self.default)
+
+            def resolve(value: t.Any) -> t.Any:
+                if isinstance(value, LazyString):
+                    return resolved[id(value)]
+                return default(value)
+
+            kwargs["default"] = resolve
+        return super().dumps(obj, **kwargs)
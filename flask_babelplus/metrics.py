@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+"""
+flask_babelplus.metrics
+~~~~~~~~~~~~~~~~~~~~~~~
+
+Instrumentation of the catalog loads, the caches, the locale and timezone
+selectors and the formatting functions.  Nothing is measured unless a hook
+is installed, the instrumented code only checks :data:`hook` against
+``None``::
+
+    from flask_babelplus.metrics import InMemoryMetrics, set_hook
+
+    metrics = set_hook(InMemoryMetrics())
+    ...
+    metrics.counter("cache_misses", cache="catalog")
+
+The following metrics are reported:
+
+=======================  =========  =====================================
+name                     kind       labels
+=======================  =========  =====================================
+``catalog_loads``        counter    ``domain``, ``locale``
+``catalog_load_seconds`` histogram  ``domain``, ``locale``
+``catalog_size_bytes``   histogram  ``domain``, ``locale`` (``.mo`` files)
+``cache_hits``           counter    ``cache``
+``cache_misses``         counter    ``cache``
+``cache_evictions``      counter    ``cache``
+``selector_seconds``     histogram  ``selector`` (``locale``, ``timezone``)
+``formatter_calls``      counter    ``formatter``
+=======================  =========  =====================================
+
+The caches are reported as ``catalog``, ``locale``, ``overlay``,
+``relative_time``, ``number_pattern``, ``list_pattern``, ``unit_pattern``,
+``sort_key``, ``json_catalog``, ``fragment``, ``interpolation`` and
+``icu_interpolation``.
+
+To report to Prometheus, StatsD or similar subclass :class:`MetricsHook`
+and forward :meth:`~MetricsHook.increment` and
+:meth:`~MetricsHook.observe` to the client library.
+
+:copyright: (c) 2013 by Armin Ronacher, Daniel Neuhäuser and contributors.
+:license: BSD, see LICENSE for more details.
+"""
+
+import threading
+import typing as t
+
+
+class MetricsHook(object):
+    """The interface of a metrics hook.  Both methods do nothing."""
+
+    def increment(self, name: str, value: int = 1, **labels: str):
+        """Adds ``value`` to the counter ``name``."""
+
+    def observe(self, name: str, value: float, **labels: str):
+        """Records ``value`` in the histogram ``name``."""
+
+
+class Histogram(object):
+    """The count, sum, minimum and maximum of the observed values."""
+
+    def __init__(self):
+        self.count = 0
+        self.sum = 0.0
+        self.min = float("inf")
+        self.max = float("-inf")
+
+    def observe(self, value: float):
+        self.count += 1
+        self.sum += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count if self.count else 0.0
+
+    def as_dict(self) -> dict[str, float]:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "min": self.min,
+            "max": self.max,
+            "mean": self.mean,
+        }
+
+
+_Key = tuple[str, tuple[tuple[str, str], ...]]
+
+
+class InMemoryMetrics(MetricsHook):
+    """Collects the metrics in memory, e.g. for tests or a debug view."""
+
+    def __init__(self):
+        self.counters: dict[_Key, int] = {}
+        self.histograms: dict[_Key, Histogram] = {}
+        self._lock = threading.Lock()
+
+    def increment(self, name: str, value: int = 1, **labels: str):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels: str):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(value)
+
+    def counter(self, name: str, **labels: str) -> int:
+        """Returns the sum of all counters ``name`` with ``labels``."""
+        return sum(
+            value
+            for key, value in list(self.counters.items())
+            if _matches(key, name, labels)
+        )
+
+    def histogram(self, name: str, **labels: str) -> Histogram:
+        """Returns the histograms ``name`` with ``labels`` merged into one."""
+        rv = Histogram()
+        for key, histogram in list(self.histograms.items()):
+            if _matches(key, name, labels) and histogram.count:
+                rv.count += histogram.count
+                rv.sum += histogram.sum
+                rv.min = min(rv.min, histogram.min)
+                rv.max = max(rv.max, histogram.max)
+        return rv
+
+    def snapshot(self) -> dict[str, list[dict[str, t.Any]]]:
+        """Returns all counters and histograms as JSON serializable data."""
+        with self._lock:
+            counters = [
+                {"name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in sorted(self.counters.items())
+            ]
+            histograms = [
+                {"name": name, "labels": dict(labels), **histogram.as_dict()}
+                for (name, labels), histogram in sorted(
+                    self.histograms.items(), key=lambda item: item[0]
+                )
+            ]
+        return {"counters": counters, "histograms": histograms}
+
+    def reset(self):
+        """Drops all collected metrics."""
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+
+def _matches(key: _Key, name: str, labels: dict[str, str]) -> bool:
+    if key[0] != name:
+        return False
+    present = dict(key[1])
+    return all(present.get(label) == value for label, value in labels.items())
+
+
+#: the installed hook or ``None`` if metrics are disabled (the default)
+hook: MetricsHook | None = None
+
+H = t.TypeVar("H", bound=MetricsHook)
+
+
+def set_hook(new_hook: H | None) -> H | None:
+    """Installs ``new_hook`` for the whole process and returns it.  Pass
+    ``None`` to disable the metrics again.
+    """
+    global hook
+    hook = new_hook
+    return new_hook
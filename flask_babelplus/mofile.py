@@ -0,0 +1,463 @@
+# -*- coding: utf-8 -*-
+"""
+flask_babelplus.mofile
+~~~~~~~~~~~~~~~~~~~~~~
+
+Memory-mapped message catalogs.  Instead of decoding every message of a
+``.mo`` file when it is loaded, the file is mapped into memory and only
+the messages that are actually looked up are decoded (and cached).
+
+:copyright: (c) 2013 by Armin Ronacher, Daniel Neuhäuser and contributors.
+:license: BSD, see LICENSE for more details.
+"""
+
+import mmap
+import struct
+import sys
+import time
+from collections.abc import Iterator, MutableMapping, Sequence
+from typing import Any, BinaryIO
+
+from babel import support
+
+from .plurals import get_plural_rule
+
+LE_MAGIC = 0x950412DE
+BE_MAGIC = 0xDE120495
+
+
+def hashpjw(key: bytes) -> int:
+    """The hash function GNU gettext uses for the hash table that is
+    stored in ``.mo`` files (``hash_string`` in ``hash-string.c``).
+    """
+    value = 0
+    for char in key:
+        value = (value << 4) + char
+        high = value & 0xF0000000
+        if high:
+            value ^= high >> 24
+            value ^= high
+    return value
+
+
+def _next_prime(n: int) -> int:
+    n |= 1
+    while any(n % d == 0 for d in range(3, int(n**0.5) + 1, 2)):
+        n += 2
+    return n
+
+
+def add_hash_table(data: bytes) -> bytes:
+    """Returns the ``.mo`` file ``data`` with a GNU hash table appended,
+    sized like ``msgfmt`` does.  Babel writes ``.mo`` files without one,
+    :class:`MappedCatalog` then has to index all message ids on the first
+    lookup.  Files that already have a hash table are returned unchanged.
+    """
+    catalog = MappedCatalog(data)
+    if catalog._hash_size:
+        return data
+    size = _next_prime(max(3, catalog.count * 4 // 3))
+    table = [0] * size
+    for i in range(catalog.count):
+        value = hashpjw(catalog._original(i).split(b"\x00", 1)[0])
+        idx = value % size
+        incr = 1 + (value % (size - 2))
+        while table[idx]:
+            if idx >= size - incr:
+                idx -= size - incr
+            else:
+                idx += incr
+        table[idx] = i + 1
+
+    order = "<" if struct.unpack_from("<I", data, 0)[0] == LE_MAGIC else ">"
+    offset = (len(data) + 3) & ~3
+    header = struct.pack(order + "II", size, offset)
+    return b"".join(
+        (
+            data[:20],
+            header,
+            data[28:],
+            b"\x00" * (offset - len(data)),
+            struct.pack(order + "%dI" % size, *table),
+        )
+    )
+
+
+class MappedCatalog(MutableMapping[Any, str]):
+    """A lazy ``_catalog`` for :class:`gettext.GNUTranslations`.  Keys and
+    values are exactly the same as in the ``dict`` that gettext builds, but
+    a message is only decoded the first time it is looked up.
+
+    Lookups use the hash table stored in the ``.mo`` file.  Files that were
+    compiled without a hash table (``pybabel compile`` does not write one,
+    ``flask babel compile`` does, see :func:`add_hash_table`) get an index
+    of the raw message ids that is built once, on the first lookup.
+
+    :param buf: The contents of the ``.mo`` file, usually a :class:`mmap.mmap`.
+    :param filename: The filename, used in error messages.
+    """
+
+    def __init__(self, buf: Any, filename: str = ""):
+        self.buf = buf
+        self.charset = "ascii"
+        self._cache: dict[Any, str] = {}
+        self._deleted: set[Any] = set()
+        self._index: dict[bytes, int] | None = None
+
+        magic = struct.unpack_from("<I", buf, 0)[0]
+        if magic == LE_MAGIC:
+            order = "<"
+        elif magic == BE_MAGIC:
+            order = ">"
+        else:
+            raise OSError(0, "Bad magic number", filename)
+
+        version, count, orig_offset, trans_offset, hash_size, hash_offset = (
+            struct.unpack_from(order + "6I", buf, 4)
+        )
+        if version >> 16 not in (0, 1):
+            raise OSError(0, "Bad version number " + str(version >> 16), filename)
+
+        self.count = count
+        self._entry = struct.Struct(order + "II")
+        self._word = struct.Struct(order + "I")
+        self._orig_offset = orig_offset
+        self._trans_offset = trans_offset
+        self._hash_size = hash_size if hash_size > 2 else 0
+        self._hash_offset = hash_offset
+
+    def _original(self, index: int) -> bytes:
+        length, offset = self._entry.unpack_from(
+            self.buf, self._orig_offset + index * 8
+        )
+        return self.buf[offset : offset + length]
+
+    def _translation(self, index: int) -> bytes:
+        length, offset = self._entry.unpack_from(
+            self.buf, self._trans_offset + index * 8
+        )
+        return self.buf[offset : offset + length]
+
+    def _build_index(self) -> dict[bytes, int]:
+        index: dict[bytes, int] = {}
+        for i in range(self.count):
+            index[self._original(i).split(b"\x00", 1)[0]] = i
+        self._index = index
+        return index
+
+    def find(self, key: bytes) -> int | None:
+        """Returns the index of the message with the (encoded) message id
+        ``key`` or ``None`` if the catalog does not contain it.
+        """
+        if not self._hash_size:
+            index = self._index
+            if index is None:
+                index = self._build_index()
+            return index.get(key)
+
+        size = self._hash_size
+        value = hashpjw(key)
+        idx = value % size
+        incr = 1 + (value % (size - 2))
+        while True:
+            nstr = self._word.unpack_from(self.buf, self._hash_offset + idx * 4)[0]
+            if nstr == 0:
+                return None
+            nstr -= 1
+            if self._original(nstr).split(b"\x00", 1)[0] == key:
+                return nstr
+            if idx >= size - incr:
+                idx -= size - incr
+            else:
+                idx += incr
+
+    def raw(self, key: bytes) -> tuple[bytes, bytes] | None:
+        """Returns the raw ``(msgid, msgstr)`` pair for ``key``."""
+        index = self.find(key)
+        if index is None:
+            return None
+        return self._original(index), self._translation(index)
+
+    def _load(self, key: Any) -> str:
+        plural = isinstance(key, tuple)
+        msgid = key[0] if plural else key
+        try:
+            entry = self.raw(msgid.encode(self.charset))
+        except (AttributeError, UnicodeEncodeError):
+            entry = None
+        if entry is None or (b"\x00" in entry[0]) != plural:
+            raise KeyError(key)
+
+        if not plural:
+            self._cache[key] = rv = str(entry[1], self.charset)
+            return rv
+
+        for i, form in enumerate(entry[1].split(b"\x00")):
+            self._cache.setdefault((msgid, i), str(form, self.charset))
+        if key not in self._cache:
+            raise KeyError(key)
+        return self._cache[key]
+
+    def __getitem__(self, key: Any) -> str:
+        try:
+            return self._cache[key]
+        except KeyError:
+            if key in self._deleted:
+                raise
+            return self._load(key)
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        try:
+            return self[key]
+        except (KeyError, TypeError):
+            return default
+
+    def __setitem__(self, key: Any, value: str) -> None:
+        self._deleted.discard(key)
+        self._cache[key] = value
+
+    def __delitem__(self, key: Any) -> None:
+        if key not in self:
+            raise KeyError(key)
+        self._cache.pop(key, None)
+        self._deleted.add(key)
+
+    def _file_keys(self) -> Iterator[Any]:
+        for i in range(self.count):
+            original = self._original(i)
+            if b"\x00" in original:
+                msgid = str(original.split(b"\x00", 1)[0], self.charset)
+                forms = self._translation(i).count(b"\x00") + 1
+                for form in range(forms):
+                    yield (msgid, form)
+            else:
+                yield str(original, self.charset)
+
+    def __iter__(self) -> Iterator[Any]:
+        seen: set[Any] = set()
+        for key in self._file_keys():
+            if key not in self._deleted:
+                seen.add(key)
+                yield key
+        for key in list(self._cache):
+            if key not in seen:
+                yield key
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __contains__(self, key: object) -> bool:
+        try:
+            self[key]
+        except (KeyError, TypeError):
+            return False
+        return True
+
+
+class MappedTranslations(support.Translations):
+    """A :class:`babel.support.Translations` object that memory-maps the
+    ``.mo`` file instead of reading it.  Messages are decoded on first
+    access.  Use it by passing ``mmap=True`` to :class:`~flask_babelplus.Domain`.
+    """
+
+    def _parse(self, fp: BinaryIO) -> None:
+        filename = getattr(fp, "name", "")
+        try:
+            buf: Any = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+        except (AttributeError, OSError, ValueError):
+            # not a real file (e.g. a BytesIO) or an empty one
+            buf = fp.read()
+
+        self._catalog = catalog = self._create_catalog(buf, filename)
+        self.plural = lambda n: int(n != 1)
+
+        header = catalog.raw(b"")
+        if header is not None:
+            self._parse_header(header[1])
+        catalog.charset = self._charset or "ascii"
+
+    def _create_catalog(self, buf: Any, filename: str) -> MappedCatalog:
+        return MappedCatalog(buf, filename)
+
+    def _parse_header(self, header: bytes) -> None:
+        """Parses the catalog description (the translation of the empty
+        message id) the same way :class:`gettext.GNUTranslations` does.
+        """
+        lastk = None
+        for b_item in header.split(b"\n"):
+            item = b_item.decode().strip()
+            if not item:
+                continue
+            if item.startswith("#-#-#-#-#") and item.endswith("#-#-#-#-#"):
+                continue
+            k = v = None
+            if ":" in item:
+                k, v = item.split(":", 1)
+                k = k.strip().lower()
+                v = v.strip()
+                self._info[k] = v
+                lastk = k
+            elif lastk:
+                self._info[lastk] += "\n" + item
+            if k == "content-type" and v is not None:
+                self._charset = v.split("charset=")[1]
+            elif k == "plural-forms" and v is not None:
+                self.plural = get_plural_rule(v)
+
+
+class PartitionedCatalog(MappedCatalog):
+    """A :class:`MappedCatalog` that is split into partitions.  The first
+    lookup of a message loads (decodes) all the messages of its partition,
+    messages of other partitions stay in the mapped file.
+
+    :param buf: The contents of the ``.mo`` file.
+    :param filename: The filename, used in error messages.
+    :param partition: Either ``"msgctxt"`` to split the catalog by message
+                      context or a sequence of msgid prefixes.  Messages
+                      without a context or without one of the prefixes
+                      end up in the ``""`` partition.
+    """
+
+    def __init__(
+        self, buf: Any, filename: str = "", partition: str | Sequence[str] = "msgctxt"
+    ):
+        super().__init__(buf, filename)
+        if isinstance(partition, str):
+            if partition != "msgctxt":
+                raise ValueError(
+                    "partition has to be 'msgctxt' or a sequence of prefixes"
+                )
+            self.prefixes: tuple[str, ...] | None = None
+        else:
+            self.prefixes = tuple(partition)
+        self._partitions: dict[str, list[int]] | None = None
+        self._stats: dict[str, dict[str, Any]] = {}
+
+    def partition_of(self, msgid: str) -> str:
+        """Returns the name of the partition of the message id ``msgid``
+        (including its context as in ``context\\x04msgid``).
+        """
+        if self.prefixes is None:
+            return msgid.split("\x04", 1)[0] if "\x04" in msgid else ""
+        msgid = msgid.rsplit("\x04", 1)[-1]
+        for prefix in self.prefixes:
+            if msgid.startswith(prefix):
+                return prefix
+        return ""
+
+    def _partition_index(self) -> dict[str, list[int]]:
+        if self._partitions is not None:
+            return self._partitions
+
+        partitions: dict[str, list[int]] = {}
+        if self.prefixes is None:
+            for i in range(self.count):
+                key = self._original(i).split(b"\x00", 1)[0]
+                if b"\x04" in key:
+                    name = str(key.split(b"\x04", 1)[0], self.charset)
+                else:
+                    name = ""
+                partitions.setdefault(name, []).append(i)
+        else:
+            prefixes = [(p, p.encode(self.charset)) for p in self.prefixes]
+            for i in range(self.count):
+                key = self._original(i).split(b"\x00", 1)[0]
+                msgid = key.rsplit(b"\x04", 1)[-1]
+                name = ""
+                for prefix, raw_prefix in prefixes:
+                    if msgid.startswith(raw_prefix):
+                        name = prefix
+                        break
+                partitions.setdefault(name, []).append(i)
+        self._partitions = partitions
+        return partitions
+
+    def load_partition(self, name: str) -> None:
+        """Decodes all messages of the partition ``name``."""
+        start = time.perf_counter()
+        charset = self.charset
+        cache = self._cache
+        deleted = self._deleted
+        entries = size = 0
+        for i in self._partition_index().get(name, ()):
+            original = self._original(i)
+            translation = self._translation(i)
+            if b"\x00" in original:
+                msgid = str(original.split(b"\x00", 1)[0], charset)
+                items = [
+                    ((msgid, form), str(value, charset))
+                    for form, value in enumerate(translation.split(b"\x00"))
+                ]
+            else:
+                items = [(str(original, charset), str(translation, charset))]
+            for key, value in items:
+                if key not in deleted:
+                    cache.setdefault(key, value)
+                    entries += 1
+                    size += sys.getsizeof(key) + sys.getsizeof(value)
+
+        self._stats[name] = {
+            "entries": entries,
+            "memory": size,
+            "load_time": time.perf_counter() - start,
+        }
+
+    def _load(self, key: Any) -> str:
+        msgid = key[0] if isinstance(key, tuple) else key
+        if not isinstance(msgid, str):
+            raise KeyError(key)
+        name = self.partition_of(msgid)
+        if name not in self._stats:
+            self.load_partition(name)
+            if key in self._cache:
+                return self._cache[key]
+        raise KeyError(key)
+
+    def stats(self) -> dict[str, dict[str, Any]]:
+        """Returns the statistics of all partitions as a mapping of the
+        partition name to a dict with the number of ``entries``, the
+        estimated ``memory`` (in bytes) of the decoded messages, the
+        ``load_time`` (in seconds) and whether it was ``loaded`` at all.
+        """
+        rv: dict[str, dict[str, Any]] = {}
+        for name, indices in self._partition_index().items():
+            stats = self._stats.get(name)
+            if stats is None:
+                rv[name] = {
+                    "entries": len(indices),
+                    "memory": 0,
+                    "load_time": 0.0,
+                    "loaded": False,
+                }
+            else:
+                rv[name] = dict(stats, loaded=True)
+        return rv
+
+
+class PartitionedTranslations(MappedTranslations):
+    """A :class:`MappedTranslations` object whose catalog is split into
+    partitions that are loaded on first access.  Use it by passing
+    ``partition`` to :class:`~flask_babelplus.Domain`.
+
+    :param fp: The ``.mo`` file.
+    :param domain: The message domain.
+    :param partition: See :class:`PartitionedCatalog`.
+    """
+
+    def __init__(
+        self,
+        fp: BinaryIO | None = None,
+        domain: str | None = None,
+        partition: str | Sequence[str] = "msgctxt",
+    ):
+        self.partition = partition
+        super().__init__(fp=fp, domain=domain)
+
+    def _create_catalog(self, buf: Any, filename: str) -> MappedCatalog:
+        return PartitionedCatalog(buf, filename, self.partition)
+
+    def partition_stats(self) -> dict[str, dict[str, Any]]:
+        """Returns the statistics of the partitions.  See
+        :meth:`PartitionedCatalog.stats`.
+        """
+        return self._catalog.stats()
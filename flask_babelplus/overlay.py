@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+"""
+flask_babelplus.overlay
+~~~~~~~~~~~~~~~~~~~~~~~
+
+Overlay catalogs.  An overlay is a small set of messages (e.g. the strings
+a tenant changed) that is layered over a shared base catalog without
+copying it.
+
+:copyright: (c) 2013 by Armin Ronacher, Daniel Neuhäuser and contributors.
+:license: BSD, see LICENSE for more details.
+"""
+
+import typing as t
+from collections.abc import Iterator, Mapping
+
+from babel import Locale, support
+
+from .cache import LRUCache
+from .domain import Domain
+from .utils import get_locale, get_state
+
+_missing = object()
+
+
+class OverlayCatalog(Mapping[t.Any, str]):
+    """A catalog that looks up the messages in ``delta`` first and in the
+    ``base`` catalog second.  The base catalog is referenced, not copied.
+    """
+
+    def __init__(self, delta: Mapping[t.Any, str], base: Mapping[t.Any, str]):
+        self.delta = delta
+        self.base = base
+
+    def get(self, key: t.Any, default: t.Any = None) -> t.Any:
+        value = self.delta.get(key, _missing)
+        if value is _missing:
+            return self.base.get(key, default)
+        return value
+
+    def __getitem__(self, key: t.Any) -> str:
+        value = self.get(key, _missing)
+        if value is _missing:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key: object) -> bool:
+        return key in self.delta or key in self.base
+
+    def __iter__(self) -> Iterator[t.Any]:
+        yield from self.delta
+        for key in self.base:
+            if key not in self.delta:
+                yield key
+
+    def __len__(self) -> int:
+        return len(self.base) + sum(1 for key in self.delta if key not in self.base)
+
+
+class OverlayTranslations(support.Translations):
+    """Translations that layer the messages of ``delta`` over the catalog
+    of ``base``.  Headers and plural rules are taken from ``base``.
+
+    :param base: The shared translations.
+    :param delta: A mapping with the same keys and values as the
+                  ``_catalog`` of a translations object.
+    """
+
+    def __init__(self, base: support.NullTranslations, delta: Mapping[t.Any, str]):
+        super().__init__(domain=base.domain)
+        self.base = base
+        self.files = list(base.files)
+        self._info = base._info
+        self._charset = base._charset
+        self.plural = base.plural
+        self._catalog = OverlayCatalog(delta, base._catalog)  # pyright: ignore
+
+
+class OverlayDomain(Domain):
+    """A domain whose catalogs can be changed per tenant.  The catalogs of
+    the domain are shared by all tenants and the messages a tenant changed
+    are layered over them::
+
+        domain = OverlayDomain(maxsize=2048)
+
+        @domain.tenantselector
+        def get_tenant():
+            return g.tenant.id
+
+        @domain.overlayloader
+        def load_overlay(tenant, locale):
+            return {'Yes': 'Jawohl'}
+
+    The overlays are kept in an LRU cache keyed by tenant and locale.
+
+    :param maxsize: The maximum number of overlays that are cached.
+
+    All other arguments are passed to :class:`~flask_babelplus.Domain`.
+    """
+
+    def __init__(
+        self,
+        dirname: str | None = None,
+        domain: str = "messages",
+        maxsize: int = 1024,
+        **kwargs: t.Any,
+    ):
+        super().__init__(dirname, domain, **kwargs)
+        self.tenant_selector_func: t.Callable[[], t.Hashable | None] | None = None
+        self.overlay_loader_func: (
+            t.Callable[[t.Hashable, Locale | None], Mapping[t.Any, str] | None] | None
+        ) = None
+        self.overlays: LRUCache[
+            tuple[t.Hashable, str],
+            tuple[support.NullTranslations, support.NullTranslations],
+        ] = LRUCache(maxsize, name="overlay")
+
+    def tenantselector(self, f: t.Callable[[], t.Hashable | None]):
+        """Registers a callback function that returns the tenant of the
+        current request or ``None`` to use the shared catalogs.
+        """
+        self.tenant_selector_func = f
+        return f
+
+    def overlayloader(
+        self, f: t.Callable[[t.Hashable, Locale | None], Mapping[t.Any, str] | None]
+    ):
+        """Registers a callback function that is called with the tenant
+        and the locale and returns the messages the tenant changed.
+        """
+        self.overlay_loader_func = f
+        return f
+
+    def get_translations(self):
+        base = super().get_translations()
+        if self.tenant_selector_func is None or get_state(silent=True) is None:
+            return base
+
+        tenant = self.tenant_selector_func()
+        if tenant is None:
+            return base
+        return self.get_overlay(tenant, get_locale(), base)
+
+    def get_overlay(
+        self,
+        tenant: t.Hashable,
+        locale: Locale | None,
+        base: support.NullTranslations,
+    ) -> support.NullTranslations:
+        """Returns the translations of ``tenant`` layered over ``base``.
+        Returns ``base`` itself if the tenant did not change any messages.
+        """
+        key = (tenant, str(locale))
+        cached = self.overlays.get(key)
+        # the base is replaced when its catalog is reloaded
+        if cached is not None and cached[0] is base:
+            return cached[1]
+
+        delta = None
+        if self.overlay_loader_func is not None:
+            delta = self.overlay_loader_func(tenant, locale)
+        translations = OverlayTranslations(base, delta) if delta else base
+        self.overlays[key] = (base, translations)
+        return translations
+
+    def invalidate_tenant(self, tenant: t.Hashable, locale: str | None = None):
+        """Drops the cached overlays of ``tenant`` for ``locale`` (including
+        all of its territories) or for all locales.
+        """
+        for key in self.overlays.keys():
+            if key[0] != tenant:
+                continue
+            if locale is None or key[1] == locale or key[1].startswith(locale + "_"):
+                self.overlays.pop(key)
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""
+flask_babelplus.plurals
+~~~~~~~~~~~~~~~~~~~~~~~
+
+Plural rules with precomputed tables.  The ``Plural-Forms`` expression of
+a catalog is compiled once per process and the plural forms of the
+numbers below :data:`PLURAL_TABLE_SIZE` are computed up front, so
+``ngettext`` only runs the expression for larger numbers.  Catalogs with
+the same expression (e.g. the catalogs of one locale in different domains)
+share one rule.
+
+:copyright: (c) 2013 by Armin Ronacher, Daniel Neuhäuser and contributors.
+:license: BSD, see LICENSE for more details.
+"""
+
+import threading
+import typing as t
+from gettext import c2py
+
+if t.TYPE_CHECKING:
+    from babel import support
+
+#: the plural forms of the numbers ``0`` to ``PLURAL_TABLE_SIZE - 1`` are
+#: precomputed
+PLURAL_TABLE_SIZE = 1000
+
+#: a plural function, called with a number it returns the index of the
+#: plural form
+PluralRule = t.Callable[[t.Any], int]
+
+_rules: dict[str, PluralRule] = {}
+_lock = threading.Lock()
+
+
+def compile_plural_rule(expression: str) -> PluralRule:
+    """Compiles the C expression of a plural rule (e.g. ``"(n != 1)"``)
+    like :func:`gettext.c2py` but looks up the numbers below
+    :data:`PLURAL_TABLE_SIZE` in a precomputed table.  The table and the
+    compiled expression are available as the ``table`` and ``func``
+    attributes of the returned function.
+    """
+    func = c2py(expression)
+    table = tuple(func(n) for n in range(PLURAL_TABLE_SIZE))
+
+    # a closure is about twice as fast to call as an object with __call__
+    def plural(n: t.Any, table=table, func=func, size=PLURAL_TABLE_SIZE) -> int:
+        # bools and floats go through the expression like before
+        if n.__class__ is int and 0 <= n < size:
+            return table[n]
+        return func(n)
+
+    plural.expression = expression  # pyright: ignore
+    plural.table = table  # pyright: ignore
+    plural.func = func  # pyright: ignore
+    return plural
+
+
+def get_plural_rule(plural_forms: str) -> PluralRule:
+    """Returns the shared rule of a ``Plural-Forms`` header, e.g.
+    ``"nplurals=2; plural=(n != 1);"``.
+    """
+    expression = plural_forms.split(";")[1].split("plural=")[1].strip()
+    rule = _rules.get(expression)
+    if rule is None:
+        with _lock:
+            rule = _rules.get(expression)
+            if rule is None:
+                rule = _rules[expression] = compile_plural_rule(expression)
+    return rule
+
+
+def install_plural_rule(translations: "support.NullTranslations"):
+    """Replaces the plural function of ``translations`` with the shared
+    rule of its ``Plural-Forms`` header.  Translations without the header
+    keep their function.
+    """
+    plural_forms = getattr(translations, "_info", {}).get("plural-forms")
+    if plural_forms and not hasattr(getattr(translations, "plural", None), "table"):
+        translations.plural = get_plural_rule(plural_forms)  # pyright: ignore
+
+
+def clear_plural_rules():
+    """Forgets all shared rules.  Loaded catalogs keep theirs."""
+    with _lock:
+        _rules.clear()
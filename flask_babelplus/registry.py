@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+"""
+flask_babelplus.registry
+~~~~~~~~~~~~~~~~~~~~~~~~
+
+A registry of translation domains that resolves messages of all the
+registered domains with a single lookup.
+
+:copyright: (c) 2013 by Armin Ronacher, Daniel Neuhäuser and contributors.
+:license: BSD, see LICENSE for more details.
+"""
+
+import os
+import time
+import typing as t
+
+from babel import Locale
+from flask import Flask, has_request_context, request
+
+from .backends import FileSystemBackend
+from .signals import catalog_invalidated
+
+if t.TYPE_CHECKING:
+    from babel import support
+
+    from .domain import Domain
+
+
+class DomainRegistry(object):
+    """Keeps the domains registered with :meth:`Babel.register_domain`.
+    For every locale (and blueprint with domains of its own) the catalogs
+    of the registered domains are merged into one lookup table.  If two
+    domains contain the same message, the one of the domain with the
+    higher priority wins.  Domains that use the same catalog files share
+    a single loaded catalog.
+    """
+
+    def __init__(self):
+        #: a list of ``(priority, order, domain, blueprint)`` tuples
+        self.entries: list[tuple[int, int, "Domain", str | None]] = []
+        self.cache: dict[tuple[str, str | None], "support.NullTranslations"] = {}
+        self._members: dict[str | None, frozenset["Domain"]] = {}
+        self._next_poll = 0.0
+
+    def register(
+        self, domain: "Domain", priority: int = 0, blueprint: str | None = None
+    ):
+        """Registers ``domain``.  Domains registered for a ``blueprint`` are
+        only merged into the lookup tables of requests to that blueprint.
+        """
+        self.entries.append((priority, len(self.entries), domain, blueprint))
+        self.entries.sort(key=lambda entry: entry[:2])
+        catalog_invalidated.connect(self._on_invalidated, sender=domain)
+
+        members: dict[str | None, set["Domain"]] = {None: set()}
+        for _, _, entry_domain, entry_blueprint in self.entries:
+            members.setdefault(entry_blueprint, set()).add(entry_domain)
+        for name, domains in members.items():
+            if name is not None:
+                domains.update(members[None])
+        self._members = {name: frozenset(domains) for name, domains in members.items()}
+        self.cache.clear()
+
+    def __contains__(self, domain: "Domain") -> bool:
+        return any(entry[2] is domain for entry in self.entries)
+
+    def _on_invalidated(self, sender: "Domain", locale: str | None = None):
+        self.invalidate()
+
+    def invalidate(self):
+        """Drops all merged lookup tables."""
+        self.cache.clear()
+
+    def domains(self, blueprint: str | None = None) -> list["Domain"]:
+        """Returns the domains that are merged for ``blueprint`` ordered
+        from the lowest to the highest priority.
+        """
+        return [
+            domain
+            for _, _, domain, entry_blueprint in self.entries
+            if entry_blueprint is None or entry_blueprint == blueprint
+        ]
+
+    def current_blueprint(self) -> str | None:
+        """Returns the blueprint of the current request if it has domains
+        of its own.
+        """
+        if not has_request_context():
+            return None
+        for name in request.blueprints:
+            if name in self._members:
+                return name
+        return None
+
+    def get_translations(
+        self, domain: "Domain", app: Flask, locale: Locale | None
+    ) -> "support.NullTranslations | None":
+        """Returns the merged lookup table for ``locale`` and the blueprint
+        of the current request or ``None`` if ``domain`` is not part of it.
+        """
+        blueprint = self.current_blueprint()
+        if domain not in self._members.get(blueprint, ()):
+            return None
+
+        now = time.monotonic()
+        if now >= self._next_poll:
+            for member in self._members[blueprint]:
+                if now >= member._next_poll:
+                    member.poll_changes()
+            self._next_poll = min(
+                member._next_poll for member in self._members[blueprint]
+            )
+
+        key = (str(locale), blueprint)
+        translations = self.cache.get(key)
+        if translations is None:
+            translations = self.merge(app, locale, blueprint)
+            self.cache[key] = translations
+        return translations
+
+    def merge(
+        self, app: Flask, locale: Locale | None, blueprint: str | None = None
+    ) -> "support.Translations":
+        """Builds the merged lookup table for ``locale`` and ``blueprint``.
+        The messages of all catalogs are copied into one dict from the
+        lowest to the highest priority, so every message is resolved with
+        a single lookup.  The table is built again when one of the domains
+        is invalidated.
+        """
+        from babel import support
+
+        loaded: dict[t.Hashable, "support.NullTranslations"] = {}
+        order: list[t.Hashable] = []
+        for domain in self.domains(blueprint):
+            identity = _catalog_identity(domain, app)
+            if identity in loaded:
+                # same catalog, let it win again with its new priority
+                order.remove(identity)
+            else:
+                loaded[identity] = domain.get_translations_for(locale, app)
+            order.append(identity)
+
+        merged = support.Translations()
+        catalog = merged._catalog
+        for identity in order:
+            translations = loaded[identity]
+            catalog.update(translations._catalog)
+            if "plural-forms" in translations._info:
+                merged._info = dict(translations._info)
+                merged._charset = translations._charset
+                merged.plural = translations.plural
+        return merged
+
+
+def _catalog_identity(domain: "Domain", app: Flask) -> t.Hashable:
+    """Domains with the same identity load the same catalogs."""
+    if type(domain.backend) is FileSystemBackend:
+        dirname = os.path.realpath(domain.get_translations_path(app))
+        return (dirname, domain.domain)
+    return (id(domain.backend), domain.domain)
@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+"""
+flask_babelplus.signals
+~~~~~~~~~~~~~~~~~~~~~~~
+
+Signals sent by Flask-BabelPlus.
+
+:copyright: (c) 2013 by Armin Ronacher, Daniel Neuhäuser and contributors.
+:license: BSD, see LICENSE for more details.
+"""
+
+from blinker import Namespace
+
+_signals = Namespace()
+
+#: Sent by a :class:`~flask_babelplus.Domain` when cached catalogs are
+#: dropped.  The sender is the domain, ``locale`` is the locale that was
+#: dropped or ``None`` if all locales were dropped.
+catalog_invalidated = _signals.signal("catalog-invalidated")
+
+#: Sent after a sampled request (see ``BABEL_TIMING_SAMPLE_RATE``).  The
+#: sender is the application, ``timings`` is the
+#: :class:`~flask_babelplus.timing.RequestTimings` of the request.
+request_timed = _signals.signal("request-timed")
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""
+flask_babelplus.snapshot
+~~~~~~~~~~~~~~~~~~~~~~~~
+
+Precompiled catalog snapshots.  A snapshot stores an already parsed
+message catalog next to its ``.mo`` file in a format that can be loaded
+without parsing the ``.mo`` file again.  Snapshots are written by the
+``flask babel build-cache`` command and are ignored as soon as the
+``.mo`` file they were built from changes.
+
+:copyright: (c) 2013 by Armin Ronacher, Daniel Neuhäuser and contributors.
+:license: BSD, see LICENSE for more details.
+"""
+
+import hashlib
+import marshal
+import os
+import struct
+from importlib.util import MAGIC_NUMBER
+
+from babel import support
+
+from .plurals import get_plural_rule
+
+SNAPSHOT_MAGIC = b"FBPSNAP\x00"
+SNAPSHOT_VERSION = 1
+SNAPSHOT_SUFFIX = ".snapshot"
+
+# magic, format version, marshal/python magic, source size, source mtime,
+# and a digest of the payload
+_header = struct.Struct("<8sI4sQQ16s")
+
+
+def snapshot_path(filename: str) -> str:
+    """Returns the path of the snapshot for the ``.mo`` file ``filename``."""
+    return filename + SNAPSHOT_SUFFIX
+
+
+def write_snapshot(
+    filename: str, translations: support.NullTranslations | None = None
+) -> str:
+    """Writes a snapshot of the ``.mo`` file ``filename`` and returns the
+    path of the snapshot.
+
+    :param filename: The path to the ``.mo`` file.
+    :param translations: The already loaded translations of ``filename``.
+                         If not given, the file is loaded.
+    """
+    stat = os.stat(filename)
+    if translations is None:
+        with open(filename, "rb") as fp:
+            translations = support.Translations(fp=fp)
+
+    payload = marshal.dumps(
+        (dict(translations._catalog), translations._info, translations._charset)
+    )
+    header = _header.pack(
+        SNAPSHOT_MAGIC,
+        SNAPSHOT_VERSION,
+        MAGIC_NUMBER,
+        stat.st_size,
+        stat.st_mtime_ns,
+        hashlib.blake2b(payload, digest_size=16).digest(),
+    )
+
+    path = snapshot_path(filename)
+    tmp = "%s.%d.tmp" % (path, os.getpid())
+    with open(tmp, "wb") as fp:
+        fp.write(header)
+        fp.write(payload)
+    os.replace(tmp, path)
+    return path
+
+
+def load_snapshot(filename: str, domain: str | None = None):
+    """Loads the snapshot of the ``.mo`` file ``filename``.  Returns
+    ``None`` if there is no snapshot or if it is stale, corrupt or was
+    written by another version of Python or Flask-BabelPlus.
+
+    :param filename: The path to the ``.mo`` file.
+    :param domain: The message domain of the catalog.
+    """
+    try:
+        with open(snapshot_path(filename), "rb") as fp:
+            data = fp.read()
+        stat = os.stat(filename)
+    except OSError:
+        return None
+
+    if len(data) < _header.size:
+        return None
+    magic, version, python_magic, size, mtime, digest = _header.unpack_from(data)
+    if (
+        magic != SNAPSHOT_MAGIC
+        or version != SNAPSHOT_VERSION
+        or python_magic != MAGIC_NUMBER
+        or size != stat.st_size
+        or mtime != stat.st_mtime_ns
+    ):
+        return None
+
+    payload = memoryview(data)[_header.size :]
+    if hashlib.blake2b(payload, digest_size=16).digest() != digest:
+        return None
+
+    catalog, info, charset = marshal.loads(payload)
+    translations = support.Translations(domain=domain)
+    translations._catalog = catalog
+    translations._info = info
+    translations._charset = charset
+    translations.files = [filename]
+    if "plural-forms" in info:
+        translations.plural = get_plural_rule(info["plural-forms"])
+    return translations
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""
+flask_babelplus.timing
+~~~~~~~~~~~~~~~~~~~~~~
+
+Accounts the time a request spends in locale and timezone selection,
+catalog loading, gettext and the formatting functions.  A share of the
+requests (``BABEL_TIMING_SAMPLE_RATE``) is sampled; the timings of a
+sampled request are sent with the :data:`request_timed` signal and, if
+``BABEL_SERVER_TIMING`` is set, added as ``Server-Timing`` header.
+
+:copyright: (c) 2013 by Armin Ronacher, Daniel Neuhäuser and contributors.
+:license: BSD, see LICENSE for more details.
+"""
+
+import functools
+import random
+import typing as t
+from contextvars import ContextVar
+from time import perf_counter
+
+from flask import Flask, Response, current_app
+
+from .signals import request_timed
+
+F = t.TypeVar("F", bound=t.Callable[..., t.Any])
+
+#: the categories in the order of the ``Server-Timing`` header
+CATEGORIES = ("locale", "timezone", "catalog", "gettext", "format")
+
+
+class RequestTimings(object):
+    """The wall time and the number of calls per category of one request.
+    The time of nested calls is only accounted to the innermost category,
+    e.g. loading a catalog from within ``gettext`` counts as ``catalog``.
+    """
+
+    def __init__(self):
+        self.durations: dict[str, float] = dict.fromkeys(CATEGORIES, 0.0)
+        self.counts: dict[str, int] = dict.fromkeys(CATEGORIES, 0)
+        self._children: list[float] = []
+
+    def start(self) -> float:
+        self._children.append(0.0)
+        return perf_counter()
+
+    def stop(self, category: str, start: float):
+        elapsed = perf_counter() - start
+        self.durations[category] += elapsed - self._children.pop()
+        self.counts[category] += 1
+        if self._children:
+            self._children[-1] += elapsed
+
+    @property
+    def total(self) -> float:
+        """The time spent in all categories in seconds."""
+        return sum(self.durations.values())
+
+    def server_timing(self) -> str:
+        """Returns the value of the ``Server-Timing`` header."""
+        return ", ".join(
+            'i18n-%s;dur=%.3f;desc="%d calls"'
+            % (category, self.durations[category] * 1000, self.counts[category])
+            for category in CATEGORIES
+            if self.counts[category]
+        )
+
+
+#: the timings of the current request if it is sampled
+current_timings: ContextVar[RequestTimings | None] = ContextVar(
+    "babel_timings", default=None
+)
+
+
+def timed(category: str) -> t.Callable[[F], F]:
+    """Accounts the calls of the decorated function to ``category``."""
+
+    def decorator(f: F) -> F:
+        @functools.wraps(f)
+        def wrapper(*args: t.Any, **kwargs: t.Any):
+            timings = current_timings.get()
+            if timings is None:
+                return f(*args, **kwargs)
+            start = timings.start()
+            try:
+                return f(*args, **kwargs)
+            finally:
+                timings.stop(category, start)
+
+        return t.cast(F, wrapper)
+
+    return decorator
+
+
+def _start_request():
+    rate = current_app.config["BABEL_TIMING_SAMPLE_RATE"]
+    if rate and (rate >= 1 or random.random() < rate):
+        current_timings.set(RequestTimings())
+
+
+def _finish_request(response: Response) -> Response:
+    timings = current_timings.get()
+    if timings is None:
+        return response
+    app: Flask = current_app._get_current_object()  # pyright: ignore
+    request_timed.send(app, timings=timings)
+    if app.config["BABEL_SERVER_TIMING"] and timings.total:
+        response.headers.add("Server-Timing", timings.server_timing())
+    return response
+
+
+def _teardown_request(exc: BaseException | None = None):
+    current_timings.set(None)
+
+
+def init_app(app: Flask):
+    """Registers the request hooks that sample the requests of ``app``."""
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+    app.teardown_request(_teardown_request)
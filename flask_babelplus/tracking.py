@@ -0,0 +1,254 @@
+# -*- coding: utf-8 -*-
+"""
+flask_babelplus.tracking
+~~~~~~~~~~~~~~~~~~~~~~~~
+
+Tracks which messages are looked up, in which locale and by which
+endpoint, and whether the catalog translated them.  Nothing is tracked
+unless a tracker is installed::
+
+    from flask_babelplus.tracking import MessageTracker, set_tracker
+
+    tracker = set_tracker(MessageTracker(sample_rate=0.01))
+    tracker.start_export('/var/lib/myapp/messages.json', interval=600)
+
+The collected data shows the hot messages and, with :meth:`MessageTracker.
+write_pot`, the messages that are missing from the catalogs.
+:meth:`MessageTracker.unused` lists the catalog entries that were never
+looked up.
+
+:copyright: (c) 2013 by Armin Ronacher, Daniel Neuhäuser and contributors.
+:license: BSD, see LICENSE for more details.
+"""
+
+import io
+import json
+import os
+import random
+import threading
+import typing as t
+from collections.abc import Mapping
+
+from flask import has_request_context, request
+
+from .utils import get_locale
+
+#: ``(domain, locale, msgctxt, msgid, endpoint)``
+_Key = tuple[str, str, str | None, str, str | None]
+
+TRACKER_VERSION = 1
+
+
+class MessageTracker(object):
+    """Counts the hits and misses of the sampled message lookups per
+    domain, locale, message and endpoint.
+
+    The counters are not locked.  Concurrent lookups of the same message
+    may lose an increment, which does not matter for sampled counts.
+
+    :param sample_rate: The share of the lookups that are counted.
+    :param maxsize: The maximum number of counters.  Lookups of new
+                    messages are dropped (and counted in :attr:`dropped`)
+                    once there are as many counters.
+    """
+
+    def __init__(self, sample_rate: float = 1.0, maxsize: int = 100000):
+        self.sample_rate = sample_rate
+        self.maxsize = maxsize
+        #: ``[hits, misses]`` per key
+        self.entries: dict[_Key, list[int]] = {}
+        #: the plural form of the tracked plural messages
+        self.plurals: dict[tuple[str | None, str], str] = {}
+        #: the number of lookups that were dropped because the tracker
+        #: was full
+        self.dropped = 0
+        self._export_stop: threading.Event | None = None
+
+    def record(
+        self,
+        domain: str,
+        context: str | None,
+        msgid: str,
+        missed: bool,
+        plural: str | None = None,
+    ):
+        """Records a lookup of ``msgid`` in ``domain``."""
+        if self.sample_rate < 1 and random.random() >= self.sample_rate:
+            return
+        endpoint = request.endpoint if has_request_context() else None
+        key = (domain, str(get_locale()), context, msgid, endpoint)
+        entry = self.entries.get(key)
+        if entry is None:
+            if len(self.entries) >= self.maxsize:
+                self.dropped += 1
+                return
+            entry = self.entries.setdefault(key, [0, 0])
+            if plural is not None:
+                self.plurals[context, msgid] = plural
+        entry[missed] += 1
+
+    def clear(self):
+        """Drops all counters."""
+        self.entries.clear()
+        self.plurals.clear()
+        self.dropped = 0
+
+    def messages(self, missing: bool = False) -> list[dict[str, t.Any]]:
+        """Returns the counters, the most looked up messages first.
+
+        :param missing: Only return the messages that missed the catalog.
+        """
+        rv = [
+            {
+                "domain": domain,
+                "locale": locale,
+                "context": context,
+                "msgid": msgid,
+                "endpoint": endpoint,
+                "hits": hits,
+                "misses": misses,
+            }
+            for (domain, locale, context, msgid, endpoint), (hits, misses) in list(
+                self.entries.items()
+            )
+            if misses or not missing
+        ]
+        rv.sort(
+            key=lambda e: (
+                -(e["hits"] + e["misses"]),
+                e["domain"],
+                e["locale"],
+                e["context"] or "",
+                e["msgid"],
+                e["endpoint"] or "",
+            )
+        )
+        return rv
+
+    def unused(
+        self, catalog: Mapping[t.Any, str], domain: str = "messages"
+    ) -> list[tuple[str | None, str]]:
+        """Returns the ``(msgctxt, msgid)`` of the messages in ``catalog``
+        (the ``_catalog`` of a translations object) that were not looked
+        up in ``domain``.  As the lookups are sampled, rarely used messages
+        may be reported as well.
+        """
+        seen = {(key[2], key[3]) for key in list(self.entries) if key[0] == domain}
+        rv: set[tuple[str | None, str]] = set()
+        for key in catalog:
+            if isinstance(key, tuple):
+                key = key[0]
+            if not key:
+                # the header
+                continue
+            context, _, msgid = key.rpartition("\x04")
+            message = (context or None, msgid)
+            if message not in seen:
+                rv.add(message)
+        return sorted(rv, key=lambda message: (message[0] or "", message[1]))
+
+    def to_json(self) -> dict[str, t.Any]:
+        """Returns the counters as JSON serializable data."""
+        return {
+            "version": TRACKER_VERSION,
+            "sample_rate": self.sample_rate,
+            "dropped": self.dropped,
+            "messages": self.messages(),
+        }
+
+    def write_pot(
+        self,
+        fp: t.BinaryIO,
+        domain: str | None = None,
+        missing: bool = True,
+    ):
+        """Writes the tracked messages as ``.pot`` file.  The endpoints
+        that looked up a message are written as its locations and the
+        counts per locale as comment.
+
+        :param fp: A binary file object.
+        :param domain: Only write the messages of this domain.
+        :param missing: Only write the messages that missed the catalog in
+                        some locale.
+        """
+        from babel.messages.catalog import Catalog
+        from babel.messages.pofile import write_po
+
+        merged: dict[tuple[str | None, str], dict[str, t.Any]] = {}
+        for entry in self.messages(missing):
+            if domain is not None and entry["domain"] != domain:
+                continue
+            message = merged.setdefault(
+                (entry["context"], entry["msgid"]), {"endpoints": set(), "locales": {}}
+            )
+            if entry["endpoint"] is not None:
+                message["endpoints"].add(entry["endpoint"])
+            counts = message["locales"].setdefault(entry["locale"], [0, 0])
+            counts[0] += entry["hits"]
+            counts[1] += entry["misses"]
+
+        catalog = Catalog(domain=domain, fuzzy=False)
+        for (context, msgid), message in merged.items():
+            plural = self.plurals.get((context, msgid))
+            catalog.add(
+                msgid if plural is None else (msgid, plural),
+                locations=[(endpoint, 0) for endpoint in sorted(message["endpoints"])],
+                auto_comments=[
+                    "%s: %d hits, %d misses" % (locale, hits, misses)
+                    for locale, (hits, misses) in sorted(message["locales"].items())
+                ],
+                context=context,
+            )
+        write_po(fp, catalog, sort_output=True, include_lineno=False)
+
+    def save(self, filename: str):
+        """Writes the counters to ``filename``, as ``.pot`` file if the
+        name ends with ``.pot`` and as JSON otherwise.
+        """
+        if filename.endswith(".pot"):
+            buf = io.BytesIO()
+            self.write_pot(buf)
+            data = buf.getvalue()
+        else:
+            data = json.dumps(self.to_json(), indent=2).encode("utf-8")
+
+        tmp = "%s.%d.tmp" % (filename, os.getpid())
+        with open(tmp, "wb") as fp:
+            fp.write(data)
+        os.replace(tmp, filename)
+
+    def start_export(self, filename: str, interval: float = 300.0):
+        """Saves the counters to ``filename`` every ``interval`` seconds in
+        a background thread until :meth:`stop_export` is called.
+        """
+        self.stop_export()
+        stop = self._export_stop = threading.Event()
+
+        def export():
+            while not stop.wait(interval):
+                try:
+                    self.save(filename)
+                except OSError:
+                    pass
+
+        threading.Thread(target=export, name="babel-tracker", daemon=True).start()
+
+    def stop_export(self):
+        """Stops the export started with :meth:`start_export`."""
+        if self._export_stop is not None:
+            self._export_stop.set()
+            self._export_stop = None
+
+
+#: the installed tracker or ``None`` if messages are not tracked (the
+#: default)
+tracker: MessageTracker | None = None
+
+
+def set_tracker(new_tracker: MessageTracker | None) -> MessageTracker | None:
+    """Installs ``new_tracker`` for the whole process and returns it.  Pass
+    ``None`` to stop tracking.
+    """
+    global tracker
+    tracker = new_tracker
+    return new_tracker
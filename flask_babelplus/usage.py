@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""
+flask_babelplus.usage
+~~~~~~~~~~~~~~~~~~~~~
+
+Keeps track of how often each locale is requested so that the catalogs
+of busy locales can be preloaded and the ones of cold locales dropped.
+
+:copyright: (c) 2013 by Armin Ronacher, Daniel Neuhäuser and contributors.
+:license: BSD, see LICENSE for more details.
+"""
+
+import json
+import os
+import time
+import typing as t
+
+PROFILE_VERSION = 1
+
+
+class LocaleUsage(object):
+    """Counts the requests per locale.  Locales are ranked by their request
+    count, which loses half of its weight every ``half_life`` seconds since
+    the locale was last requested, so both frequency and recency count.
+
+    :param half_life: The half life of a request count in seconds.
+    """
+
+    def __init__(self, half_life: float = 86400.0):
+        self.half_life = half_life
+        self.counts: dict[str, int] = {}
+        self.last_seen: dict[str, float] = {}
+
+    def record(self, locale: str):
+        """Records a request for ``locale``."""
+        self.counts[locale] = self.counts.get(locale, 0) + 1
+        self.last_seen[locale] = time.time()
+
+    def score(self, locale: str, now: float | None = None) -> float:
+        """Returns the score of ``locale``, higher is hotter."""
+        if now is None:
+            now = time.time()
+        age = max(0.0, now - self.last_seen.get(locale, now))
+        return self.counts.get(locale, 0) * 0.5 ** (age / self.half_life)
+
+    def ranking(self) -> list[str]:
+        """Returns all known locales, the hottest first."""
+        now = time.time()
+        return sorted(self.counts, key=lambda locale: -self.score(locale, now))
+
+    def top(self, n: int) -> list[str]:
+        """Returns the ``n`` hottest locales."""
+        return self.ranking()[:n]
+
+    def profile(self) -> list[dict[str, t.Any]]:
+        """Returns a list with the ``locale``, ``count``, ``last_seen`` and
+        ``score`` of every known locale, the hottest first.
+        """
+        now = time.time()
+        return [
+            {
+                "locale": locale,
+                "count": self.counts[locale],
+                "last_seen": self.last_seen[locale],
+                "score": self.score(locale, now),
+            }
+            for locale in self.ranking()
+        ]
+
+    def load(self, filename: str) -> bool:
+        """Adds the counts of a saved profile.  Returns ``False`` if there
+        is no (valid) profile.
+        """
+        try:
+            with open(filename, "r", encoding="utf-8") as fp:
+                data = json.load(fp)
+        except (OSError, ValueError):
+            return False
+        if not isinstance(data, dict) or data.get("version") != PROFILE_VERSION:
+            return False
+
+        for locale, entry in data.get("locales", {}).items():
+            self.counts[locale] = self.counts.get(locale, 0) + int(entry["count"])
+            self.last_seen[locale] = max(
+                self.last_seen.get(locale, 0.0), float(entry["last_seen"])
+            )
+        return True
+
+    def save(self, filename: str):
+        """Writes the profile to ``filename``."""
+        data = {
+            "version": PROFILE_VERSION,
+            "locales": {
+                locale: {"count": count, "last_seen": self.last_seen[locale]}
+                for locale, count in self.counts.items()
+            },
+        }
+        # several processes may save the profile at the same time
+        tmp = "%s.%d.tmp" % (filename, os.getpid())
+        with open(tmp, "w", encoding="utf-8") as fp:
+            json.dump(data, fp, indent=2, sort_keys=True)
+        os.replace(tmp, filename)
@@ -10,20 +10,36 @@ while working with Babel.
 :license: BSD, see LICENSE for more details.
 """
 
+import math
+import re
 import typing as t
+import unicodedata
 from contextlib import contextmanager
 from datetime import date, datetime, time, timedelta, timezone
-from decimal import Decimal
+from decimal import Decimal, InvalidOperation
+from time import perf_counter
 from types import SimpleNamespace
 from zoneinfo import ZoneInfo
 
-from babel import Locale, dates, numbers
+from babel import Locale
 from flask import Flask, current_app, g
 
+from . import metrics
+from .cache import LRUCache
+from .timing import timed
+
+# babel.dates and babel.numbers are imported on first use, they are not
+# needed by applications that only translate messages.
 if t.TYPE_CHECKING:
+    from babel import numbers
+
     from .constants import DateFormat, DateFormatKey
     from .core import _BabelState
 
+_missing = object()
+
+T = t.TypeVar("T")
+
 
 @t.overload
 def get_state(app: Flask | None = None) -> "_BabelState": ...
@@ -58,6 +74,18 @@ def get_state(app: Flask | None = None, silent: bool = False) -> "_BabelState |
     return app.extensions["babel"]
 
 
+def _call_selector(name: str, func: t.Callable[[], T]) -> T:
+    """Calls a selector function and reports how long it took."""
+    hook = metrics.hook
+    if hook is None:
+        return func()
+    start = perf_counter()
+    try:
+        return func()
+    finally:
+        hook.observe("selector_seconds", perf_counter() - start, selector=name)
+
+
 def get_locale() -> Locale | None:
     """Returns the locale that should be used for this request as
     `babel.Locale` object.  This returns `None` if used outside of
@@ -69,24 +97,26 @@ def get_locale() -> Locale | None:
         return None
 
     locale = getattr(ctx, "babel_locale", None)
-    state = get_state()
     # no locale found on current request context
     if locale is None:
-        if state.babel.locale_selector_func is not None:
-            f_locale = state.babel.locale_selector_func()
-            if f_locale is None:
-                locale = state.babel.default_locale
-            else:
-                locale = state.babel.load_locale(f_locale)
-        else:
-            locale = state.babel.default_locale
-
+        state = get_state()
+        locale = _select_locale(state)
         # set the locale for the current request
         ctx.babel_locale = locale
+        state.record_locale(locale)
 
     return locale
 
 
+@timed("locale")
+def _select_locale(state: "_BabelState") -> Locale:
+    if state.babel.locale_selector_func is not None:
+        f_locale = _call_selector("locale", state.babel.locale_selector_func)
+        if f_locale is not None:
+            return state.babel.load_locale(f_locale)
+    return state.babel.default_locale
+
+
 def get_timezone() -> ZoneInfo | None:
     """Returns the timezone that should be used for this request as
     `pytz.timezone` object.  This returns `None` if used outside of
@@ -98,20 +128,20 @@ def get_timezone() -> ZoneInfo | None:
         return None
 
     tzinfo = getattr(ctx, "babel_tzinfo", None)
-    state = get_state()
     if tzinfo is None:
-        if state.babel.timezone_selector_func is not None:
-            rv = state.babel.timezone_selector_func()
-            if rv is None:
-                tzinfo = state.babel.default_timezone
-            else:
-                tzinfo = ZoneInfo(rv)
-        else:
-            tzinfo = state.babel.default_timezone
-        ctx.babel_tzinfo = tzinfo
+        tzinfo = ctx.babel_tzinfo = _select_timezone(get_state())
     return tzinfo
 
 
+@timed("timezone")
+def _select_timezone(state: "_BabelState") -> ZoneInfo:
+    if state.babel.timezone_selector_func is not None:
+        rv = _call_selector("timezone", state.babel.timezone_selector_func)
+        if rv is not None:
+            return ZoneInfo(rv)
+    return state.babel.default_timezone
+
+
 def refresh():
     """Refreshes the cached timezones and locale information.  This can
     be used to switch a translation between a request and if you want
@@ -173,17 +203,15 @@ def _get_format(
     format: "DateFormat" = None,
 ):
     """A small helper for the datetime formatting functions.  Looks up
-    format defaults for different kinds.
+    format defaults for different kinds in :attr:`Babel.date_format_table`.
     """
-    state = get_state()
-    if format is None:
-        format = state.babel.date_formats[key]
-
-    if format in ("short", "medium", "full", "long"):
-        rv = state.babel.date_formats["%s.%s" % (key, format)]  # pyright: ignore
-        if rv is not None:
-            format = rv
-    return format
+    table = get_state().babel.date_format_table
+    rv = table.get((key, format), _missing)
+    if rv is _missing:
+        if format is None:
+            raise KeyError(key)
+        return format
+    return rv
 
 
 def to_user_timezone(datetime: datetime):
@@ -207,6 +235,7 @@ def to_utc(datetime: datetime):
     return datetime.replace(tzinfo=None)
 
 
+@timed("format")
 def format_datetime(
     datetime: datetime | None = None,
     format: "DateFormat" = None,
@@ -227,10 +256,16 @@ def format_datetime(
     This function is also available in the template context as filter
     named `datetimeformat`.
     """
+    from babel import dates
+
+    if metrics.hook is not None:
+        metrics.hook.increment("formatter_calls", formatter="datetime")
+
     format = _get_format("datetime", format)
     return _date_format(dates.format_datetime, datetime, format, rebase)
 
 
+@timed("format")
 def format_date(
     date: datetime | date | None = None,
     format: "DateFormat" = None,
@@ -251,12 +286,18 @@ def format_date(
     This function is also available in the template context as filter
     named `dateformat`.
     """
+    from babel import dates
+
+    if metrics.hook is not None:
+        metrics.hook.increment("formatter_calls", formatter="date")
+
     if rebase and isinstance(date, datetime):
         date = to_user_timezone(date)
     format = _get_format("date", format)
     return _date_format(dates.format_date, date, format, rebase)
 
 
+@timed("format")
 def format_time(
     time: datetime | None = None,
     format: "DateFormat" = None,
@@ -277,10 +318,16 @@ def format_time(
     This function is also available in the template context as filter
     named `timeformat`.
     """
+    from babel import dates
+
+    if metrics.hook is not None:
+        metrics.hook.increment("formatter_calls", formatter="time")
+
     format = _get_format("time", format)
     return _date_format(dates.format_time, time, format, rebase)
 
 
+@timed("format")
 def format_timedelta(
     datetime_or_timedelta: datetime | timedelta,
     granularity: t.Literal[
@@ -294,6 +341,11 @@ def format_timedelta(
     This function is also available in the template context as filter
     named `timedeltaformat`.
     """
+    from babel import dates
+
+    if metrics.hook is not None:
+        metrics.hook.increment("formatter_calls", formatter="timedelta")
+
     if isinstance(datetime_or_timedelta, datetime):
         datetime_or_timedelta = datetime.now(timezone.utc) - datetime_or_timedelta
 
@@ -306,14 +358,129 @@ def format_timedelta(
     )
 
 
+#: rendered relative times keyed by locale, format, unit, value and direction
+_relative_time_cache: LRUCache[tuple[t.Any, ...], str] = LRUCache(
+    4096, name="relative_time"
+)
+
+
+def _get_now() -> datetime:
+    """Returns the current time in UTC.  It is sampled once per request so
+    that all the relative times of a page are relative to the same time.
+    """
+    ctx = _get_current_context()
+    if ctx is None:
+        return datetime.now(timezone.utc)
+    now = getattr(ctx, "babel_now", None)
+    if now is None:
+        now = ctx.babel_now = datetime.now(timezone.utc)
+    return now
+
+
+def _relative_time_formatter(
+    granularity: str,
+    add_direction: bool,
+    threshold: float,
+    format: t.Literal["narrow", "short", "long"],
+) -> t.Callable[[datetime | timedelta, datetime], str]:
+    from babel import dates
+
+    locale = get_locale()
+    name = str(locale)
+
+    def format_one(value: datetime | timedelta, now: datetime) -> str:
+        if isinstance(value, datetime):
+            if value.tzinfo is None:
+                value = value.replace(tzinfo=timezone.utc)
+            value = value - now
+        seconds = value.days * 86400 + value.seconds
+
+        # the same rounding as babel.dates.format_timedelta, the rendered
+        # string only depends on the unit and the rounded value
+        for unit, secs_per_unit in dates.TIMEDELTA_UNITS:
+            amount = abs(seconds) / secs_per_unit
+            if amount >= threshold or unit == granularity:
+                if unit == granularity and amount > 0:
+                    amount = max(1, amount)
+                amount = int(round(amount))
+                break
+        else:
+            return ""
+
+        direction = (seconds >= 0) if add_direction else None
+        key = (name, format, unit, amount, direction)
+        rv = _relative_time_cache.get(key)
+        if rv is None:
+            delta = timedelta(seconds=amount * secs_per_unit)
+            rv = dates.format_timedelta(
+                delta if seconds >= 0 else -delta,
+                unit,  # pyright: ignore
+                threshold=float("inf"),
+                add_direction=add_direction,
+                format=format,
+                locale=locale,
+            )
+            _relative_time_cache[key] = rv
+        return rv
+
+    return format_one
+
+
+@timed("format")
+def format_relative_time(
+    datetime_or_timedelta: datetime | timedelta,
+    granularity: t.Literal[
+        "year", "month", "week", "day", "hour", "minute", "second"
+    ] = "second",
+    add_direction: bool = True,
+    threshold: float = 0.85,
+    format: t.Literal["narrow", "short", "long"] = "long",
+):
+    """Formats the time from now to a datetime (e.g. ``"3 minutes ago"``)
+    or a timedelta (e.g. ``"in 2 days"``).  Unlike :func:`format_timedelta`
+    the current time is only sampled once per request and the rendered
+    strings are cached, as they only depend on the locale and the rounded
+    value.
+
+    This function is also available in the template context as filter
+    named `relativetimeformat`.
+    """
+    if metrics.hook is not None:
+        metrics.hook.increment("formatter_calls", formatter="relative_time")
+    formatter = _relative_time_formatter(granularity, add_direction, threshold, format)
+    return formatter(datetime_or_timedelta, _get_now())
+
+
+@timed("format")
+def format_relative_times(
+    values: t.Iterable[datetime | timedelta],
+    granularity: t.Literal[
+        "year", "month", "week", "day", "hour", "minute", "second"
+    ] = "second",
+    add_direction: bool = True,
+    threshold: float = 0.85,
+    format: t.Literal["narrow", "short", "long"] = "long",
+) -> list[str]:
+    """Like :func:`format_relative_time` but formats many values at once,
+    e.g. the timestamps of a feed.
+    """
+    if metrics.hook is not None:
+        metrics.hook.increment("formatter_calls", formatter="relative_times")
+    formatter = _relative_time_formatter(granularity, add_direction, threshold, format)
+    now = _get_now()
+    return [formatter(value, now) for value in values]
+
+
 def _date_format(
     formatter: t.Callable[..., str],
     obj: datetime | date | time | None,
-    format: str | numbers.NumberPattern | None,
+    format: "str | numbers.NumberPattern | None",
     rebase: bool | None,
     **extra: t.Any,
 ):
     """Internal helper that formats the date."""
+    from babel import dates
+
     locale = get_locale()
     extra = {}
     if formatter is not dates.format_date and rebase:
@@ -321,6 +488,7 @@ def _date_format(
     return formatter(obj, format, locale=locale, **extra)
 
 
+@timed("format")
 def format_number(number: float | Decimal | str):
     """Return the given number formatted for the locale in request
 
@@ -328,13 +496,19 @@ def format_number(number: float | Decimal | str):
     :return: the formatted number
     :rtype: unicode
     """
+    from babel import numbers
+
+    if metrics.hook is not None:
+        metrics.hook.increment("formatter_calls", formatter="number")
+
     locale = get_locale()
     return numbers.format_decimal(number, locale=locale)
 
 
+@timed("format")
 def format_decimal(
     number: float | Decimal | str,
-    format: str | numbers.NumberPattern | None = None,
+    format: "str | numbers.NumberPattern | None" = None,
 ):
     """Return the given decimal number formatted for the locale in request
 
@@ -343,14 +517,20 @@ def format_decimal(
     :return: the formatted number
     :rtype: unicode
     """
+    from babel import numbers
+
+    if metrics.hook is not None:
+        metrics.hook.increment("formatter_calls", formatter="decimal")
+
     locale = get_locale()
     return numbers.format_decimal(number, format=format, locale=locale)
 
 
+@timed("format")
 def format_currency(
     number: float | Decimal | str,
     currency: str,
-    format: str | numbers.NumberPattern | None = None,
+    format: "str | numbers.NumberPattern | None" = None,
     currency_digits: bool = True,
     format_type: t.Literal["name", "standard", "accounting"] = "standard",
 ):
@@ -365,6 +545,11 @@ def format_currency(
     :return: the formatted number
     :rtype: unicode
     """
+    from babel import numbers
+
+    if metrics.hook is not None:
+        metrics.hook.increment("formatter_calls", formatter="currency")
+
     locale = get_locale()
     return numbers.format_currency(
         number,
@@ -376,6 +561,7 @@ def format_currency(
     )
 
 
+@timed("format")
 def format_percent(number: float | Decimal | str, format: str | None = None):
     """Return formatted percent value for the locale in request
 
@@ -384,10 +570,16 @@ def format_percent(number: float | Decimal | str, format: str | None = None):
     :return: the formatted percent number
     :rtype: unicode
     """
+    from babel import numbers
+
+    if metrics.hook is not None:
+        metrics.hook.increment("formatter_calls", formatter="percent")
+
     locale = get_locale()
     return numbers.format_percent(number, format=format, locale=locale)
 
 
+@timed("format")
 def format_scientific(number: float | Decimal | str, format: str | None = None):
     """Return value formatted in scientific notation for the locale in request
 
@@ -396,10 +588,579 @@ def format_scientific(number: float | Decimal | str, format: str | None = None):
     :return: the formatted percent number
     :rtype: unicode
     """
+    from babel import numbers
+
+    if metrics.hook is not None:
+        metrics.hook.increment("formatter_calls", formatter="scientific")
+
     locale = get_locale()
     return numbers.format_scientific(number, format=format, locale=locale)
 
 
+#: list patterns keyed by locale and style, unit patterns keyed by locale,
+#: unit and length and parsed number patterns keyed by pattern
+_list_patterns: LRUCache[tuple[str, str], dict[str, str] | None] = LRUCache(
+    256, name="list_pattern"
+)
+_unit_patterns: LRUCache[tuple[str, str, str], dict[str, str] | None] = LRUCache(
+    1024, name="unit_pattern"
+)
+_number_patterns: LRUCache[str, "numbers.NumberPattern"] = LRUCache(
+    1024, name="number_pattern"
+)
+
+
+def _get_numeric_locale() -> Locale:
+    """Returns the locale in request or, like Babel, the default locale for
+    numbers of the environment.
+    """
+    locale = get_locale()
+    if locale is None:
+        from babel import numbers
+
+        locale = Locale.parse(numbers.LC_NUMERIC)
+    return locale
+
+
+def _list_formatter(style: str) -> t.Callable[[t.Sequence[t.Any]], str]:
+    from babel import lists
+
+    locale = _get_numeric_locale()
+    key = (str(locale), style)
+    patterns = _list_patterns.get(key, _missing)
+    if patterns is _missing:
+        patterns = _list_patterns[key] = locale.list_patterns.get(style)
+
+    def format_one(items: t.Sequence[t.Any]) -> str:
+        items = [str(item) for item in items]
+        if patterns is None:
+            # unknown style, let Babel fall back or complain
+            return lists.format_list(items, style, locale)
+        if not items:
+            return ""
+        if len(items) == 1:
+            return items[0]
+        if len(items) == 2 and "2" in patterns:
+            return patterns["2"].format(*items)
+        rv = patterns["start"].format(items[0], items[1])
+        for item in items[2:-1]:
+            rv = patterns["middle"].format(rv, item)
+        return patterns["end"].format(rv, items[-1])
+
+    return format_one
+
+
+@timed("format")
+def format_list(
+    items: t.Sequence[t.Any],
+    style: t.Literal[
+        "standard",
+        "standard-short",
+        "or",
+        "or-short",
+        "unit",
+        "unit-short",
+        "unit-narrow",
+    ] = "standard",
+):
+    """Return the items (strings or lazy strings) joined for the locale
+    in request, e.g. ``"A, B and C"``.
+
+    :param items: the items to join
+    :param style: the list style, e.g. ``"or"`` for ``"A, B or C"``
+
+    This function is also available in the template context as filter
+    named `listformat`.
+    """
+    if metrics.hook is not None:
+        metrics.hook.increment("formatter_calls", formatter="list")
+    return _list_formatter(style)(items)
+
+
+@timed("format")
+def format_lists(
+    lists: t.Iterable[t.Sequence[t.Any]], style: str = "standard"
+) -> list[str]:
+    """Like :func:`format_list` but formats many lists at once."""
+    if metrics.hook is not None:
+        metrics.hook.increment("formatter_calls", formatter="lists")
+    format_one = _list_formatter(style)
+    return [format_one(items) for items in lists]
+
+
+def _babel_private(module: t.Any, name: str) -> t.Any:
+    """Returns a private helper of Babel or ``None`` if this version of
+    Babel does not have it.  The cached formatters use the helpers Babel
+    2.12 and newer have and fall back to the public functions without them.
+    """
+    return getattr(module, name, None)
+
+
+def _unit_formatter(
+    measurement_unit: str,
+    length: t.Literal["short", "long", "narrow"],
+    format: str | None,
+) -> t.Callable[[float | Decimal | str], str]:
+    from babel import numbers, units
+
+    locale = _get_numeric_locale()
+    key = (str(locale), measurement_unit, length)
+    patterns = _unit_patterns.get(key, _missing)
+    if patterns is _missing:
+        patterns = None
+        # without the helper every value goes through format_unit
+        find_unit_pattern = _babel_private(units, "_find_unit_pattern")
+        if find_unit_pattern is not None:
+            unit = find_unit_pattern(measurement_unit, locale=locale)
+            if unit:
+                unit_patterns = locale._data.get("unit_patterns", {})
+                patterns = unit_patterns.get(unit, {}).get(length, {})
+        _unit_patterns[key] = patterns
+
+    def format_one(value: float | Decimal | str) -> str:
+        if patterns is None:
+            # raises an error for unknown units
+            return units.format_unit(value, measurement_unit, length, format, locale)
+        if isinstance(value, str):
+            # a preformatted singular like in Babel
+            formatted, plural_form = value, "one"
+        else:
+            formatted = numbers.format_decimal(value, format, locale)
+            plural_form = locale.plural_form(value)
+        pattern = patterns.get(plural_form)
+        if pattern is None:
+            return units.format_unit(value, measurement_unit, length, format, locale)
+        return pattern.format(formatted)
+
+    return format_one
+
+
+@timed("format")
+def format_unit(
+    value: float | Decimal | str,
+    measurement_unit: str,
+    length: t.Literal["short", "long", "narrow"] = "long",
+    format: str | None = None,
+):
+    """Return the value with a unit (e.g. ``"5 kilometers"`` for
+    ``format_unit(5, "length-kilometer")``) for the locale in request.
+
+    :param value: the value to format
+    :param measurement_unit: the unit, e.g. ``"length-kilometer"`` or
+                             ``"kilometer"``
+    :param length: ``"short"``, ``"long"`` or ``"narrow"``
+    :param format: the number format to use
+
+    This function is also available in the template context as filter
+    named `unitformat`.
+    """
+    if metrics.hook is not None:
+        metrics.hook.increment("formatter_calls", formatter="unit")
+    return _unit_formatter(measurement_unit, length, format)(value)
+
+
+@timed("format")
+def format_units(
+    values: t.Iterable[float | Decimal | str],
+    measurement_unit: str,
+    length: t.Literal["short", "long", "narrow"] = "long",
+    format: str | None = None,
+) -> list[str]:
+    """Like :func:`format_unit` but formats many values at once, e.g. a
+    column of a table.
+    """
+    if metrics.hook is not None:
+        metrics.hook.increment("formatter_calls", formatter="units")
+    format_one = _unit_formatter(measurement_unit, length, format)
+    return [format_one(value) for value in values]
+
+
+def _compact_decimal_formatter(
+    format_type: t.Literal["short", "long"], fraction_digits: int
+) -> t.Callable[[float | Decimal | str], str]:
+    from babel import numbers
+
+    locale = _get_numeric_locale()
+    get_compact_format = _babel_private(numbers, "_get_compact_format")
+    if get_compact_format is None:
+        return lambda number: numbers.format_compact_decimal(
+            number,
+            format_type=format_type,
+            fraction_digits=fraction_digits,
+            locale=locale,
+        )
+    compact_format = locale.compact_decimal_formats[format_type]
+    default = locale.decimal_formats[None]
+
+    def format_one(number: float | Decimal | str) -> str:
+        number, format = get_compact_format(
+            number, compact_format, locale, fraction_digits
+        )
+        if format is None:
+            pattern = default
+        else:
+            pattern = _number_patterns.get(format)
+            if pattern is None:
+                pattern = _number_patterns[format] = numbers.parse_pattern(format)
+        return pattern.apply(number, locale, decimal_quantization=False)
+
+    return format_one
+
+
+@timed("format")
+def format_compact_decimal(
+    number: float | Decimal | str,
+    format_type: t.Literal["short", "long"] = "short",
+    fraction_digits: int = 0,
+):
+    """Return the number in compact form (e.g. ``"1K"`` or ``"1 thousand"``)
+    for the locale in request.
+
+    :param number: the number to format
+    :param format_type: ``"short"`` or ``"long"``
+    :param fraction_digits: the number of fraction digits to show
+
+    This function is also available in the template context as filter
+    named `compactdecimalformat`.
+    """
+    if metrics.hook is not None:
+        metrics.hook.increment("formatter_calls", formatter="compact_decimal")
+    return _compact_decimal_formatter(format_type, fraction_digits)(number)
+
+
+@timed("format")
+def format_compact_decimals(
+    numbers: t.Iterable[float | Decimal | str],
+    format_type: t.Literal["short", "long"] = "short",
+    fraction_digits: int = 0,
+) -> list[str]:
+    """Like :func:`format_compact_decimal` but formats many numbers at
+    once, e.g. a column of a table.
+    """
+    if metrics.hook is not None:
+        metrics.hook.increment("formatter_calls", formatter="compact_decimals")
+    format_one = _compact_decimal_formatter(format_type, fraction_digits)
+    return [format_one(number) for number in numbers]
+
+
+#: the group and decimal symbol of each locale
+_number_symbols: dict[str, tuple[str, str]] = {}
+#: the positions of the fields of date and time patterns keyed by locale,
+#: kind and format
+_field_orders: dict[tuple[str, str, str], dict[str, int]] = {}
+_digits_re = re.compile(r"(\d+)")
+_iso_date_re = re.compile(r"^(\d{4})-?([01]\d)-?([0-3]\d)$", re.ASCII)
+
+
+def _get_number_symbols(locale: Locale | None) -> tuple[str, str]:
+    name = str(locale)
+    rv = _number_symbols.get(name)
+    if rv is None:
+        from babel import numbers
+
+        rv = _number_symbols[name] = (
+            numbers.get_group_symbol(locale),
+            numbers.get_decimal_symbol(locale),
+        )
+    return rv
+
+
+def _number_parser(locale: Locale | None, strict: bool) -> t.Callable[[str], Decimal]:
+    from babel import numbers
+
+    group_symbol, decimal_symbol = _get_number_symbols(locale)
+    group_is_space = group_symbol in numbers.SPACE_CHARS
+
+    def parse(string: str) -> Decimal:
+        if strict and group_symbol in string:
+            # needs to format the number to validate it
+            return numbers.parse_decimal(string, locale, strict=True)
+        if (
+            not strict
+            and group_is_space
+            and group_symbol not in string
+            and numbers.SPACE_CHARS_RE.search(string)
+        ):
+            string = numbers.SPACE_CHARS_RE.sub(group_symbol, string)
+        try:
+            return Decimal(
+                string.replace(group_symbol, "").replace(decimal_symbol, ".")
+            )
+        except InvalidOperation as exc:
+            raise numbers.NumberFormatError(
+                "{!r} is not a valid decimal number".format(string)
+            ) from exc
+
+    return parse
+
+
+def parse_decimal(string: str, strict: bool = False) -> Decimal:
+    """Parses a localized decimal number (e.g. ``"1.099,98"`` in German)
+    for the locale in request.  Raises a
+    :class:`babel.numbers.NumberFormatError` if the string is not a number.
+
+    :param string: the string to parse
+    :param strict: also reject numbers with misplaced group symbols
+    """
+    return _number_parser(get_locale(), strict)(string)
+
+
+def parse_decimals(strings: t.Iterable[str], strict: bool = False) -> list[Decimal]:
+    """Like :func:`parse_decimal` but parses many strings at once, e.g. a
+    column of a CSV file.
+    """
+    parse = _number_parser(get_locale(), strict)
+    return [parse(string) for string in strings]
+
+
+def _integer_parser(locale: Locale | None) -> t.Callable[[str], int]:
+    from babel import numbers
+
+    group_symbol = _get_number_symbols(locale)[0]
+    group_is_space = group_symbol in numbers.SPACE_CHARS
+
+    def parse(string: str) -> int:
+        if (
+            group_is_space
+            and group_symbol not in string
+            and numbers.SPACE_CHARS_RE.search(string)
+        ):
+            string = numbers.SPACE_CHARS_RE.sub(group_symbol, string)
+        try:
+            return int(string.replace(group_symbol, ""))
+        except ValueError as exc:
+            raise numbers.NumberFormatError(
+                "{!r} is not a valid number".format(string)
+            ) from exc
+
+    return parse
+
+
+def parse_number(string: str) -> int:
+    """Parses a localized integer (e.g. ``"1.099"`` in German) for the
+    locale in request.  Raises a :class:`babel.numbers.NumberFormatError`
+    if the string is not a number.
+    """
+    return _integer_parser(get_locale())(string)
+
+
+def parse_numbers(strings: t.Iterable[str]) -> list[int]:
+    """Like :func:`parse_number` but parses many strings at once."""
+    parse = _integer_parser(get_locale())
+    return [parse(string) for string in strings]
+
+
+def _get_field_order(
+    locale: Locale | None, kind: str, format: str, fields: str
+) -> dict[str, int]:
+    """Returns the order of the ``fields`` (e.g. ``"ymd"``) in the pattern
+    of ``format``.
+    """
+    key = (str(locale), kind, format)
+    rv = _field_orders.get(key)
+    if rv is not None:
+        return rv
+
+    from babel import dates
+
+    if format in ("short", "medium", "long", "full"):
+        getter = dates.get_date_format if kind == "date" else dates.get_time_format
+        pattern = getter(format, locale=locale).pattern.lower()  # pyright: ignore
+    else:
+        pattern = dates.parse_pattern(format).pattern.lower()
+
+    positions: list[tuple[float, str]] = []
+    for field in fields:
+        alternatives = {"m": "ml" if kind == "date" else "m", "h": "hk"}
+        for char in alternatives.get(field, field):
+            idx = pattern.find(char)
+            if idx >= 0:
+                positions.append((idx, field))
+                break
+        else:
+            if field != "s":
+                raise ValueError("{!r} has no {!r} field".format(pattern, field))
+            # the seconds are optional
+            positions.append((math.inf, field))
+    rv = {field: idx for idx, (_, field) in enumerate(sorted(positions))}
+    rv["pm"] = int("a" in pattern)
+    _field_orders[key] = rv
+    return rv
+
+
+def _date_parser(
+    locale: Locale | None, format: "DateFormat"
+) -> t.Callable[[str], date]:
+    from babel import dates
+
+    format = _get_format("date", format)
+    predefined = format in ("short", "medium", "long", "full")
+    order = _get_field_order(locale, "date", format, "ymd")  # pyright: ignore
+
+    def parse(string: str) -> date:
+        numbers = _digits_re.findall(string)
+        if not numbers:
+            raise dates.ParseError("No numbers were found in input")
+        if predefined:
+            # ISO 8601 dates are accepted as well
+            iso = _iso_date_re.match(string)
+            if iso is not None:
+                try:
+                    return date(*map(int, iso.groups()))
+                except ValueError:
+                    pass
+
+        year = numbers[order["y"]]
+        year = 2000 + int(year) if len(year) == 2 else int(year)
+        month = int(numbers[order["m"]])
+        day = int(numbers[order["d"]])
+        if month > 12:
+            month, day = day, month
+        return date(year, month, day)
+
+    return parse
+
+
+def parse_date(string: str, format: "DateFormat" = None) -> date:
+    """Parses a date entered in the format of the locale in request.  The
+    format is resolved like in :func:`format_date`.  Raises a
+    :class:`babel.dates.ParseError` if there are no numbers in the string.
+    """
+    return _date_parser(get_locale(), format)(string)
+
+
+def parse_dates(strings: t.Iterable[str], format: "DateFormat" = None) -> list[date]:
+    """Like :func:`parse_date` but parses many strings at once."""
+    parse = _date_parser(get_locale(), format)
+    return [parse(string) for string in strings]
+
+
+def _time_parser(
+    locale: Locale | None, format: "DateFormat"
+) -> t.Callable[[str], time]:
+    from babel import dates
+
+    format = _get_format("time", format)
+    order = _get_field_order(locale, "time", format, "hms")  # pyright: ignore
+    has_period = order["pm"]
+
+    def parse(string: str) -> time:
+        numbers = _digits_re.findall(string)
+        if not numbers:
+            raise dates.ParseError("No numbers were found in input")
+        hour_offset = 12 if has_period and "pm" in string.lower() else 0
+        minute = second = 0
+        hour = int(numbers[order["h"]]) + hour_offset
+        if len(numbers) > 1:
+            minute = int(numbers[order["m"]])
+            if len(numbers) > 2:
+                second = int(numbers[order["s"]])
+        return time(hour, minute, second)
+
+    return parse
+
+
+def parse_time(string: str, format: "DateFormat" = None) -> time:
+    """Parses a time entered in the format of the locale in request.  The
+    format is resolved like in :func:`format_time`.  Raises a
+    :class:`babel.dates.ParseError` if there are no numbers in the string.
+    """
+    return _time_parser(get_locale(), format)(string)
+
+
+def parse_times(strings: t.Iterable[str], format: "DateFormat" = None) -> list[time]:
+    """Like :func:`parse_time` but parses many strings at once."""
+    parse = _time_parser(get_locale(), format)
+    return [parse(string) for string in strings]
+
+
+#: collation keys keyed by locale and string
+_sort_key_cache: LRUCache[tuple[str, str], t.Any] = LRUCache(16384, name="sort_key")
+_collators: dict[str, t.Any] = {}
+
+
+def _fallback_sort_key(string: str) -> tuple[str, str, str]:
+    # ignore accents and case first, then accents, then case (lower first)
+    decomposed = unicodedata.normalize("NFKD", string)
+    base = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return (base.casefold(), decomposed.casefold(), string.swapcase())
+
+
+def _get_sort_key_func(locale: Locale | None) -> t.Callable[[str], t.Any]:
+    if locale is None:
+        # no request, nothing to collate by
+        return str
+    name = str(locale)
+    collator = _collators.get(name, _missing)
+    if collator is _missing:
+        try:
+            import icu  # pyright: ignore
+        except ImportError:
+            collator = None
+        else:
+            collator = icu.Collator.createInstance(icu.Locale(name))
+        _collators[name] = collator
+    if collator is None:
+        return _fallback_sort_key
+    return collator.getSortKey
+
+
+def sort_keys(strings: t.Iterable[t.Any]) -> list[t.Any]:
+    """Returns the collation keys of ``strings`` for the locale in request.
+    Each string (or :class:`~flask_babelplus.speaklater.LazyString`) is
+    converted to a string once and the keys are cached.
+
+    The collation rules of the locale are only used if `PyICU`_ is
+    installed.  Otherwise strings are compared ignoring accents and case
+    first, which is correct for most Latin scripts.  Outside of a request
+    the strings themselves are the keys.
+
+    .. _PyICU: https://pypi.org/project/PyICU/
+    """
+    locale = get_locale()
+    name = str(locale)
+    func = _get_sort_key_func(locale)
+    rv: list[t.Any] = []
+    for string in strings:
+        string = str(string)
+        key = _sort_key_cache.get((name, string), _missing)
+        if key is _missing:
+            key = _sort_key_cache[name, string] = func(string)
+        rv.append(key)
+    return rv
+
+
+def sort_key(string: t.Any) -> t.Any:
+    """Returns the collation key of ``string`` for the locale in request.
+    It can be used as the ``key`` of :func:`sorted`, but
+    :func:`sorted_localized` is faster for many items.
+    """
+    return sort_keys((string,))[0]
+
+
+def sorted_localized(
+    iterable: t.Iterable[T],
+    key: t.Callable[[T], t.Any] | None = None,
+    reverse: bool = False,
+) -> list[T]:
+    """Sorts the items according to the locale in request, e.g. a list of
+    country names or the choices of a form::
+
+        choices = sorted_localized(choices, key=lambda choice: choice[1])
+
+    :param iterable: The items.
+    :param key: A function that returns the label of an item, which can be
+                a :class:`~flask_babelplus.speaklater.LazyString`.
+                Defaults to the item itself.
+    :param reverse: Sort in descending order.
+    """
+    items = list(iterable)
+    labels = items if key is None else [key(item) for item in items]
+    keys = sort_keys(labels)
+    order = sorted(range(len(items)), key=keys.__getitem__, reverse=reverse)
+    return [items[i] for i in order]
+
+
 def _get_current_context() -> SimpleNamespace | None:
     if not g:
         return None
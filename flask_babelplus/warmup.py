@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+"""
+flask_babelplus.warmup
+~~~~~~~~~~~~~~~~~~~~~~
+
+Loads catalogs, locales, patterns and timezones before the first request
+is served, e.g. from the ``post_fork`` hook of gunicorn::
+
+    def post_fork(server, worker):
+        from flask_babelplus.warmup import warmup
+        from myapp import app
+
+        warmup(app)
+
+:copyright: (c) 2013 by Armin Ronacher, Daniel Neuhäuser and contributors.
+:license: BSD, see LICENSE for more details.
+"""
+
+import time
+import tracemalloc
+import typing as t
+from collections.abc import Iterable
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+from babel import Locale, dates, numbers
+from flask import Flask, current_app
+
+from .utils import get_state
+
+if t.TYPE_CHECKING:
+    from .core import Babel
+
+#: a sample datetime the date and time patterns are primed with
+_SAMPLE_DATETIME = datetime(2000, 12, 31, 23, 59, 59)
+
+
+class WarmupItem(t.NamedTuple):
+    #: ``"catalog"``, ``"locale"``, ``"dates"``, ``"numbers"`` or
+    #: ``"timezone"``
+    kind: str
+    #: e.g. the domain and locale of a catalog
+    name: str
+    #: the time it took in seconds
+    duration: float
+    #: the memory allocated in bytes or ``None`` if not traced
+    memory: int | None
+
+
+class _Timer(object):
+    def __init__(self, trace_memory: bool):
+        self.trace_memory = trace_memory
+        self.items: list[WarmupItem] = []
+
+    def run(self, kind: str, name: str, func: t.Callable[[], t.Any]):
+        if self.trace_memory:
+            before = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        func()
+        duration = time.perf_counter() - start
+        memory = None
+        if self.trace_memory:
+            memory = tracemalloc.get_traced_memory()[0] - before
+        self.items.append(WarmupItem(kind, name, duration, memory))
+
+
+def _prime_dates(babel: "Babel", locale: Locale):
+    for key in ("date", "time", "datetime"):
+        func = getattr(dates, "format_" + key)
+        for width in ("short", "medium", "long", "full"):
+            format = babel.date_formats.get("%s.%s" % (key, width)) or width
+            func(_SAMPLE_DATETIME, format, locale=locale)
+        if babel.date_formats[key] not in ("short", "medium", "long", "full"):
+            func(_SAMPLE_DATETIME, babel.date_formats[key], locale=locale)
+
+
+def _prime_numbers(locale: Locale):
+    numbers.format_decimal(1234.5, locale=locale)
+    numbers.format_percent(0.5, locale=locale)
+    numbers.format_scientific(1234.5, locale=locale)
+    numbers.format_compact_decimal(1234.5, locale=locale)
+    numbers.format_currency(1234.5, "USD", locale=locale)
+
+
+def warmup(
+    app: Flask | None = None,
+    timezones: Iterable[str] = (),
+    trace_memory: bool = False,
+) -> list[WarmupItem]:
+    """Loads the catalogs of all domains for all locales, parses the
+    locales, primes the date patterns of :attr:`Babel.date_formats` and the
+    number patterns of each locale and loads the default timezone as well
+    as ``timezones``.  Returns how long each item took and, with
+    ``trace_memory``, how much memory it allocated.
+
+    :param app: The application.  Defaults to the current application.
+    :param timezones: Additional timezones to load.
+    :param trace_memory: Trace the allocated memory.  This makes the
+                         warmup itself several times slower, so it is
+                         off by default.
+    """
+    if app is None:
+        app = current_app._get_current_object()  # pyright: ignore
+    state = get_state(app)
+    timer = _Timer(trace_memory)
+    tracing = trace_memory and not tracemalloc.is_tracing()
+    if tracing:
+        tracemalloc.start()
+
+    try:
+        with app.app_context():
+            locales = {str(state.babel.default_locale)}
+            for domain in state.domains():
+                for locale, _ in domain.list_catalogs(app):
+                    locales.add(locale)
+                    timer.run(
+                        "catalog",
+                        "%s [%s]" % (domain.domain, locale),
+                        lambda: domain.get_translations_for(locale, app),
+                    )
+
+            for name in sorted(locales):
+                timer.run("locale", name, lambda: state.babel.load_locale(name))
+                locale = state.babel.load_locale(name)
+                timer.run("dates", name, lambda: _prime_dates(state.babel, locale))
+                timer.run("numbers", name, lambda: _prime_numbers(locale))
+
+            for name in [app.config["BABEL_DEFAULT_TIMEZONE"], *timezones]:
+                timer.run("timezone", name, lambda: ZoneInfo(name))
+    finally:
+        if tracing:
+            tracemalloc.stop()
+    return timer.items
+
+
+def format_report(items: list[WarmupItem]) -> str:
+    """Formats the result of :func:`warmup` as a table."""
+    lines: list[str] = []
+    for item in items:
+        memory = "" if item.memory is None else "%10.1f KiB" % (item.memory / 1024)
+        lines.append(
+            "{:<10} {:<32} {:>10.3f}ms {}".format(
+                item.kind, item.name, item.duration * 1000, memory
+            ).rstrip()
+        )
+    total = sum(item.duration for item in items)
+    lines.append("{:<43} {:>10.3f}ms".format("total", total * 1000))
+    return "\n".join(lines)
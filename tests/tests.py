@@ -1,26 +1,116 @@
 # -*- coding: utf-8 -*-
 from __future__ import with_statement
 
+import gc
+import gzip
+import inspect
+import io
+import json
+import os
+import shutil
+import struct
+import subprocess
+import sys
+import tempfile
+import time
 import unittest
-from datetime import UTC, datetime, timedelta
+import weakref
+from datetime import UTC, date, datetime, timedelta
+from datetime import time as dt_time
 from decimal import Decimal
+from gettext import c2py
+from unittest import mock
 from zoneinfo import ZoneInfo
 
 import flask
 import pytest
-from babel import Locale, support
+from babel import Locale, dates, lists, numbers, support, units
+from babel.messages.mofile import write_mo
+from babel.messages.pofile import read_po
 
 import flask_babelplus as babel_ext
 from flask_babelplus import (
     gettext,
+    interpolation,
     lazy_gettext,
     lazy_ngettext,
     lazy_pgettext,
     ngettext,
     npgettext,
     pgettext,
+    plurals,
 )
-from flask_babelplus.utils import _get_format, get_state
+from flask_babelplus.backends import SQLiteBackend, catalog_registry
+from flask_babelplus.cache import LRUCache
+from flask_babelplus.caching import i18n_cache_key, set_i18n_headers
+from flask_babelplus.compiler import compile_catalogs
+from flask_babelplus.extractor import extract_messages
+from flask_babelplus.jsoncatalog import JSONCatalog, catalog_to_json
+from flask_babelplus.jsonprovider import LazyStringJSONProvider
+from flask_babelplus.metrics import InMemoryMetrics, set_hook
+from flask_babelplus.mofile import (
+    MappedTranslations,
+    PartitionedTranslations,
+    hashpjw,
+)
+from flask_babelplus.signals import request_timed
+from flask_babelplus.snapshot import load_snapshot, snapshot_path, write_snapshot
+from flask_babelplus.speaklater import LazyString
+from flask_babelplus.tracking import MessageTracker, set_tracker
+from flask_babelplus.usage import LocaleUsage
+from flask_babelplus.utils import _get_format, _get_now, get_state
+from flask_babelplus.warmup import warmup
+
+TRANSLATIONS_DIR = os.path.join(os.path.dirname(__file__), "translations")
+
+
+def write_mo_with_hash_table(fileobj, messages):
+    """Writes a ``.mo`` file for ``messages`` (a list of ``(msgid, msgstr)``
+    byte pairs) including a GNU hash table like ``msgfmt`` does.
+    """
+    messages = sorted(messages)
+    count = len(messages)
+    hash_size = 7
+    table = [0] * hash_size
+    for i, (msgid, _) in enumerate(messages):
+        value = hashpjw(msgid.split(b"\x00")[0])
+        idx = value % hash_size
+        incr = 1 + (value % (hash_size - 2))
+        while table[idx]:
+            idx = idx - (hash_size - incr) if idx >= hash_size - incr else idx + incr
+        table[idx] = i + 1
+
+    orig_offset = 28
+    trans_offset = orig_offset + count * 8
+    hash_offset = trans_offset + count * 8
+    data_offset = hash_offset + hash_size * 4
+    ids = strs = b""
+    orig_table, trans_table = [], []
+    for msgid, msgstr in messages:
+        orig_table.append((len(msgid), len(ids)))
+        ids += msgid + b"\x00"
+    for msgid, msgstr in messages:
+        trans_table.append((len(msgstr), data_offset + len(ids) + len(strs)))
+        strs += msgstr + b"\x00"
+
+    fileobj.write(
+        struct.pack(
+            "<7I",
+            0x950412DE,
+            0,
+            count,
+            orig_offset,
+            trans_offset,
+            hash_size,
+            hash_offset,
+        )
+    )
+    for length, offset in orig_table:
+        fileobj.write(struct.pack("<II", length, data_offset + offset))
+    for length, offset in trans_table:
+        fileobj.write(struct.pack("<II", length, offset))
+    fileobj.write(struct.pack("<%dI" % hash_size, *table))
+    fileobj.write(ids + strs)
 
 
 class DateFormattingTestCase(unittest.TestCase):
@@ -93,6 +183,29 @@ class DateFormattingTestCase(unittest.TestCase):
             assert _get_format("datetime", "medium") == "medium"
             assert _get_format("date", "short") == "MM d"
 
+    def test_date_format_table(self):
+        app = flask.Flask(__name__)
+        b = babel_ext.Babel(app)
+        table = b.date_format_table
+        assert table["date", None] == "medium"
+        assert b.date_format_table is table
+
+        b.date_formats["date"] = "short"
+        b.date_formats["date.short"] = "MM d"
+        table = b.date_format_table
+        assert table["date", None] == table["date", "short"] == "MM d"
+        assert b.date_format_table is table
+
+        b.date_formats |= {"time": "HH:mm"}
+        assert b.date_format_table["time", None] == "HH:mm"
+
+        b.date_formats = {"datetime": "full", "datetime.full": None}
+        with app.test_request_context():
+            assert _get_format("datetime") == "full"
+            assert _get_format("datetime", "yyyy") == "yyyy"
+            with pytest.raises(KeyError):
+                _get_format("date")
+
     def test_custom_locale_selector(self):
         app = flask.Flask(__name__)
         b = babel_ext.Babel(app)
@@ -147,6 +260,45 @@ class DateFormattingTestCase(unittest.TestCase):
             assert str(babel_ext.get_locale()) == "de_DE"
 
 
+class RelativeTimeTestCase(unittest.TestCase):
+    def test_same_as_format_timedelta(self):
+        app = flask.Flask(__name__)
+        babel_ext.Babel(app, default_locale="de_DE")
+        seconds = [0, 1, 44, 59, 3029, 3030, 3059, 3060, 73000, 86400 * 25.5]
+        seconds += [-s for s in seconds] + [86400 * 400, 86400 * 29]
+        with app.test_request_context():
+            for value in seconds:
+                delta = timedelta(seconds=value)
+                for granularity in ("second", "hour", "day"):
+                    expected = dates.format_timedelta(
+                        delta, granularity, add_direction=True, locale="de_DE"
+                    )
+                    assert (
+                        babel_ext.format_relative_time(delta, granularity) == expected
+                    )
+                assert babel_ext.format_relative_time(
+                    delta, add_direction=False, threshold=1
+                ) == dates.format_timedelta(delta, threshold=1, locale="de_DE")
+
+    def test_now_sampled_once(self):
+        app = flask.Flask(__name__)
+        babel_ext.Babel(app)
+        with app.test_request_context():
+            now = _get_now()
+            assert _get_now() is now
+            assert babel_ext.format_relative_times(
+                [
+                    now - timedelta(minutes=3),
+                    now.replace(tzinfo=None) + timedelta(days=2),
+                    timedelta(seconds=-30),
+                ]
+            ) == ["3 minutes ago", "in 2 days", "30 seconds ago"]
+
+        template = app.jinja_env.from_string("{{ d|relativetimeformat }}")
+        with app.test_request_context():
+            assert template.render(d=timedelta(minutes=-3)) == "3 minutes ago"
+
+
 class NumberFormattingTestCase(unittest.TestCase):
     def test_basics(self):
         app = flask.Flask(__name__)
@@ -161,6 +313,215 @@ class NumberFormattingTestCase(unittest.TestCase):
             assert babel_ext.format_scientific(10000) == "1E4"
 
 
+class ListUnitCompactFormattingTestCase(unittest.TestCase):
+    def test_same_as_babel(self):
+        app = flask.Flask(__name__)
+        b = babel_ext.Babel(app)
+        b.localeselector(lambda: flask.request.args.get("lang"))
+        for lang in ("de_DE", "en_US", "ja_JP"):
+            with app.test_request_context(query_string={"lang": lang}):
+                for items in ([], ["A"], ["A", "B"], ["A", "B", "C", "D"]):
+                    for style in ("standard", "or", "standard-short"):
+                        assert babel_ext.format_list(items, style) == (
+                            lists.format_list(items, style, lang)
+                        )
+                for value in (1, 5, 1.5, "one"):
+                    for length in ("long", "short"):
+                        assert babel_ext.format_unit(
+                            value, "length-kilometer", length
+                        ) == units.format_unit(
+                            value, "length-kilometer", length, locale=lang
+                        )
+                # Babel has no long compact formats for Japanese
+                format_types = ("short",) if lang == "ja_JP" else ("short", "long")
+                for number in (1, 999, 1234, 1250000, -12345):
+                    for format_type in format_types:
+                        assert babel_ext.format_compact_decimal(
+                            number, format_type, 1
+                        ) == numbers.format_compact_decimal(
+                            number,
+                            format_type=format_type,
+                            fraction_digits=1,
+                            locale=lang,
+                        )
+
+    def test_private_babel_api(self):
+        # the cached formatters use these, keep them in sync with Babel
+        assert list(inspect.signature(units._find_unit_pattern).parameters) == [
+            "unit_id",
+            "locale",
+        ]
+        assert list(inspect.signature(numbers._get_compact_format).parameters) == [
+            "number",
+            "compact_format",
+            "locale",
+            "fraction_digits",
+        ]
+
+        app = flask.Flask(__name__)
+        babel_ext.Babel(app, default_locale="de_DE")
+        # the public functions are used if Babel drops the helpers
+        with (
+            mock.patch("flask_babelplus.utils._babel_private", return_value=None),
+            app.test_request_context(),
+        ):
+            assert babel_ext.format_units([1, 5], "mass-kilogram") == [
+                units.format_unit(1, "mass-kilogram", locale="de_DE"),
+                units.format_unit(5, "mass-kilogram", locale="de_DE"),
+            ]
+            assert babel_ext.format_compact_decimal(1250000, "long", 1) == (
+                numbers.format_compact_decimal(
+                    1250000, format_type="long", fraction_digits=1, locale="de_DE"
+                )
+            )
+
+    def test_bounded_pattern_caches(self):
+        app = flask.Flask(__name__)
+        b = babel_ext.Babel(app)
+        b.localeselector(lambda: flask.request.args.get("lang"))
+        list_patterns, unit_patterns = LRUCache(2), LRUCache(2)
+        with (
+            mock.patch("flask_babelplus.utils._list_patterns", list_patterns),
+            mock.patch("flask_babelplus.utils._unit_patterns", unit_patterns),
+        ):
+            for lang in ("de_DE", "en_US", "ja_JP"):
+                with app.test_request_context(query_string={"lang": lang}):
+                    babel_ext.format_list(["A", "B"])
+                    babel_ext.format_unit(1, "length-kilometer")
+        assert list(list_patterns.keys()) == [
+            ("en_US", "standard"),
+            ("ja_JP", "standard"),
+        ]
+        assert len(unit_patterns) == 2
+
+    def test_bulk_and_filters(self):
+        app = flask.Flask(__name__)
+        babel_ext.Babel(app)
+        with app.test_request_context():
+            assert babel_ext.format_lists([["A", "B"], ["A", "B", "C"]]) == [
+                "A and B",
+                "A, B, and C",
+            ]
+            assert babel_ext.format_units([1, 12], "kilometer", "short") == [
+                "1 km",
+                "12 km",
+            ]
+            assert babel_ext.format_compact_decimals([1200, 5000000]) == [
+                "1K",
+                "5M",
+            ]
+            assert babel_ext.format_list([lazy_gettext("Yes"), "No"], "or") == (
+                "Yes or No"
+            )
+            with pytest.raises(units.UnknownUnitError):
+                babel_ext.format_unit(1, "nonsense")
+
+            template = app.jinja_env.from_string(
+                "{{ l|listformat }} {{ 5|unitformat('length-meter') }} "
+                "{{ 1500|compactdecimalformat }}"
+            )
+            assert template.render(l=["A", "B"]) == "A and B 5 meters 2K"
+
+
+class ParsingTestCase(unittest.TestCase):
+    def test_numbers(self):
+        app = flask.Flask(__name__)
+        b = babel_ext.Babel(app)
+        b.localeselector(lambda: flask.request.args.get("lang"))
+        inputs = ["1.099,98", "1,099.98", "1 099,98", "-12", "1.099"]
+        for lang in ("de_DE", "en_US", "fr_FR"):
+            with app.test_request_context(query_string={"lang": lang}):
+                for string in inputs:
+                    try:
+                        expected = numbers.parse_decimal(string, lang)
+                    except numbers.NumberFormatError:
+                        with pytest.raises(numbers.NumberFormatError):
+                            babel_ext.parse_decimal(string)
+                    else:
+                        assert babel_ext.parse_decimal(string) == expected
+
+        with app.test_request_context(query_string={"lang": "de_DE"}):
+            assert babel_ext.parse_decimals(["1.099,98", "3"]) == [
+                Decimal("1099.98"),
+                Decimal("3"),
+            ]
+            assert babel_ext.parse_numbers(["1.099", "12"]) == [1099, 12]
+            assert babel_ext.parse_number("1.099") == 1099
+            with pytest.raises(numbers.NumberFormatError):
+                babel_ext.parse_number("1,5")
+            with pytest.raises(numbers.NumberFormatError):
+                babel_ext.parse_decimal("1.09,98", strict=True)
+
+    def test_dates(self):
+        app = flask.Flask(__name__)
+        b = babel_ext.Babel(app, default_locale="de_DE")
+        with app.test_request_context():
+            assert babel_ext.parse_date("12.04.2010") == date(2010, 4, 12)
+            assert babel_ext.parse_date("2010-04-12") == date(2010, 4, 12)
+            assert babel_ext.parse_dates(["1.2.24", "31.12.2023"]) == [
+                date(2024, 2, 1),
+                date(2023, 12, 31),
+            ]
+            assert babel_ext.parse_time("15:30:10") == dates.parse_time(
+                "15:30:10", "de_DE"
+            )
+            assert babel_ext.parse_times(["15:30"]) == [dt_time(15, 30)]
+            with pytest.raises(dates.ParseError):
+                babel_ext.parse_date("nope")
+
+        b.date_formats["date"] = "MM/dd/yyyy"
+        b.date_formats["time"] = "h:mm a"
+        with app.test_request_context():
+            assert babel_ext.parse_date("04/12/2010") == date(2010, 4, 12)
+            assert babel_ext.parse_time("3:30 PM") == dt_time(15, 30)
+
+
+class CollationTestCase(unittest.TestCase):
+    def test_sorted_localized(self):
+        app = flask.Flask(__name__)
+        babel_ext.Babel(app, default_locale="de_DE")
+        words = ["Zebra", "zoo", "Äpfel", "apple", "Banane", "Apfel", "apfel"]
+        with app.test_request_context():
+            assert babel_ext.sorted_localized(words) == [
+                "apfel",
+                "Apfel",
+                "Äpfel",
+                "apple",
+                "Banane",
+                "Zebra",
+                "zoo",
+            ]
+            assert babel_ext.sorted_localized(words, reverse=True)[0] == "zoo"
+            assert babel_ext.sort_key("Äpfel") < babel_ext.sort_key("apple")
+            assert babel_ext.sort_keys(["b", "a"]) == [
+                babel_ext.sort_key("b"),
+                babel_ext.sort_key("a"),
+            ]
+
+    def test_without_locale(self):
+        words = ["b", "Äpfel", "B", "a"]
+        # no request, so plain string ordering
+        assert babel_ext.sorted_localized(words) == sorted(words)
+        assert babel_ext.sort_key("a") == "a"
+
+    def test_lazy_labels(self):
+        app = flask.Flask(__name__)
+        babel_ext.Babel(app, default_locale="de_DE")
+        calls = []
+
+        def translate(string):
+            calls.append(string)
+            return {"Yes": "Ja", "No": "Nein", "Apple": "Apfel"}[string]
+
+        choices = [
+            (i, LazyString(translate, s)) for i, s in enumerate(["Yes", "No", "Apple"])
+        ]
+        with app.test_request_context():
+            result = babel_ext.sorted_localized(choices, key=lambda c: c[1])
+        assert [i for i, _ in result] == [2, 0, 1]
+        assert len(calls) == 3
+
+
 class GettextTestCase(unittest.TestCase):
     def test_basics(self):
         app = flask.Flask(__name__)
@@ -210,6 +571,40 @@ class GettextTestCase(unittest.TestCase):
                 == "3 Äpfel"
             )
 
+    def test_template_domain(self):
+        app = flask.Flask(__name__)
+        babel_ext.Babel(app, default_locale="de_DE")
+        tracker = set_tracker(MessageTracker())
+
+        def t(source, **context):
+            return app.jinja_env.from_string(source).render(**context)
+
+        try:
+            with app.test_request_context():
+                assert (
+                    t(
+                        "{% autoescape true %}{{ _('Hello %(name)s!', name=name) }}"
+                        "{% endautoescape %}",
+                        name="<b>",
+                    )
+                    == "Hallo &lt;b&gt;!"
+                )
+                assert t("{% trans %}100% Yes{% endtrans %}") == "100% Yes"
+                assert t("{{ pgettext('button', 'Hello Guest!') }}") == "Hallo Gast!"
+                assert (
+                    t("{{ npgettext('fruits', '%(num)s Apple', '%(num)s Apples', 3) }}")
+                    == "3 Äpfel"
+                )
+        finally:
+            set_tracker(None)
+        # the lookups go through the domain
+        assert {entry["msgid"] for entry in tracker.messages()} == {
+            "Hello %(name)s!",
+            "100%% Yes",
+            "Hello Guest!",
+            "%(num)s Apple",
+        }
+
     def test_lazy_gettext(self):
         app = flask.Flask(__name__)
         babel_ext.Babel(app, default_locale="de_DE")
@@ -348,6 +743,1456 @@ class GettextTestCase(unittest.TestCase):
             assert "de_DE" not in app2.extensions["babel"].domain.cache
 
 
+class MappedTranslationsTestCase(unittest.TestCase):
+    def test_same_catalog(self):
+        for domain in ("messages", "test"):
+            eager = support.Translations.load(TRANSLATIONS_DIR, "de", domain)
+            mapped = MappedTranslations.load(TRANSLATIONS_DIR, "de", domain)
+            assert isinstance(mapped, MappedTranslations)
+            assert dict(mapped._catalog) == eager._catalog
+            assert mapped._info == eager._info
+            assert mapped.plural(2) == eager.plural(2)
+
+    def test_lazy_decoding(self):
+        mapped = MappedTranslations.load(TRANSLATIONS_DIR, "de", "messages")
+        assert "Yes" not in mapped._catalog._cache
+        assert mapped.ugettext("Yes") == "Ja"
+        assert mapped._catalog._cache["Yes"] == "Ja"
+        assert mapped.ungettext("%(num)s Apple", "%(num)s Apples", 3) == (
+            "%(num)s Äpfel"
+        )
+        assert mapped.ugettext("Missing") == "Missing"
+
+    def test_hash_table(self):
+        fileobj = io.BytesIO()
+        write_mo_with_hash_table(
+            fileobj,
+            [
+                (b"", b"Content-Type: text/plain; charset=UTF-8\n"),
+                (b"Yes", b"Ja"),
+                (b"No", b"Nein"),
+                (b"button\x04Hello", b"Hallo"),
+                (b"Apple\x00Apples", b"Apfel\x00\xc3\x84pfel"),
+            ],
+        )
+        fileobj.seek(0)
+        mapped = MappedTranslations(fileobj)
+        assert mapped._catalog._hash_size == 7
+        assert mapped._catalog._index is None
+        assert mapped.ugettext("Yes") == "Ja"
+        assert mapped.ugettext("No") == "Nein"
+        assert mapped.upgettext("button", "Hello") == "Hallo"
+        assert mapped.ungettext("Apple", "Apples", 2) == "Äpfel"
+        assert mapped.ugettext("Maybe") == "Maybe"
+        assert mapped._catalog._index is None
+
+    def test_domain(self):
+        app = flask.Flask(__name__)
+        domain = babel_ext.Domain(mmap=True)
+        babel_ext.Babel(app, default_locale="de_DE", default_domain=domain)
+
+        with app.test_request_context():
+            assert isinstance(domain.get_translations(), MappedTranslations)
+            assert gettext("Hello %(name)s!", name="Peter") == "Hallo Peter!"
+            assert ngettext("%(num)s Apple", "%(num)s Apples", 1) == "1 Apfel"
+            assert pgettext("button", "Hello Guest!") == "Hallo Gast!"
+
+
+class PartitionedTranslationsTestCase(unittest.TestCase):
+    def load(self, partition):
+        filename = os.path.join(TRANSLATIONS_DIR, "de", "LC_MESSAGES", "messages.mo")
+        with open(filename, "rb") as fp:
+            return PartitionedTranslations(fp, partition=partition)
+
+    def test_msgctxt(self):
+        translations = self.load("msgctxt")
+        stats = translations.partition_stats()
+        assert set(stats) == {"", "button", "dialog", "shop", "fruits"}
+        assert not any(s["loaded"] for s in stats.values())
+
+        assert translations.upgettext("button", "Hello Guest!") == "Hallo Gast!"
+        stats = translations.partition_stats()
+        assert stats["button"]["loaded"]
+        assert stats["button"]["entries"] == 2
+        assert stats["button"]["memory"] > 0
+        assert not stats["shop"]["loaded"]
+        assert "dialog\x04Hello %(name)s!" not in translations._catalog._cache
+
+        assert translations.upgettext("button", "Missing") == "Missing"
+        assert translations.unpgettext("shop", "%(num)s Apple", "x", 2) == (
+            "%(num)s Äpfel"
+        )
+        assert translations.ugettext("Yes") == "Ja"
+
+    def test_prefix(self):
+        translations = self.load(["Hello"])
+        assert translations.ugettext("Yes") == "Ja"
+        stats = translations.partition_stats()
+        assert stats[""]["loaded"]
+        assert not stats["Hello"]["loaded"]
+        # the prefix is matched against the msgid, not the context
+        assert stats["Hello"]["entries"] == 4
+
+        with pytest.raises(ValueError):
+            self.load("Hello")
+
+    def test_domain(self):
+        app = flask.Flask(__name__)
+        domain = babel_ext.Domain(partition="msgctxt")
+        babel_ext.Babel(app, default_locale="de_DE", default_domain=domain)
+
+        with app.test_request_context():
+            assert pgettext("button", "Hello Guest!") == "Hallo Gast!"
+            assert npgettext("fruits", "%(num)s Apple", "%(num)s Apples", 3) == (
+                "3 Äpfel"
+            )
+            stats = domain.partition_stats()["de_DE"]
+            assert stats["button"]["loaded"]
+            assert stats["fruits"]["loaded"]
+            assert not stats["shop"]["loaded"]
+
+
+class SnapshotTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.dirname = os.path.join(self.tmpdir, "translations")
+        shutil.copytree(TRANSLATIONS_DIR, self.dirname)
+        self.mo = os.path.join(self.dirname, "de", "LC_MESSAGES", "messages.mo")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_roundtrip(self):
+        assert load_snapshot(self.mo) is None
+        write_snapshot(self.mo)
+        eager = support.Translations.load(self.dirname, "de")
+        snapshot = load_snapshot(self.mo, "messages")
+        assert snapshot._catalog == eager._catalog
+        assert snapshot._info == eager._info
+        assert snapshot.plural(2) == eager.plural(2)
+        assert snapshot.ungettext("%(num)s Apple", "%(num)s Apples", 2) == (
+            "%(num)s Äpfel"
+        )
+
+    def test_invalidation(self):
+        write_snapshot(self.mo)
+        assert load_snapshot(self.mo) is not None
+        stat = os.stat(self.mo)
+        os.utime(self.mo, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        assert load_snapshot(self.mo) is None
+
+        write_snapshot(self.mo)
+        with open(snapshot_path(self.mo), "r+b") as fp:
+            fp.seek(-1, os.SEEK_END)
+            fp.write(b"\x00")
+        assert load_snapshot(self.mo) is None
+
+    def test_build_cache_command(self):
+        app = flask.Flask(__name__)
+        domain = babel_ext.Domain(dirname=self.dirname)
+        babel_ext.Babel(app, default_locale="de_DE", default_domain=domain)
+
+        result = app.test_cli_runner().invoke(
+            args=["babel", "build-cache", "--benchmark", "--repeat", "1"]
+        )
+        assert result.exit_code == 0, result.output
+        assert snapshot_path(self.mo) in result.output
+        assert "snapshot:" in result.output
+        assert os.path.isfile(snapshot_path(self.mo))
+
+        with app.test_request_context():
+            with mock.patch.object(support.Translations, "_parse") as parse:
+                assert gettext("Yes") == "Ja"
+            assert not parse.called
+
+
+class SQLiteBackendTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.backend = SQLiteBackend(os.path.join(self.tmpdir, "catalogs.sqlite"))
+        for locale in ("de", "fr"):
+            self.backend.import_catalog(
+                "messages",
+                locale,
+                support.Translations.load(TRANSLATIONS_DIR, "de", "messages"),
+            )
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_load(self):
+        translations = self.backend.load("", "de_DE", "messages")
+        eager = support.Translations.load(TRANSLATIONS_DIR, "de", "messages")
+        assert translations._catalog == {
+            k: v for k, v in eager._catalog.items() if k != ""
+        }
+        assert translations.ungettext("%(num)s Apple", "%(num)s Apples", 1) == (
+            "%(num)s Apfel"
+        )
+        assert isinstance(
+            self.backend.load("", "it", "messages"), support.NullTranslations
+        )
+        assert self.backend.list_locales("", "messages") == ["de", "fr"]
+        assert self.backend.list_locales("", "other") == []
+
+    def test_invalidation(self):
+        app = flask.Flask(__name__)
+        b = babel_ext.Babel(app)
+        # two domains sharing the database behave like two nodes
+        node1 = babel_ext.Domain(backend=self.backend, poll_interval=0)
+        node2 = babel_ext.Domain(
+            backend=SQLiteBackend(self.backend.path), poll_interval=0
+        )
+        the_locale = "de_DE"
+
+        @b.localeselector
+        def select_locale():
+            return the_locale
+
+        for the_locale in ("de_DE", "fr"):
+            with app.test_request_context():
+                assert node1.gettext("Yes") == "Ja"
+                assert node2.gettext("Yes") == "Ja"
+        french = node2.cache["fr"]
+
+        node1.backend.update_messages("messages", "de", {"Yes": "Jawohl"})
+        for the_locale in ("de_DE", "fr"):
+            with app.test_request_context():
+                assert node2.gettext("Yes") == (
+                    "Jawohl" if the_locale != "fr" else "Ja"
+                )
+        assert node2.cache["fr"] is french
+
+
+class CatalogRegistryTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        for name in ("app1", "app2"):
+            shutil.copytree(
+                TRANSLATIONS_DIR, os.path.join(self.tmpdir, name, "translations")
+            )
+        self.mo = os.path.join(
+            self.tmpdir, "app2", "translations", "de", "LC_MESSAGES", "messages.mo"
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_shared_domain(self):
+        domain = babel_ext.Domain()
+        app1 = flask.Flask(__name__, root_path=os.path.join(self.tmpdir, "app1"))
+        app2 = flask.Flask(__name__, root_path=os.path.join(self.tmpdir, "app2"))
+        babel_ext.Babel(app1, default_locale="de_DE", default_domain=domain)
+        babel_ext.Babel(app2, default_locale="de_DE", default_domain=domain)
+
+        with open(self.mo, "wb") as fp:
+            write_mo_with_hash_table(fp, [(b"Yes", b"Jawohl")])
+
+        with app1.test_request_context():
+            assert gettext("Yes") == "Ja"
+            first = domain.cache["de_DE"]
+        with app2.test_request_context():
+            assert gettext("Yes") == "Jawohl"
+            assert domain.cache["de_DE"] is not first
+        assert len(domain.caches) == 2
+
+        # assigning replaces the cache of the current application only
+        with app2.app_context():
+            domain.cache = {}
+            assert domain.cache == {}
+        with app1.app_context():
+            assert domain.cache["de_DE"] is first
+
+    def test_shared_catalogs(self):
+        dirname = os.path.join(self.tmpdir, "app1", "translations")
+        app = flask.Flask(__name__)
+        babel_ext.Babel(app, default_locale="de_DE")
+        first = babel_ext.Domain(dirname=dirname)
+        second = babel_ext.Domain(dirname=dirname + os.sep)
+
+        with app.test_request_context():
+            assert first.gettext("Yes") == second.gettext("Yes") == "Ja"
+        assert first.cache["de_DE"] is second.cache["de_DE"]
+
+        # a changed file is loaded again
+        mo = os.path.join(dirname, "de", "LC_MESSAGES", "messages.mo")
+        stat = os.stat(mo)
+        os.utime(mo, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        first.invalidate()
+        with app.test_request_context():
+            assert first.gettext("Yes") == "Ja"
+        assert first.cache["de_DE"] is not second.cache["de_DE"]
+
+    def test_weak_references(self):
+        dirname = os.path.join(self.tmpdir, "app1", "translations")
+        app = flask.Flask(__name__)
+        babel_ext.Babel(app, default_locale="de_DE")
+        domain = babel_ext.Domain(dirname=dirname)
+        with app.test_request_context():
+            domain.gettext("Yes")
+        ref = weakref.ref(domain.cache["de_DE"])
+        mo = os.path.realpath(os.path.join(dirname, "de", "LC_MESSAGES", "messages.mo"))
+        assert any(key[0] == mo for key in catalog_registry._catalogs)
+
+        # the registry does not keep catalogs alive that no domain uses
+        domain.invalidate()
+        gc.collect()
+        assert ref() is None
+        assert not any(key[0] == mo for key in catalog_registry._catalogs)
+
+
+class LocaleUsageTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.profile = os.path.join(self.tmpdir, "usage.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def make_app(self, **config):
+        app = flask.Flask(__name__)
+        app.config.update(config)
+        b = babel_ext.Babel(app)
+        b.localeselector(lambda: flask.request.args.get("lang"))
+        return app, b
+
+    def test_profile(self):
+        app, b = self.make_app(BABEL_USAGE_PROFILE=self.profile)
+        for lang in ("de", "de", "fr", "de"):
+            with app.test_request_context(query_string={"lang": lang}):
+                gettext("Yes")
+
+        profile = b.usage_profile()
+        assert [(e["locale"], e["count"]) for e in profile] == [("de", 3), ("fr", 1)]
+        b.save_usage_profile()
+
+        # the next process preloads the hottest locales
+        app, b = self.make_app(
+            BABEL_USAGE_PROFILE=self.profile, BABEL_PRELOAD_LOCALES=1
+        )
+        domain = app.extensions["babel"].domain
+        with app.app_context():
+            assert list(domain.cache) == ["de"]
+        assert b.usage_profile()[0]["count"] == 3
+
+        result = app.test_cli_runner().invoke(args=["babel", "usage"])
+        assert result.exit_code == 0
+        assert result.output.splitlines()[0].startswith("de ")
+        assert result.output.splitlines()[0].endswith("cached")
+
+    def test_eviction(self):
+        app, b = self.make_app(BABEL_MAX_CACHED_LOCALES=1)
+        domain = app.extensions["babel"].domain
+        for lang in ("de", "de", "fr"):
+            with app.test_request_context(query_string={"lang": lang}):
+                gettext("Yes")
+        with app.app_context():
+            assert set(domain.cache) == {"de", "fr"}
+            fr = weakref.ref(domain.cache["fr"])
+
+        # the current locale is kept as well as the hottest one
+        with app.test_request_context(query_string={"lang": "en"}):
+            gettext("Yes")
+            assert set(domain.cache) == {"de", "en"}
+
+        # the evicted catalog is not kept alive elsewhere
+        gc.collect()
+        assert fr() is None
+
+    def test_eviction_per_app(self):
+        app, _ = self.make_app(BABEL_MAX_CACHED_LOCALES=1)
+        domain = app.extensions["babel"].domain
+        other = flask.Flask(__name__, root_path=self.tmpdir)
+        babel_ext.Babel(other, default_domain=domain)
+        for lang in ("de", "fr", "it"):
+            with other.test_request_context():
+                domain.get_translations_for(lang, other)
+        other_cache = domain.caches[domain.get_translations_path(other)]
+
+        for lang in ("de", "de", "fr"):
+            with app.test_request_context(query_string={"lang": lang}):
+                gettext("Yes")
+        with app.app_context():
+            assert set(domain.cache) == {"de", "fr"}
+        # the catalogs of the other application are neither counted nor
+        # evicted
+        assert set(other_cache) == {"de", "fr", "it"}
+
+    def test_recency(self):
+        usage = LocaleUsage(half_life=60)
+        usage.counts = {"de": 100, "fr": 10}
+        usage.last_seen = {"de": time.time() - 600, "fr": time.time()}
+        assert usage.top(1) == ["fr"]
+        assert usage.load(self.profile) is False
+
+
+class WarmupTestCase(unittest.TestCase):
+    def test_warmup(self):
+        app = flask.Flask(__name__)
+        b = babel_ext.Babel(app, default_locale="de_DE")
+        b.date_formats["date"] = "yyyy-MM-dd"
+        plugin = babel_ext.Domain(domain="test")
+        b.register_domain(plugin)
+
+        items = warmup(app, timezones=["Europe/Vienna"], trace_memory=True)
+        names = {(item.kind, item.name) for item in items}
+        assert ("catalog", "messages [de]") in names
+        assert ("catalog", "test [de]") in names
+        assert ("locale", "de_DE") in names
+        assert ("dates", "de") in names
+        assert ("numbers", "de") in names
+        assert ("timezone", "Europe/Vienna") in names
+        assert all(item.memory is not None for item in items)
+        with app.app_context():
+            assert "de" in plugin.cache
+            assert "de" in get_state().locale_cache
+
+    def test_warmup_command(self):
+        app = flask.Flask(__name__)
+        babel_ext.Babel(app)
+        runner = app.test_cli_runner()
+
+        result = runner.invoke(args=["babel", "warmup", "--sort"])
+        assert result.exit_code == 0
+        assert "catalog    messages [de]" in result.output
+        assert "KiB" not in result.output
+        assert result.output.splitlines()[-1].startswith("total")
+
+        result = runner.invoke(args=["babel", "warmup", "--trace-memory"])
+        assert result.exit_code == 0
+        assert "KiB" in result.output
+
+        result = runner.invoke(args=["babel", "warmup", "--budget", "0"])
+        assert result.exit_code == 1
+        assert "the budget is 0.000ms" in result.output
+
+
+class MetricsTestCase(unittest.TestCase):
+    def setUp(self):
+        catalog_registry.clear()
+        self.metrics = set_hook(InMemoryMetrics())
+
+    def tearDown(self):
+        set_hook(None)
+
+    def test_metrics(self):
+        app = flask.Flask(__name__)
+        b = babel_ext.Babel(app, default_locale="de_DE")
+        b.localeselector(lambda: None)
+        for _ in range(3):
+            with app.test_request_context():
+                gettext("Yes")
+                babel_ext.format_date(date(2010, 4, 12))
+                babel_ext.format_relative_times([timedelta(days=1)] * 2)
+
+        metrics = self.metrics
+        assert metrics.counter("catalog_loads", domain="messages") == 1
+        assert metrics.counter("cache_misses", cache="catalog") == 1
+        assert metrics.counter("cache_hits", cache="catalog") == 2
+        assert metrics.counter("cache_hits", cache="relative_time") >= 5
+        assert (
+            metrics.counter("cache_hits", cache="relative_time")
+            + metrics.counter("cache_misses", cache="relative_time")
+            == 6
+        )
+        assert metrics.histogram("catalog_load_seconds").count == 1
+        assert metrics.histogram("catalog_size_bytes", locale="de_DE").min > 0
+        assert metrics.histogram("selector_seconds", selector="locale").count == 3
+        assert metrics.counter("formatter_calls", formatter="date") == 3
+        assert metrics.counter("formatter_calls") == 6
+
+        snapshot = metrics.snapshot()
+        assert {
+            "name": "catalog_loads",
+            "labels": {"domain": "messages", "locale": "de_DE"},
+            "value": 1,
+        } in snapshot["counters"]
+        metrics.reset()
+        assert metrics.snapshot() == {"counters": [], "histograms": []}
+
+    def test_cache_evictions(self):
+        cache = LRUCache(2, name="test")
+        for key in range(4):
+            cache[key] = key
+        assert self.metrics.counter("cache_evictions", cache="test") == 2
+
+        set_hook(None)
+        cache[5] = 5
+        assert self.metrics.counter("cache_evictions", cache="test") == 2
+
+
+class RequestTimingTestCase(unittest.TestCase):
+    def make_app(self, **config):
+        app = flask.Flask(__name__)
+        app.config.update(config)
+        b = babel_ext.Babel(app, default_locale="de_DE")
+        b.localeselector(lambda: flask.request.args.get("lang"))
+
+        @app.route("/")
+        def index():
+            return "%s %s" % (gettext("Yes"), babel_ext.format_date(date(2010, 4, 12)))
+
+        return app
+
+    def test_server_timing(self):
+        app = self.make_app(BABEL_TIMING_SAMPLE_RATE=1.0, BABEL_SERVER_TIMING=True)
+        timed = []
+
+        def receive(sender, timings):
+            timed.append(timings)
+
+        with request_timed.connected_to(receive, app):
+            response = app.test_client().get("/?lang=de")
+        assert response.data == b"Ja 12.04.2010"
+
+        (timings,) = timed
+        assert timings.counts["locale"] == 1
+        assert timings.counts["gettext"] == 1
+        assert timings.counts["format"] == 1
+        assert timings.total > 0
+        header = response.headers["Server-Timing"]
+        assert header.startswith("i18n-locale;dur=")
+        assert "i18n-gettext;dur=" in header
+        assert "i18n-format;dur=" in header
+        assert 'desc="1 calls"' in header
+
+    def test_sampling(self):
+        app = self.make_app(BABEL_TIMING_SAMPLE_RATE=0.0, BABEL_SERVER_TIMING=True)
+        timed = []
+        with request_timed.connected_to(lambda sender, timings: timed.append(1), app):
+            response = app.test_client().get("/")
+        assert "Server-Timing" not in response.headers
+        assert timed == []
+
+        # sampled without the header
+        app = self.make_app(BABEL_TIMING_SAMPLE_RATE=1.0)
+        with request_timed.connected_to(lambda sender, timings: timed.append(1), app):
+            response = app.test_client().get("/")
+        assert "Server-Timing" not in response.headers
+        assert timed == [1]
+
+
+class MessageTrackerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tracker = set_tracker(MessageTracker())
+
+    def tearDown(self):
+        set_tracker(None)
+
+    def make_app(self):
+        app = flask.Flask(__name__)
+        b = babel_ext.Babel(app, default_locale="de_DE")
+        b.localeselector(lambda: flask.request.args.get("lang"))
+
+        @app.route("/")
+        def index():
+            return " ".join(
+                [
+                    gettext("Yes"),
+                    gettext("Missing"),
+                    ngettext("%(num)s Apple", "%(num)s Apples", 2),
+                    pgettext("button", "Hello Guest!"),
+                ]
+            )
+
+        return app
+
+    def test_tracking(self):
+        client = self.make_app().test_client()
+        client.get("/")
+        client.get("/")
+        client.get("/?lang=fr")
+
+        messages = self.tracker.messages()
+        assert messages[0]["hits"] + messages[0]["misses"] == 2
+        assert {
+            "domain": "messages",
+            "locale": "de_DE",
+            "context": None,
+            "msgid": "Yes",
+            "endpoint": "index",
+            "hits": 2,
+            "misses": 0,
+        } in messages
+        missing = {(e["locale"], e["msgid"]) for e in self.tracker.messages(True)}
+        assert ("de_DE", "Missing") in missing
+        assert ("fr", "Yes") in missing
+        assert ("de_DE", "Yes") not in missing
+
+        buf = io.BytesIO()
+        self.tracker.write_pot(buf)
+        pot = buf.getvalue().decode("utf-8")
+        assert (
+            '#. de_DE: 0 hits, 2 misses\n#. fr: 0 hits, 1 misses\n#: index\nmsgid "Missing"'
+            in pot
+        )
+        assert 'msgid_plural "%(num)s Apples"' in pot
+        assert 'msgctxt "button"' in pot
+
+        app = self.make_app()
+        with app.test_request_context():
+            catalog = get_state().domain.get_translations()._catalog
+        unused = self.tracker.unused(catalog)
+        assert (None, "Yes") not in unused
+        assert ("button", "Hello Guest!") not in unused
+        assert ("dialog", "Hello %(name)s!") in unused
+
+    def test_sampling_and_bounds(self):
+        tracker = set_tracker(MessageTracker(sample_rate=0.0))
+        self.make_app().test_client().get("/")
+        assert tracker.entries == {}
+
+        tracker = set_tracker(MessageTracker(maxsize=2))
+        self.make_app().test_client().get("/")
+        assert len(tracker.entries) == 2
+        assert tracker.dropped == 2
+
+    def test_save(self):
+        self.make_app().test_client().get("/")
+        tmpdir = tempfile.mkdtemp()
+        try:
+            self.tracker.save(os.path.join(tmpdir, "messages.json"))
+            self.tracker.save(os.path.join(tmpdir, "messages.pot"))
+            with open(os.path.join(tmpdir, "messages.json")) as fp:
+                data = json.load(fp)
+            assert len(data["messages"]) == 4
+            assert sorted(os.listdir(tmpdir)) == ["messages.json", "messages.pot"]
+        finally:
+            shutil.rmtree(tmpdir)
+
+
+class JSONCatalogTestCase(unittest.TestCase):
+    def make_app(self, **kwargs):
+        app = flask.Flask(__name__)
+        babel_ext.Babel(app)
+        catalogs = JSONCatalog(**kwargs)
+        app.register_blueprint(catalogs.blueprint, url_prefix="/i18n")
+        return app, catalogs
+
+    def test_catalog(self):
+        app, catalogs = self.make_app()
+        client = app.test_client()
+        response = client.get("/i18n/de.json")
+        assert response.status_code == 200
+        assert response.mimetype == "application/json"
+        data = response.get_json()
+        assert data["locale"] == "de"
+        assert data["nplurals"] == 2
+        assert data["plural"] == "(n != 1)"
+        assert data["messages"]["Yes"] == "Ja"
+        assert data["messages"]["%(num)s Apple"] == ["%(num)s Apfel", "%(num)s Äpfel"]
+        assert data["messages"]["button\x04Hello Guest!"] == "Hallo Gast!"
+        assert b'"Ja","' in response.data
+
+        # the same bytes are served again and revalidated with a 304
+        etag = response.headers["ETag"]
+        assert not etag.startswith("W/")
+        again = client.get("/i18n/de.json")
+        assert again.data == response.data
+        assert len(catalogs.payloads) == 1
+        response = client.get("/i18n/de.json", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.data == b""
+
+        # a reloaded catalog is serialized again, the content did not change
+        key = (id(get_state(app).domain), "de", None)
+        translations = catalogs.payloads[key][0]
+        get_state(app).domain.invalidate()
+        catalog_registry.clear()
+        response = client.get("/i18n/de.json", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert catalogs.payloads[key][0] is not translations
+
+    def test_compression(self):
+        app, _ = self.make_app()
+        client = app.test_client()
+        plain = client.get("/i18n/de.json")
+        response = client.get("/i18n/de.json", headers={"Accept-Encoding": "gzip"})
+        assert response.content_encoding == "gzip"
+        assert "Accept-Encoding" in response.vary
+        assert gzip.decompress(response.data) == plain.data
+        assert response.headers["ETag"] != plain.headers["ETag"]
+
+        etag = response.headers["ETag"]
+        response = client.get(
+            "/i18n/de.json",
+            headers={"Accept-Encoding": "gzip", "If-None-Match": etag},
+        )
+        assert response.status_code == 304
+
+    def test_bundles(self):
+        app, catalogs = self.make_app(
+            bundles={"shop": ["Yes", ("button", "Hello Guest!")]}
+        )
+        client = app.test_client()
+        data = client.get("/i18n/de/shop.json").get_json()
+        assert data["messages"] == {
+            "Yes": "Ja",
+            "button\x04Hello Guest!": "Hallo Gast!",
+        }
+        assert client.get("/i18n/de/unknown.json").status_code == 404
+        assert client.get("/i18n/xx_invalid.json").status_code == 404
+        # valid locales without translations are not loaded
+        assert client.get("/i18n/fr.json").status_code == 404
+        assert client.get("/i18n/de_AT.json").status_code == 404
+        assert len(catalogs.payloads) == 1
+
+        catalogs.add_bundle("shop", ["Yes"])
+        data = client.get("/i18n/de/shop.json").get_json()
+        assert data["messages"] == {"Yes": "Ja"}
+
+    def test_custom_dirname(self):
+        tmpdir = tempfile.mkdtemp()
+        try:
+            dirname = os.path.join(tmpdir, "i18n")
+            shutil.copytree(TRANSLATIONS_DIR, dirname)
+            domain = babel_ext.Domain(dirname=dirname)
+            app, catalogs = self.make_app(domain=domain)
+            client = app.test_client()
+            # the app itself has no translations folder
+            assert domain.list_locales(app) == ["de"]
+            assert client.get("/i18n/de.json").get_json()["messages"]["Yes"] == "Ja"
+            assert client.get("/i18n/fr.json").status_code == 404
+
+            # the known locales are cached until a catalog is invalidated
+            fr = os.path.join(dirname, "fr", "LC_MESSAGES")
+            shutil.copytree(os.path.join(dirname, "de", "LC_MESSAGES"), fr)
+            assert client.get("/i18n/fr.json").status_code == 404
+            domain.invalidate()
+            assert client.get("/i18n/fr.json").status_code == 200
+        finally:
+            shutil.rmtree(tmpdir)
+
+
+class I18nCacheTestCase(unittest.TestCase):
+    def make_app(self):
+        app = flask.Flask(__name__)
+        b = babel_ext.Babel(app, default_locale="de_DE")
+        b.localeselector(lambda: flask.request.args.get("lang"))
+        b.timezoneselector(lambda: flask.request.args.get("tz"))
+        return app, b
+
+    def test_cache_key(self):
+        app, b = self.make_app()
+        with app.test_request_context(query_string={"tz": "Europe/Vienna"}):
+            key = i18n_cache_key()
+            assert key == "de_DE|Europe/Vienna|0|1|messages|None|None"
+            assert i18n_cache_key() == key
+        with app.test_request_context(query_string={"lang": "fr"}):
+            assert i18n_cache_key() == "fr|UTC|0|1|messages|None|None"
+
+            b.date_formats["date"] = "short"
+            assert i18n_cache_key() == "fr|UTC|0|2|messages|None|None"
+            get_state().domain.invalidate("de")
+            assert i18n_cache_key() == "fr|UTC|1|2|messages|None|None"
+
+    def test_cache_key_tenants(self):
+        app = flask.Flask(__name__)
+        domain = babel_ext.OverlayDomain()
+        babel_ext.Babel(app, default_locale="de_DE", default_domain=domain)
+        domain.tenantselector(lambda: flask.g.get("tenant"))
+        domain.overlayloader(
+            lambda tenant, locale: {"acme": {"Yes": "Jawohl"}}.get(tenant)
+        )
+        template = app.jinja_env.from_string(
+            '{% i18n_cache "yes" %}{{ _("Yes") }}{% endi18n_cache %}'
+        )
+        for tenant, expected in (("acme", "Jawohl"), ("globex", "Ja"), (None, "Ja")):
+            with app.test_request_context():
+                flask.g.tenant = tenant
+                assert i18n_cache_key().endswith("|messages|None|%s" % tenant)
+                assert template.render() == expected
+
+    def test_cache_key_blueprint(self):
+        app, b = self.make_app()
+        admin = flask.Blueprint("admin", __name__)
+        admin.add_url_rule("/", "index", lambda: i18n_cache_key())
+        app.add_url_rule("/", "index", lambda: i18n_cache_key())
+        app.register_blueprint(admin, url_prefix="/admin")
+        b.register_domain(babel_ext.Domain(domain="test"), blueprint="admin")
+
+        client = app.test_client()
+        assert client.get("/admin/").text.endswith("|messages|admin|None")
+        assert client.get("/").text.endswith("|messages|None|None")
+
+    def test_fragment_cache(self):
+        app, _ = self.make_app()
+        calls = []
+
+        def render(name):
+            calls.append(name)
+            return gettext("Yes")
+
+        app.jinja_env.globals["render"] = render
+        template = app.jinja_env.from_string(
+            '{% i18n_cache "yes", 1 %}{{ render("yes") }}{% endi18n_cache %}'
+        )
+        for lang in ("de", "de", "en", "de"):
+            with app.test_request_context(query_string={"lang": lang}):
+                assert template.render() == ("Yes" if lang == "en" else "Ja")
+        assert calls == ["yes", "yes"]
+
+        # a reloaded catalog renders the fragment again
+        with app.test_request_context(query_string={"lang": "de"}):
+            get_state().domain.invalidate()
+            assert template.render() == "Ja"
+        assert len(calls) == 3
+
+    def test_headers(self):
+        app, _ = self.make_app()
+        app.after_request(set_i18n_headers)
+        app.add_url_rule("/", "index", lambda: "")
+        response = app.test_client().get("/?lang=de_AT")
+        assert response.headers["Content-Language"] == "de-AT"
+        assert response.headers["Vary"] == "Accept-Language"
+
+
+class LazyStringJSONTestCase(unittest.TestCase):
+    def test_resolve_lazy_strings(self):
+        app = flask.Flask(__name__)
+        babel_ext.Babel(app, default_locale="de_DE")
+        domain = babel_ext.Domain(domain="test")
+        strings = [
+            lazy_gettext("Yes"),
+            lazy_gettext("Hello %(name)s!", name="Peter"),
+            babel_ext.lazy_ngettext("%(num)s Apple", "%(num)s Apples", 3),
+            babel_ext.lazy_pgettext("button", "Hello Guest!"),
+            domain.lazy_gettext("first"),
+            domain.lazy_pgettext("ctx", "first"),
+            LazyString(lambda: "other"),
+            lazy_gettext(string="Yes"),
+        ]
+        with app.test_request_context():
+            expected = [str(s) for s in strings]
+            with mock.patch.object(
+                babel_ext.Domain,
+                "get_translations",
+                autospec=True,
+                side_effect=babel_ext.Domain.get_translations,
+            ) as get_translations:
+                assert babel_ext.resolve_lazy_strings(strings) == expected
+        assert expected[:4] == ["Ja", "Hallo Peter!", "3 Äpfel", "Hallo Gast!"]
+        # once for the default domain, once for the test domain and once
+        # for the string passed as keyword argument
+        assert get_translations.call_count == 3
+
+    def test_json_provider(self):
+        app = flask.Flask(__name__)
+        app.json = LazyStringJSONProvider(app)
+        babel_ext.Babel(app, default_locale="de_DE")
+        label = lazy_gettext("Yes")
+        payload = {
+            "choices": [(1, label), (2, lazy_gettext("No"))],
+            "nested": {"label": label, "date": date(2010, 4, 12)},
+        }
+        with app.test_request_context():
+            response = flask.jsonify(payload)
+            assert response.get_json() == {
+                "choices": [[1, "Ja"], [2, "No"]],
+                "nested": {"label": "Ja", "date": "Mon, 12 Apr 2010 00:00:00 GMT"},
+            }
+            assert app.json.dumps(payload) == flask.json.provider.DefaultJSONProvider(
+                app
+            ).dumps(payload)
+
+
+class PluralRuleTestCase(unittest.TestCase):
+    def test_table(self):
+        polish = (
+            "nplurals=3; plural=(n==1 ? 0 : n%10>=2 && n%10<=4 && "
+            "(n%100<10 || n%100>=20) ? 1 : 2);"
+        )
+        rule = plurals.get_plural_rule(polish)
+        assert plurals.get_plural_rule(polish) is rule
+        func = c2py(polish.split("plural=")[1].rstrip(";"))
+        for n in [0, 1, 2, 5, 12, 22, 999, 1000, 1002, 10**12]:
+            assert rule(n) == func(n)
+        assert len(rule.table) == plurals.PLURAL_TABLE_SIZE
+        with pytest.raises(TypeError):
+            rule("1")
+
+    def test_shared_between_catalogs(self):
+        app = flask.Flask(__name__)
+        babel_ext.Babel(app, default_locale="de_DE")
+        domains = [babel_ext.Domain(), babel_ext.Domain(mmap=True)]
+        with app.test_request_context():
+            catalogs = [domain.get_translations() for domain in domains]
+            assert catalogs[0] is not catalogs[1]
+            assert len(catalogs[0].plural.table) == plurals.PLURAL_TABLE_SIZE
+            assert catalogs[0].plural is catalogs[1].plural
+            for domain in domains:
+                assert domain.ngettext("%(num)s Apple", "%(num)s Apples", 1) == (
+                    "1 Apfel"
+                )
+                assert domain.ngettext("%(num)s Apple", "%(num)s Apples", 5) == (
+                    "5 Äpfel"
+                )
+
+
+class InterpolationTestCase(unittest.TestCase):
+    def test_compile_percent(self):
+        variables = {"name": "Peter", "num": 3.14159, "obj": "q"}
+        for string in [
+            "Hello %(name)s!",
+            "%(num)05.1f%% of %(name)r and %(obj)a {braces}",
+            "%(num)d%(num)e",
+            "no placeholders",
+        ]:
+            assert interpolation.compile_percent(string)(variables) == (
+                string % variables
+            )
+        assert interpolation.compile_percent("%s and %(name)s") is None
+        assert interpolation.compile_percent("100%") is None
+        assert interpolation.percent_placeholders("%(a)s %(b)d %%") == {"a", "b"}
+
+    def test_interpolate(self):
+        app = flask.Flask(__name__)
+        babel_ext.Babel(app, default_locale="de_DE")
+        with app.test_request_context():
+            with mock.patch.object(
+                interpolation, "compile_percent", wraps=interpolation.compile_percent
+            ) as compile_percent:
+                for _ in range(3):
+                    assert gettext("Hello %(name)s!", name="Peter") == "Hallo Peter!"
+                    assert ngettext("%(num)s Apple", "%(num)s Apples", 3) == "3 Äpfel"
+            assert compile_percent.call_count <= 2
+
+    def test_full_cache(self):
+        variables = {"name": "Peter"}
+        with (
+            mock.patch.object(interpolation, "_templates", LRUCache(1)),
+            mock.patch.object(interpolation, "_candidates", LRUCache(1)),
+            mock.patch.object(
+                interpolation, "compile_percent", wraps=interpolation.compile_percent
+            ) as compile_percent,
+        ):
+            assert (
+                interpolation.interpolate("A %(name)s", "a %(name)s", variables)
+                == "A Peter"
+            )
+            assert compile_percent.call_count == 1
+            # the cache is full, the first call does not compile
+            assert (
+                interpolation.interpolate("B %(name)s", "b %(name)s", variables)
+                == "B Peter"
+            )
+            assert compile_percent.call_count == 1
+            assert (
+                interpolation.interpolate("B %(name)s", "b %(name)s", variables)
+                == "B Peter"
+            )
+            assert compile_percent.call_count == 2
+            assert ("B %(name)s", "b %(name)s") in interpolation._templates
+            assert ("A %(name)s", "a %(name)s") not in interpolation._templates
+
+            # invalid translations are still caught
+            with pytest.warns(interpolation.InvalidTranslationWarning):
+                rv = interpolation.interpolate("C %(nme)s", "C %(name)s", variables)
+            assert rv == "C Peter"
+
+    def test_invalid_translation(self):
+        with pytest.warns(interpolation.InvalidTranslationWarning):
+            rv = interpolation.interpolate(
+                "Hallo %(nme)s!", "Hello %(name)s!", {"name": "Peter"}
+            )
+        assert rv == "Hello Peter!"
+        with pytest.warns(interpolation.InvalidTranslationWarning):
+            rv = interpolation.interpolate(
+                "%(count)s Äpfel",
+                "%(num)s Apple",
+                {"num": 2},
+                msgid_plural="%(num)s Apples",
+            )
+        assert rv == "2 Apples"
+        # the num of plural messages is always available
+        rv = interpolation.interpolate(
+            "%(num)s Äpfel für %(name)s",
+            "One apple for %(name)s",
+            {"num": 2, "name": "Peter"},
+            msgid_plural="Apples for %(name)s",
+        )
+        assert rv == "2 Äpfel für Peter"
+
+    def test_icu(self):
+        message = (
+            "{guests, plural, offset:1 =0 {Nobody} =1 {{host}}"
+            " one {{host} and # other} other {{host} and # others}}"
+        )
+        template = interpolation.compile_icu(message, Locale("en"))
+        assert [template({"guests": n, "host": "Ann"}) for n in (0, 1, 2, 1001)] == [
+            "Nobody",
+            "Ann",
+            "Ann and 1 other",
+            "Ann and 1,000 others",
+        ]
+
+        template = interpolation.compile_icu(
+            "{g, select, female {her} other {their}} {n, selectordinal,"
+            " one {#st} two {#nd} few {#rd} other {#th}} It''s '{quoted}'",
+            Locale("en"),
+        )
+        assert template({"g": "female", "n": 2}) == "her 2nd It's {quoted}"
+        assert template({"g": "x", "n": 11}) == "their 11th It's {quoted}"
+
+        with pytest.raises(ValueError):
+            interpolation.compile_icu("{n, plural, one {#}}")
+        assert interpolation.icu_placeholders("{a} {b, select, x {{c}} other {}}") == {
+            "a",
+            "b",
+            "c",
+        }
+
+    def test_icu_domain(self):
+        app = flask.Flask(__name__)
+        babel_ext.Babel(app, default_locale="de_DE")
+        domain = babel_ext.Domain(icu=True)
+        with app.test_request_context():
+            message = "{num, plural, one {# Apfel} other {# Äpfel}}"
+            assert domain.gettext(message, num=1000) == "1.000 Äpfel"
+            assert domain.gettext(message, num=1) == "1 Apfel"
+            assert domain.gettext("It''s") == "It's"
+            with pytest.warns(interpolation.InvalidTranslationWarning):
+                rv = interpolation.interpolate_icu(
+                    "{nme}", "{name}", {"name": "x"}, Locale("de")
+                )
+            assert rv == "x"
+
+
+class CompileTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.dirname = os.path.join(self.tmpdir, "translations")
+        shutil.copytree(TRANSLATIONS_DIR, self.dirname)
+        self.mo = {
+            domain: os.path.join(self.dirname, "de", "LC_MESSAGES", domain + ".mo")
+            for domain in ("messages", "test")
+        }
+        for filename in self.mo.values():
+            os.remove(filename)
+
+        self.app = flask.Flask(__name__)
+        babel = babel_ext.Babel(
+            self.app,
+            default_locale="de_DE",
+            default_domain=babel_ext.Domain(dirname=self.dirname),
+        )
+        babel.register_domain(babel_ext.Domain(dirname=self.dirname, domain="test"))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def read_mo(self) -> dict[str, bytes]:
+        rv = {}
+        for domain, filename in self.mo.items():
+            with open(filename, "rb") as fp:
+                rv[domain] = fp.read()
+        return rv
+
+    def test_parallel_matches_serial(self):
+        results = compile_catalogs(self.app, jobs=1)
+        assert [(r.domain, r.locale, r.status) for r in results] == [
+            ("messages", "de", "compiled"),
+            ("test", "de", "compiled"),
+        ]
+        serial = self.read_mo()
+
+        results = compile_catalogs(self.app, jobs=2, force=True)
+        assert [r.status for r in results] == ["compiled", "compiled"]
+        assert self.read_mo() == serial
+
+        with self.app.test_request_context():
+            assert gettext("Yes") == "Ja"
+
+    def test_matches_pybabel(self):
+        compile_catalogs(self.app, jobs=1)
+        for domain, data in self.read_mo().items():
+            with open(self.mo[domain][:-3] + ".po", "rb") as fp:
+                catalog = read_po(fp, "de", domain)
+            buf = io.BytesIO()
+            write_mo(buf, catalog)
+            assert data == buf.getvalue()
+
+    def test_hash_table(self):
+        results = compile_catalogs(self.app, jobs=1, hash_table=True)
+        assert [r.status for r in results] == ["compiled", "compiled"]
+        # the hash table is part of the digest, plain files are compiled again
+        results = compile_catalogs(self.app, jobs=1)
+        assert [r.status for r in results] == ["compiled", "compiled"]
+        compile_catalogs(self.app, jobs=1, hash_table=True)
+
+        # memory-mapped catalogs do not have to index the compiled files
+        with open(self.mo["messages"], "rb") as fp:
+            catalog = MappedTranslations(fp)
+        assert catalog._catalog._hash_size > 2
+        assert catalog.ugettext("Yes") == "Ja"
+        assert catalog._catalog._index is None
+
+    def test_skip_unchanged(self):
+        compile_catalogs(self.app, jobs=1)
+        results = compile_catalogs(self.app, jobs=1)
+        assert [r.status for r in results] == ["unchanged", "unchanged"]
+
+        po = self.mo["test"][:-3] + ".po"
+        with open(po, "a") as fp:
+            fp.write('\nmsgid "Added"\nmsgstr "Hinzugefügt"\n')
+        results = compile_catalogs(self.app, jobs=1)
+        assert [r.status for r in results] == ["unchanged", "compiled"]
+
+        # a removed .mo file is compiled again
+        os.remove(self.mo["messages"])
+        results = compile_catalogs(self.app, domains=["messages"], jobs=1)
+        assert [(r.domain, r.status) for r in results] == [("messages", "compiled")]
+
+    def test_command(self):
+        runner = self.app.test_cli_runner()
+        result = runner.invoke(args=["babel", "compile", "--jobs", "1", "--snapshots"])
+        assert result.exit_code == 0, result.output
+        assert "2 compiled, 0 unchanged, 0 failed" in result.output
+        assert load_snapshot(self.mo["messages"]) is not None
+
+        result = runner.invoke(args=["babel", "compile", "--snapshots"])
+        assert "0 compiled, 2 unchanged" in result.output
+
+        with open(self.mo["test"][:-3] + ".po", "a") as fp:
+            fp.write('\nmsgid "broken\n')
+        result = runner.invoke(args=["babel", "compile", "--jobs", "1"])
+        assert result.exit_code == 1
+        assert "test [de]: failed" in result.output
+        assert "PoFileError" in result.output
+
+
+class ExtractTestCase(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.write(
+            "views.py",
+            "from flask_babelplus import gettext, lazy_ngettext\n"
+            "# NOTE: shown on the front page\n"
+            "title = gettext('Welcome')\n"
+            "apples = lazy_ngettext('%(num)s Apple', '%(num)s Apples', 2)\n",
+        )
+        self.write(
+            "templates/index.html",
+            "{% i18n_cache 'index' %}{{ _('Welcome') }}{% endi18n_cache %}\n"
+            "{% trans %}Hello {{ name }}!{% endtrans %}\n",
+        )
+        self.write("plugin/helpers.py", "_('Plugin message')\n")
+        os.makedirs(os.path.join(self.root, "translations"))
+        os.makedirs(os.path.join(self.root, "plugin", "translations"))
+
+        self.app = flask.Flask(__name__, root_path=self.root)
+        babel = babel_ext.Babel(self.app)
+        babel.register_domain(
+            babel_ext.Domain(
+                dirname=os.path.join(self.root, "plugin", "translations"),
+                domain="plugin",
+            )
+        )
+        self.pot = os.path.join(self.root, "translations", "messages.pot")
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def write(self, name, content):
+        path = os.path.join(self.root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as fp:
+            fp.write(content)
+
+    def read_pot(self, filename=None):
+        with open(filename or self.pot, "rb") as fp:
+            return fp.read()
+
+    def test_extract(self):
+        results = extract_messages(self.app, jobs=1)
+        assert [(r.domain, r.status, r.parsed) for r in results] == [
+            ("messages", "extracted", 2),
+            ("plugin", "extracted", 1),
+        ]
+        catalog = read_po(io.BytesIO(self.read_pot()))
+        assert catalog["Welcome"].locations == [
+            ("templates/index.html", 1),
+            ("views.py", 3),
+        ]
+        assert catalog["Welcome"].auto_comments == ["shown on the front page"]
+        assert catalog["%(num)s Apple"].id == ("%(num)s Apple", "%(num)s Apples")
+        assert "Hello %(name)s!" in catalog
+        assert "Plugin message" not in catalog
+        plugin = read_po(io.BytesIO(self.read_pot(results[1].pot)), domain="plugin")
+        assert [message.id for message in plugin if message.id] == ["Plugin message"]
+
+    def test_shared_translations_dir(self):
+        get_state(self.app).babel.register_domain(
+            babel_ext.Domain(os.path.join(self.root, "translations"), "test")
+        )
+        results = extract_messages(self.app, domains=["test"], jobs=1)
+        assert [(r.domain, r.status) for r in results] == [("test", "extracted")]
+        assert results[0].pot == os.path.join(self.root, "translations", "test.pot")
+        assert not os.path.exists(self.pot)
+
+        # the domains share the parsed files and the cache
+        results = extract_messages(self.app, jobs=1)
+        assert [(r.domain, r.status, r.parsed) for r in results] == [
+            ("messages", "extracted", 0),
+            ("plugin", "extracted", 1),
+            ("test", "unchanged", 0),
+        ]
+        assert (
+            self.read_pot().split(b"\n#: ", 1)[1]
+            == (self.read_pot(results[2].pot).split(b"\n#: ", 1)[1])
+        )
+
+    def test_mapping_file(self):
+        self.write("babel.cfg", "[python: **.py]\n")
+        results = extract_messages(self.app, domains=["messages"], jobs=1)
+        assert [(r.status, r.parsed) for r in results] == [("extracted", 1)]
+        catalog = read_po(io.BytesIO(self.read_pot()))
+        assert "Welcome" in catalog
+        assert "Hello %(name)s!" not in catalog
+
+        mapping = os.path.join(self.root, "other.cfg")
+        self.write(
+            "other.cfg",
+            "[ignore: views.py]\n"
+            "[jinja2: templates/**.html]\n"
+            "extensions = flask_babelplus.caching.I18nCacheExtension\n",
+        )
+        runner = self.app.test_cli_runner()
+        result = runner.invoke(args=["babel", "extract", "-j", "1", "-F", mapping])
+        assert result.exit_code == 0, result.output
+        catalog = read_po(io.BytesIO(self.read_pot()))
+        assert catalog["Welcome"].locations == [("templates/index.html", 1)]
+        assert "Hello %(name)s!" in catalog
+
+    def test_incremental(self):
+        extract_messages(self.app, jobs=1)
+        first = self.read_pot()
+
+        results = extract_messages(self.app, jobs=1)
+        assert [(r.status, r.parsed) for r in results] == [
+            ("unchanged", 0),
+            ("unchanged", 0),
+        ]
+        assert self.read_pot() == first
+
+        self.write("views.py", "from flask_babelplus import gettext\ngettext('New')\n")
+        results = extract_messages(self.app, domains=["messages"], jobs=1)
+        assert [(r.status, r.parsed) for r in results] == [("extracted", 1)]
+        catalog = read_po(io.BytesIO(self.read_pot()))
+        assert "New" in catalog
+        assert "%(num)s Apple" not in catalog
+
+    def test_parallel_matches_serial(self):
+        extract_messages(self.app, jobs=1, use_cache=False)
+        serial = self.read_pot()
+        os.remove(self.pot)
+        results = extract_messages(self.app, jobs=2)
+        assert results[0].parsed == 2
+        assert self.read_pot().split(b"\n#: ", 1)[1] == serial.split(b"\n#: ", 1)[1]
+
+    def test_command(self):
+        runner = self.app.test_cli_runner()
+        result = runner.invoke(args=["babel", "extract", "-j", "1", "-k", "tr"])
+        assert result.exit_code == 0, result.output
+        assert "messages: extracted" in result.output
+
+        self.write("templates/broken.html", "{% trans %}Unclosed\n")
+        result = runner.invoke(args=["babel", "extract", "-j", "1"])
+        assert result.exit_code == 1
+        assert "templates/broken.html" in result.output
+
+
+class DomainRegistryTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.backend = SQLiteBackend(os.path.join(self.tmpdir, "catalogs.sqlite"))
+        self.backend.update_messages("messages", "de", {"Yes": "Jawohl"})
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_merged_lookup(self):
+        app = flask.Flask(__name__)
+        b = babel_ext.Babel(app, default_locale="de_DE")
+        plugin = babel_ext.Domain(domain="test")
+        override = babel_ext.Domain(backend=self.backend)
+        b.register_domain(app.extensions["babel"].domain)
+        b.register_domain(plugin, priority=10)
+        b.register_domain(override, priority=20)
+
+        with app.test_request_context():
+            assert gettext("first") == "erste"
+            assert plugin.gettext("Yes") == "Jawohl"
+            assert override.gettext("Hello %(name)s!", name="Peter") == "Hallo Peter!"
+            assert get_state().registry.get_translations(
+                plugin, app, babel_ext.get_locale()
+            ) is get_state().registry.get_translations(
+                override, app, babel_ext.get_locale()
+            )
+            # not registered, uses its own catalog
+            assert babel_ext.Domain().gettext("Yes") == "Ja"
+
+            # one dict holds the messages of all domains
+            merged = get_state().registry.get_translations(
+                plugin, app, babel_ext.get_locale()
+            )
+            assert merged._fallback is None
+            assert merged._catalog["Yes"] == "Jawohl"
+            assert merged._catalog["first"] == "erste"
+            data = json.loads(catalog_to_json(merged, "de_DE"))
+            assert data["messages"]["Yes"] == "Jawohl"
+            assert data["messages"]["first"] == "erste"
+            assert data["nplurals"] == 2
+
+        with app.test_request_context():
+            override.invalidate("de")
+            self.backend.update_messages("messages", "de", {"Yes": "Jo"})
+            assert gettext("Yes") == "Jo"
+
+    def test_deduplication(self):
+        app = flask.Flask(__name__)
+        b = babel_ext.Babel(app, default_locale="de_DE")
+        first, second = babel_ext.Domain(domain="test"), babel_ext.Domain(domain="test")
+        b.register_domain(first)
+        b.register_domain(second, priority=1)
+
+        with app.test_request_context():
+            assert second.gettext("first") == "erste"
+        assert "de_DE" in first.cache
+        assert "de_DE" not in second.cache
+
+    def test_blueprint(self):
+        app = flask.Flask(__name__)
+        b = babel_ext.Babel(app, default_locale="de_DE")
+        admin = flask.Blueprint("admin", __name__)
+        plugin = babel_ext.Domain(domain="test")
+
+        @admin.route("/")
+        def index():
+            return gettext("first")
+
+        @app.route("/")
+        def public():
+            return gettext("first")
+
+        app.register_blueprint(admin, url_prefix="/admin")
+        b.register_domain(app.extensions["babel"].domain)
+        b.register_domain(plugin, blueprint="admin")
+
+        client = app.test_client()
+        assert client.get("/admin/").text == "erste"
+        assert client.get("/").text == "first"
+
+
+class OverlayDomainTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = flask.Flask(__name__)
+        self.domain = babel_ext.OverlayDomain(maxsize=2)
+        babel_ext.Babel(self.app, default_locale="de_DE", default_domain=self.domain)
+        self.loads = []
+
+        @self.domain.tenantselector
+        def get_tenant():
+            return flask.g.get("tenant")
+
+        @self.domain.overlayloader
+        def load_overlay(tenant, locale):
+            self.loads.append(tenant)
+            return {
+                "acme": {"Yes": "Jawohl", ("%(num)s Apple", 1): "%(num)s Birnen"},
+                "globex": {"Yes": "Jo"},
+            }.get(tenant)
+
+    def test_overlay(self):
+        with self.app.test_request_context():
+            assert gettext("Yes") == "Ja"
+            flask.g.tenant = "acme"
+            assert gettext("Yes") == "Jawohl"
+            assert gettext("Hello %(name)s!", name="Peter") == "Hallo Peter!"
+            assert ngettext("%(num)s Apple", "%(num)s Apples", 1) == "1 Apfel"
+            assert ngettext("%(num)s Apple", "%(num)s Apples", 3) == "3 Birnen"
+            assert pgettext("button", "Hello %(name)s!", name="Peter") == (
+                "Hallo Peter!"
+            )
+            flask.g.tenant = "initech"
+            assert gettext("Yes") == "Ja"
+
+    def test_shared_base(self):
+        with self.app.test_request_context():
+            flask.g.tenant = "acme"
+            acme = self.domain.get_translations()
+            flask.g.tenant = "globex"
+            globex = self.domain.get_translations()
+            flask.g.tenant = "initech"
+            initech = self.domain.get_translations()
+
+        base = self.domain.cache["de_DE"]
+        assert acme.base is globex.base is initech is base
+        assert acme._catalog.base is base._catalog
+        assert len(acme._catalog) == len(base._catalog)
+
+    def test_bounded_cache(self):
+        with self.app.test_request_context():
+            for tenant in ("acme", "globex", "acme", "initech", "acme", "globex"):
+                flask.g.tenant = tenant
+                gettext("Yes")
+        assert self.loads == ["acme", "globex", "initech", "globex"]
+        assert len(self.domain.overlays) == 2
+
+        self.domain.invalidate_tenant("acme", "de")
+        with self.app.test_request_context():
+            flask.g.tenant = "acme"
+            assert gettext("Yes") == "Jawohl"
+        assert self.loads[-1] == "acme"
+
+        # reloading the base catalog rebuilds the overlays
+        self.domain.invalidate()
+        catalog_registry.clear()
+        with self.app.test_request_context():
+            flask.g.tenant = "globex"
+            assert gettext("Yes") == "Jo"
+        assert self.loads[-1] == "globex"
+
+    def test_lru_cache(self):
+        cache = LRUCache(2)
+        cache["a"] = 1
+        cache["b"] = 2
+        assert cache["a"] == 1
+        cache["c"] = 3
+        assert "b" not in cache
+        assert cache.keys() == ["a", "c"]
+        with pytest.raises(KeyError):
+            cache["b"]
+        with pytest.raises(ValueError):
+            LRUCache(0)
+
+
+class ImportTimeTestCase(unittest.TestCase):
+    def imported_modules(self, code):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", code],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        return {
+            line.rsplit("|", 1)[1].strip()
+            for line in result.stderr.splitlines()
+            if line.startswith("import time:") and "|" in line
+        }
+
+    def test_lazy_imports(self):
+        modules = self.imported_modules(
+            "import flask_babelplus; flask_babelplus.lazy_gettext('Yes')"
+        )
+        assert "flask_babelplus.core" in modules
+        for name in ("babel.dates", "babel.numbers", "babel.support", "sqlite3"):
+            assert name not in modules
+
+        modules = self.imported_modules("from flask_babelplus import OverlayDomain")
+        assert "babel.support" in modules
+
+
 class IntegrationTestCase(unittest.TestCase):
     def test_configure_jinja(self):
         app = flask.Flask(__name__)